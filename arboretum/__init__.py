@@ -13,4 +13,4 @@
 # limitations under the License.
 """Arboretum - Checking your compliance & security posture, continuously."""
 
-__version__ = "0.17.1"
+__version__ = "0.18.0"
@@ -13,11 +13,19 @@
 # limitations under the License.
 """Common utils."""
 
-import requests
-
+import time
 from collections import defaultdict
+from functools import lru_cache
+
+from arboretum.common.token_cache import TokenCache
+
 from compliance.config import get_config
 
+import requests
+
+# Process wide cache of access tokens keyed by tenant, client and scope
+TOKEN_CACHE = TokenCache()
+
 
 def get_token(
     client_id,
@@ -26,7 +34,21 @@ def get_token(
     grant_type="client_credentials",
     scope="https://management.azure.com/.default",
 ):
-    """Get Azure Cloud access token. returns: the access token."""
+    """
+    Get Azure Cloud access token.
+
+    Tokens are cached for the whole process, shared by all fetchers, until
+    they are due to expire according to the ``expires_in`` of the response.
+
+    :returns: the access token
+    """
+    return TOKEN_CACHE.get(
+        ("azure", tenant_id, client_id, scope),
+        lambda: _request_token(client_id, client_secret, tenant_id, grant_type, scope),
+    )
+
+
+def _request_token(client_id, client_secret, tenant_id, grant_type, scope):
     url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
     headers = {
         "Content-Type": "application/x-www-form-urlencoded",
@@ -36,14 +58,19 @@ def get_token(
         f"grant_type={grant_type}&client_id={client_id}"
         + f"&client_secret={client_secret}&scope={scope}"
     )
+    requested = time.time()
     resp = requests.post(url, headers=headers, data=data)
     resp.raise_for_status()
     token = resp.json()
-    return token["access_token"]
+    expires_at = None
+    if token.get("expires_in"):
+        expires_at = requested + int(token["expires_in"])
+    return token["access_token"], expires_at
 
 
+@lru_cache(maxsize=None)
 def get_credentials(config, account):
-    """Get credential for the account."""
+    """Get credential for the account, looked up once per process."""
     client_id = config.creds.get("azure_cloud", key="clientid", account=account)
     client_secret = config.creds.get("azure_cloud", key="clientsecret", account=account)
     tenant_id = config.creds.get("azure_cloud", key="tenantid", account=account)
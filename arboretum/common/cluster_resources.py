@@ -0,0 +1,257 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Common cluster resource fetcher functionality."""
+
+import io
+import json
+
+from arboretum.common.kube_constants import (
+    DISCOVERY_TTL_DEFAULT,
+    NAMESPACE_WORKERS_DEFAULT,
+    PAGE_SIZE_DEFAULT,
+    PROJECTION_EXCLUDE_DEFAULT,
+    RESOURCE_TYPES_DEFAULT,
+)
+from arboretum.common.kube_image_index import ImageIndex
+from arboretum.common.kube_object_index import ObjectIndex
+from arboretum.common.kube_utils import (
+    get_discovery_cache,
+    get_fresh_resource_types,
+    get_resource_type_ttls,
+)
+from arboretum.common.utils import (
+    StreamedObject,
+    store_raw_evidence_content,
+    to_unique_evidence_name_part,
+    write_json,
+)
+from arboretum.kubernetes.evidences.cluster_image_index import (
+    ClusterImageIndexEvidence,
+)
+from arboretum.kubernetes.evidences.cluster_resources_index import (
+    ClusterResourcesIndexEvidence,
+)
+from arboretum.kubernetes.evidences.cluster_resources_manifest import (
+    ClusterResourcesManifestEvidence,
+)
+
+from compliance.evidence import DAY, RawEvidence, get_evidence_by_path
+from compliance.utils.exceptions import EvidenceNotFoundError
+
+
+class ClusterResourcesFetcherMixin(object):
+    """
+    Cluster resources evidence handling shared by cluster resource fetchers.
+
+    A fetcher using this mixin sets ``config_prefix``, the prefix of its
+    configuration options such as ``org.kubernetes.cluster_resources``,
+    ``evidence_category``, the category of its evidence, and
+    ``evidence_title``, the title of the clusters in evidence descriptions.
+    It provides ``_index_previous``, which keys the clusters of a previous
+    cluster resources evidence content, and sets ``keep_state`` and
+    ``keep_resources`` when the state evidence, and the previous cluster
+    resources along with it, are needed.
+    """
+
+    @classmethod
+    def _setup_cluster_resources(cls):
+        """Read the common options and register the evidence they need."""
+        prefix = cls.config_prefix
+        category = cls.evidence_category
+        title = cls.evidence_title
+        cls.resource_types = cls.config.get(f"{prefix}.types", RESOURCE_TYPES_DEFAULT)
+        cls.ttls = get_resource_type_ttls(cls.resource_types, DAY)
+        cls.ttl = min(cls.ttls.values(), default=DAY)
+        cls.per_type_ttl = any(
+            isinstance(t, dict) and "ttl" in t for t in cls.resource_types
+        )
+        cls.layout = cls.config.get(f"{prefix}.layout", "single")
+        if cls.layout not in ("single", "cluster", "resource_type"):
+            raise ValueError(f"Unsupported cluster resources layout {cls.layout}")
+        if cls.layout == "single":
+            cls.evidence_path = f"raw/{category}/cluster_resources.json"
+            evidence = RawEvidence(
+                "cluster_resources.json",
+                category,
+                cls.ttl,
+                f"{title} cluster resources",
+            )
+        else:
+            cls.evidence_path = f"raw/{category}/cluster_resources_manifest.json"
+            evidence = ClusterResourcesManifestEvidence(
+                "cluster_resources_manifest.json",
+                category,
+                cls.ttl,
+                f"{title} cluster resources manifest",
+            )
+        cls.config.add_evidences([evidence])
+        cls.page_size = cls.config.get(f"{prefix}.page_size", PAGE_SIZE_DEFAULT)
+        cls.exclude = cls.config.get(f"{prefix}.exclude", PROJECTION_EXCLUDE_DEFAULT)
+        cls.namespace_workers = cls.config.get(
+            f"{prefix}.namespace_workers", NAMESPACE_WORKERS_DEFAULT
+        )
+        cls.discovery = None
+        if cls.config.get(f"{prefix}.discovery", True):
+            cls.discovery = get_discovery_cache(
+                cls.config.get(f"{prefix}.discovery_cache"),
+                cls.config.get(f"{prefix}.discovery_ttl", DISCOVERY_TTL_DEFAULT),
+            )
+        cls.image_index = cls.config.get(f"{prefix}.image_index", False)
+        if cls.image_index:
+            cls.config.add_evidences(
+                [
+                    ClusterImageIndexEvidence(
+                        "cluster_image_index.json",
+                        category,
+                        cls.ttl,
+                        f"{title} cluster container image index",
+                    )
+                ]
+            )
+        cls.object_index = cls.config.get(f"{prefix}.object_index", False)
+        if cls.object_index:
+            cls.config.add_evidences(
+                [
+                    ClusterResourcesIndexEvidence(
+                        "cluster_resources_index.json",
+                        category,
+                        cls.ttl,
+                        f"{title} cluster resources object index",
+                    )
+                ]
+            )
+
+    @classmethod
+    def _setup_state(cls, description):
+        """Register the state evidence when ``keep_state`` is set."""
+        cls.state_path = f"raw/{cls.evidence_category}/cluster_resources_state.json"
+        if cls.keep_state:
+            cls.config.add_evidences(
+                [
+                    RawEvidence(
+                        "cluster_resources_state.json",
+                        cls.evidence_category,
+                        cls.ttl,
+                        description,
+                    )
+                ]
+            )
+
+    def _new_indexes(self):
+        indexes = {}
+        if self.image_index:
+            indexes["images"] = ImageIndex()
+        if self.object_index:
+            indexes["objects"] = ObjectIndex()
+        return indexes
+
+    def _store_indexes(self, indexes):
+        paths = {
+            "images": "cluster_image_index.json",
+            "objects": "cluster_resources_index.json",
+        }
+        for name, index in indexes.items():
+            self._store_evidence(paths[name], index.as_dict())
+
+    def _store_state(self, state):
+        self._store_evidence("cluster_resources_state.json", state)
+
+    def _store_evidence(self, name, data):
+        evidence = get_evidence_by_path(f"raw/{self.evidence_category}/{name}")
+        evidence.set_content(json.dumps(data))
+        self.locker.add_evidence(evidence)
+
+    def _store_cluster(self, names, title, cluster):
+        """
+        Store the resources of a cluster and provide its manifest entry.
+
+        The evidence names are made of ``names``, the strings identifying the
+        cluster such as its label, which are converted so that different
+        clusters never share an evidence.
+        """
+        category = self.evidence_category
+        entry = {k: v for k, v in cluster.items() if k != "resources"}
+        if self.layout == "cluster":
+            content = io.StringIO()
+            write_json(content, cluster)
+            path = (
+                f"raw/{category}/cluster_resources_"
+                f"{to_unique_evidence_name_part(*names)}.json"
+            )
+            entry["evidence"] = path
+            entry["sha256"] = store_raw_evidence_content(
+                self.locker,
+                self.config,
+                path,
+                content.getvalue(),
+                ttl=self.ttl,
+                description=f"{title} resources",
+            )
+            return entry
+        resources = cluster["resources"]
+        if isinstance(resources, StreamedObject):
+            resources = resources.pairs
+        else:
+            resources = resources.items()
+        entry["resources"] = {}
+        for resource_type, items in resources:
+            path = (
+                f"raw/{category}/cluster_resources_"
+                f"{to_unique_evidence_name_part(*names, resource_type)}.json"
+            )
+            entry["resources"][resource_type] = {
+                "evidence": path,
+                "sha256": store_raw_evidence_content(
+                    self.locker,
+                    self.config,
+                    path,
+                    json.dumps(items),
+                    ttl=self.ttl,
+                    description=f"{title} {resource_type}",
+                ),
+            }
+        return entry
+
+    def _get_previous_snapshot(self):
+        """Provide the previous cluster resources and state."""
+        if not self.keep_state:
+            return {}, {}
+        try:
+            state = self.locker.get_evidence(self.state_path, ignore_ttl=True)
+            if not self.keep_resources:
+                return {}, state.content_as_json
+            evidence = self.locker.get_evidence(self.evidence_path, ignore_ttl=True)
+            if self.layout == "single":
+                previous = self._index_previous(
+                    evidence.content_as_json, lambda c: c["resources"]
+                )
+            else:
+                manifest = ClusterResourcesManifestEvidence.from_evidence(evidence)
+                previous = self._index_previous(
+                    manifest.as_a_dict,
+                    lambda c: manifest.get_resources(c, ignore_ttl=True),
+                )
+        except EvidenceNotFoundError:
+            return {}, {}
+        return previous, state.content_as_json
+
+    def _get_fresh_types(self, previous, fetched):
+        if not self.per_type_ttl or not previous:
+            return set()
+        if self.evidence_path in getattr(self.locker, "forced_evidence", []):
+            return set()
+        fresh = get_fresh_resource_types(
+            self.ttls, fetched, getattr(self.locker, "ttl_tolerance", 0)
+        )
+        return fresh & set(previous)
@@ -0,0 +1,46 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Utility module for IBM Cloud Kubernetes Service."""
+
+from arboretum.common.iam_ibm_utils import get_tokens
+from arboretum.common.ibm_constants import IC_CONTAINERS_BASE_URL
+from arboretum.common.utils import new_session
+
+
+def get_cluster_list(config, api_key, timeout=None):
+    """
+    Get the clusters of an IBM Cloud account.
+
+    See: https://cloud.ibm.com/apidocs/kubernetes#getclusters
+
+    :param config: the compliance configuration object
+    :param str api_key: the IBM Cloud API key for an IBM Cloud account
+    :param timeout: optional timeout of the request, in seconds or as a
+      ``(connect, read)`` tuple
+
+    :returns: the list of clusters of the account
+    """
+    session = new_session(
+        config,
+        IC_CONTAINERS_BASE_URL,
+        timeout=timeout,
+        Accept="application/json",
+        Authorization=f"Bearer {get_tokens(api_key)[0]}",
+    )
+    try:
+        resp = session.get("/global/v1/clusters")
+        resp.raise_for_status()
+        return resp.json()
+    finally:
+        session.close()
@@ -13,31 +13,56 @@
 # limitations under the License.
 """Utility module for IBM Cloud IAM."""
 
-from arboretum.common.ibm_constants import IAM_API_KEY_GRANT_TYPE, IAM_TOKEN_URL
+import time
+
+from arboretum.common.ibm_constants import (
+    IAM_API_KEY_GRANT_TYPE,
+    IAM_REFRESH_TOKEN_GRANT_TYPE,
+    IAM_TOKEN_URL,
+)
+from arboretum.common.token_cache import TokenCache, hash_secret
 
 import requests
 
+# Process wide cache of IAM tokens keyed by API key hash
+TOKEN_CACHE = TokenCache()
+
 
 def get_tokens(api_key):
     """
     Get IBM Cloud access token and refresh token based on api_key.
 
+    Tokens are cached for the whole process until they are due to expire,
+    according to the ``expires_in`` of the IAM response, and are then
+    refreshed using the refresh token grant.
+
     See: https://cloud.ibm.com/apidocs/iam-identity-token-api
 
     :param str api_key: the IBM Cloud API key for an IBM Cloud account
 
     :returns: a tuple containing the access token and the refresh token
     """
+    return TOKEN_CACHE.get(
+        ("iam", hash_secret(api_key)),
+        lambda: _request_tokens(
+            f"grant_type={IAM_API_KEY_GRANT_TYPE}&apikey={api_key}"
+        ),
+        lambda tokens: _request_tokens(
+            f"grant_type={IAM_REFRESH_TOKEN_GRANT_TYPE}&refresh_token={tokens[1]}"
+        ),
+    )
+
+
+def _request_tokens(data):
     headers = {
         "Content-Type": "application/x-www-form-urlencoded",
         "Accept": "application/json",
     }
-    resp = requests.post(
-        IAM_TOKEN_URL,
-        headers=headers,
-        auth=("bx", "bx"),
-        data=f"grant_type={IAM_API_KEY_GRANT_TYPE}&apikey={api_key}",
-    )
+    requested = time.time()
+    resp = requests.post(IAM_TOKEN_URL, headers=headers, auth=("bx", "bx"), data=data)
     resp.raise_for_status()
     tokens = resp.json()
-    return tokens["access_token"], tokens["refresh_token"]
+    expires_at = None
+    if tokens.get("expires_in"):
+        expires_at = requested + tokens["expires_in"]
+    return (tokens["access_token"], tokens["refresh_token"]), expires_at
@@ -19,5 +19,34 @@ IAM_TOKEN_URL = "https://iam.cloud.ibm.com/identity/token"  # nosec B105
 # IAM token API KEY grant type
 IAM_API_KEY_GRANT_TYPE = "urn:ibm:params:oauth:grant-type:apikey"
 
+# IAM token refresh token grant type
+IAM_REFRESH_TOKEN_GRANT_TYPE = "refresh_token"  # nosec B105
+
 # IBM Cloud containers API base URL
 IC_CONTAINERS_BASE_URL = "https://containers.cloud.ibm.com"
+
+# Default number of IBM Cloud accounts queried concurrently
+ACCOUNT_WORKERS_DEFAULT = 4
+
+# Default connect and read timeouts, in seconds, of IBM Cloud cluster requests
+CLUSTER_TIMEOUT_DEFAULT = (10, 120)
+
+# IBM Cloud resource controller API base URL
+IC_RESOURCE_CONTROLLER_BASE_URL = "https://resource-controller.cloud.ibm.com"
+
+# Default and maximum number of resource instances per resource controller page
+RESOURCE_INSTANCES_PAGE_SIZE_DEFAULT = 100
+
+# Resource instance fields removed by default, links to other API resources
+RESOURCE_INSTANCES_EXCLUDE_DEFAULT = [
+    "dashboard_url",
+    "resource_aliases_url",
+    "resource_bindings_url",
+    "resource_keys_url",
+]
+
+# Default number of resource groups paged concurrently with sharding
+RESOURCE_GROUP_WORKERS_DEFAULT = 4
+
+# Default connect and read timeouts, in seconds, of resource controller requests
+RESOURCE_INSTANCES_TIMEOUT_DEFAULT = (10, 120)
@@ -15,3 +15,65 @@
 
 # Default Kubernetes resource types
 RESOURCE_TYPES_DEFAULT = ["nodes", "pods", "configmaps"]
+
+# Default number of items requested per Kubernetes list call
+PAGE_SIZE_DEFAULT = 500
+
+# Number of times a paged list is restarted after its continue token expired
+LIST_RESTARTS_MAX = 3
+
+# Default number of concurrent workers used when fetching cluster resources
+MAX_WORKERS_DEFAULT = 1
+
+# Default number of seconds spent watching for changes since a resource version
+WATCH_TIMEOUT_DEFAULT = 5
+
+# Default fields removed from every Kubernetes resource item
+PROJECTION_EXCLUDE_DEFAULT = [
+    "metadata.managedFields",
+    ["metadata", "annotations", "kubectl.kubernetes.io/last-applied-configuration"],
+]
+
+# Accept headers of the Kubernetes resource list formats other than full objects
+RESOURCE_FORMATS = {
+    "metadata": (
+        "application/json;as=PartialObjectMetadataList;v=v1;g=meta.k8s.io,"
+        "application/json"
+    ),
+    "table": "application/json;as=Table;v=v1;g=meta.k8s.io,application/json",
+}
+
+# Watch Accept headers of resource formats, watch events carry single objects
+WATCH_RESOURCE_FORMATS = {
+    "metadata": (
+        "application/json;as=PartialObjectMetadata;v=v1;g=meta.k8s.io,"
+        "application/json"
+    ),
+}
+
+# Default number of seconds Kubernetes API discovery results are cached for
+DISCOVERY_TTL_DEFAULT = 24 * 60 * 60
+
+# Default number of namespaces listed concurrently with namespace sharding
+NAMESPACE_WORKERS_DEFAULT = 4
+
+# List query parameters of the Kubernetes resource type selector options
+SELECTOR_PARAMS = {
+    "label_selector": "labelSelector",
+    "field_selector": "fieldSelector",
+}
+
+# RBAC resource types and the fields used to build an effective permission index
+RBAC_API_VERSION = "rbac.authorization.k8s.io/v1"
+RBAC_RESOURCE_TYPES = [
+    {"name": f"{RBAC_API_VERSION}/roles", "include": ["rules"]},
+    {
+        "name": f"{RBAC_API_VERSION}/clusterroles",
+        "include": ["rules", "aggregationRule", "metadata.labels"],
+    },
+    {"name": f"{RBAC_API_VERSION}/rolebindings", "include": ["roleRef", "subjects"]},
+    {
+        "name": f"{RBAC_API_VERSION}/clusterrolebindings",
+        "include": ["roleRef", "subjects"],
+    },
+]
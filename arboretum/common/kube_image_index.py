@@ -0,0 +1,115 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes container image index."""
+
+import threading
+
+# Pod spec container lists and the pod status lists reporting on them
+CONTAINER_FIELDS = {
+    "initContainers": "initContainerStatuses",
+    "containers": "containerStatuses",
+    "ephemeralContainers": "ephemeralContainerStatuses",
+}
+
+
+class ImageIndex(object):
+    """
+    Deduplicated index of the container images used by pods.
+
+    Resource items are added as they are retrieved so that the index is built
+    in the same pass as the cluster resources evidence.  Items that are not
+    pods, or whose containers were not retrieved, are ignored.  Items can be
+    added by several threads.
+    """
+
+    def __init__(self):
+        """Construct an empty image index."""
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def add(self, items, **reference):
+        """
+        Add the containers of pods to the index.
+
+        :param list items: resource items, typically the items of a pod list
+        :param reference: keyword arguments identifying where the items come
+          from, such as the cluster, added to every container reference
+        """
+        for item in items:
+            spec = item.get("spec") if isinstance(item, dict) else None
+            if not isinstance(spec, dict) or "containers" not in spec:
+                continue
+            metadata = item.get("metadata", {})
+            status = item.get("status") or {}
+            for containers_field, statuses_field in CONTAINER_FIELDS.items():
+                statuses = {s.get("name"): s for s in status.get(statuses_field) or []}
+                for container in spec.get(containers_field) or []:
+                    image = container.get("image")
+                    if not image:
+                        continue
+                    digests = {_digest(image)}
+                    container_status = statuses.get(container.get("name"), {})
+                    digests.add(_digest(container_status.get("imageID", "")))
+                    digests.discard(None)
+                    self._add(
+                        image,
+                        digests,
+                        {
+                            **reference,
+                            "namespace": metadata.get("namespace"),
+                            "pod": metadata.get("name"),
+                            "container": container.get("name"),
+                        },
+                    )
+
+    def _add(self, image, digests, reference):
+        with self._lock:
+            entry = self._images.setdefault(image, {"digests": set(), "references": []})
+            entry["digests"].update(digests)
+            entry["references"].append(reference)
+
+    def as_dict(self):
+        """
+        Provide the index content.
+
+        :returns: a dictionary with the ``images`` referenced, keyed by image as
+          specified in the pod spec, with the ``digests`` the image resolved to
+          and the pod container ``references``, and the images of each
+          ``digests`` keyed by digest.  Lists are sorted so that the content
+          does not depend on the order items were added.
+        """
+        images, digests = {}, {}
+        with self._lock:
+            for image in sorted(self._images):
+                entry = self._images[image]
+                images[image] = {
+                    "digests": sorted(entry["digests"]),
+                    "references": sorted(entry["references"], key=_reference_key),
+                }
+                for digest in entry["digests"]:
+                    digests.setdefault(digest, []).append(image)
+        return {"images": images, "digests": dict(sorted(digests.items()))}
+
+
+def _digest(image):
+    # Image references and image IDs such as "docker-pullable://repo@sha256:.."
+    if "@" in image:
+        return image.rsplit("@", 1)[1]
+    if image.startswith("sha256:"):
+        return image
+    return None
+
+
+def _reference_key(reference):
+    return [(k, str(v)) for k, v in sorted(reference.items())]
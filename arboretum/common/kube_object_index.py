@@ -0,0 +1,111 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes resource object hash index."""
+
+import hashlib
+import json
+import threading
+
+# Number of hexadecimal characters of the SHA256 content hash kept per object
+HASH_LENGTH = 16
+
+
+class ObjectIndex(object):
+    """
+    Compact index of the objects of cluster resource snapshots.
+
+    Every object is recorded by ``metadata.uid``, or by namespace and name
+    when the uid was not retrieved, with its name, resource version and a
+    truncated SHA256 hash of its content as retrieved.  Comparing the indexes
+    of two snapshots with :func:`diff_object_indexes` finds the objects
+    added, removed and changed without loading the snapshots themselves.
+    Items can be added by several threads.
+    """
+
+    def __init__(self):
+        """Construct an empty object index."""
+        self._clusters = {}
+        self._lock = threading.Lock()
+
+    def add(self, cluster, resource_type, items):
+        """
+        Add the items of a resource list to the index.
+
+        :param str cluster: the cluster the items come from
+        :param str resource_type: the resource type of the items
+        :param list items: the resource items
+        """
+        entries = dict(_index_entry(item) for item in items)
+        with self._lock:
+            self._clusters.setdefault(cluster, {})[resource_type] = entries
+
+    def as_dict(self):
+        """
+        Provide the index content.
+
+        :returns: a dictionary keyed by cluster, then resource type, then
+          object key, of ``[name, resourceVersion, hash]`` lists
+        """
+        with self._lock:
+            return {
+                cluster: dict(sorted(resources.items()))
+                for cluster, resources in sorted(self._clusters.items())
+            }
+
+
+def diff_object_indexes(previous, current):
+    """
+    Compare two object indexes.
+
+    Only the resource types of the clusters found in both indexes are
+    compared, so that adding a cluster or a resource type to the fetcher
+    configuration is not reported as objects being added.
+
+    :param dict previous: the earlier index content
+    :param dict current: the later index content
+
+    :returns: a dictionary keyed by cluster, then resource type, of the
+      sorted ``added``, ``removed`` and ``changed`` object names.  Resource
+      types without changes are omitted.
+    """
+    changes = {}
+    for cluster, resources in sorted(current.items()):
+        for resource_type, objects in sorted(resources.items()):
+            before = previous.get(cluster, {}).get(resource_type)
+            if before is None:
+                continue
+            diff = {
+                "added": sorted(objects[k][0] for k in objects.keys() - before.keys()),
+                "removed": sorted(before[k][0] for k in before.keys() - objects.keys()),
+                "changed": sorted(
+                    objects[k][0]
+                    for k in objects.keys() & before.keys()
+                    if objects[k][2] != before[k][2]
+                ),
+            }
+            if any(diff.values()):
+                changes.setdefault(cluster, {})[resource_type] = diff
+    return changes
+
+
+def _index_entry(item):
+    if not isinstance(item, dict):
+        item = {"metadata": {"name": str(item)}}
+    metadata = item.get("metadata") or {}
+    name = metadata.get("name", "")
+    if metadata.get("namespace"):
+        name = f'{metadata["namespace"]}/{name}'
+    content = json.dumps(item, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(content.encode()).hexdigest()[:HASH_LENGTH]
+    return metadata.get("uid", name), [name, metadata.get("resourceVersion"), digest]
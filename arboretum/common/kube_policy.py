@@ -0,0 +1,215 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes resource policy rules and single pass evaluation engine."""
+
+from arboretum.common.kube_image_index import CONTAINER_FIELDS
+
+FAILURE = "failure"
+WARNING = "warning"
+
+# Registered rules keyed by rule name, see the rule decorator
+RULES = {}
+
+
+class Rule(object):
+    """
+    A declarative policy rule evaluated against each cluster resource object.
+
+    The rule ``evaluate`` function is called with a :class:`PolicyObject` and
+    returns an iterable of finding messages, either strings or dictionaries
+    of details.  Rules checking pod specs use the pod spec and containers of
+    the policy object, which are located once per object whatever the number
+    of rules.
+    """
+
+    def __init__(self, name, title, evaluate, severity=FAILURE):
+        """
+        Construct a rule.
+
+        :param str name: the rule name used in configuration
+        :param str title: the rule title used in reports
+        :param evaluate: the function evaluating an object
+        :param str severity: ``failure`` or ``warning``
+        """
+        if severity not in (FAILURE, WARNING):
+            raise ValueError(f"Invalid rule severity {severity}")
+        self.name = name
+        self.title = title
+        self.evaluate = evaluate
+        self.severity = severity
+
+
+def rule(name, title, severity=FAILURE):
+    """
+    Register a function as a policy rule.
+
+    :param str name: the rule name used in configuration
+    :param str title: the rule title used in reports
+    :param str severity: ``failure`` or ``warning``
+    """
+
+    def register(evaluate):
+        if name in RULES:
+            raise ValueError(f"Rule {name} is already registered")
+        RULES[name] = Rule(name, title, evaluate, severity)
+        return evaluate
+
+    return register
+
+
+class PolicyObject(object):
+    """A cluster resource object as seen by policy rules."""
+
+    def __init__(self, cluster, resource_type, item):
+        """Construct the policy object for a resource item of a cluster."""
+        self.cluster = cluster
+        self.resource_type = resource_type
+        self.item = item
+        metadata = item.get("metadata") or {}
+        self.name = metadata.get("name")
+        self.namespace = metadata.get("namespace")
+        self._pod_spec = _get_pod_spec(item)
+
+    @property
+    def pod_spec(self):
+        """Provide the pod spec of pods and workload templates, or None."""
+        return self._pod_spec
+
+    @property
+    def containers(self):
+        """Provide the containers of the pod spec, init containers included."""
+        if not hasattr(self, "_containers"):
+            self._containers = [
+                container
+                for field in CONTAINER_FIELDS
+                for container in (self._pod_spec or {}).get(field) or []
+            ]
+        return self._containers
+
+
+class PolicyEngine(object):
+    """
+    Evaluate a set of rules over cluster resources in a single traversal.
+
+    Resource lists are added one at a time and every rule is evaluated
+    against each object as it is visited, so that the resources evidence is
+    loaded and walked once whatever the number of rules.
+    """
+
+    def __init__(self, rules=None, exclude_namespaces=None):
+        """
+        Construct the engine.
+
+        :param list rules: the names of the rules to evaluate, defaults to all
+          registered rules
+        :param list exclude_namespaces: namespaces whose objects are skipped
+        """
+        names = RULES.keys() if rules is None else rules
+        unknown = [n for n in names if n not in RULES]
+        if unknown:
+            raise ValueError(f'Unknown rules {", ".join(unknown)}')
+        self.rules = [RULES[n] for n in names]
+        self.exclude_namespaces = set(exclude_namespaces or [])
+        self.findings = {r.name: [] for r in self.rules}
+
+    def evaluate(self, cluster, resource_type, items):
+        """
+        Evaluate the rules against a resource list.
+
+        :param str cluster: the cluster the items come from
+        :param str resource_type: the resource type of the items
+        :param list items: the resource items
+        """
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            obj = PolicyObject(cluster, resource_type, item)
+            if obj.namespace in self.exclude_namespaces:
+                continue
+            for policy_rule in self.rules:
+                for details in policy_rule.evaluate(obj) or []:
+                    if not isinstance(details, dict):
+                        details = {"details": details}
+                    self.findings[policy_rule.name].append(
+                        {
+                            "cluster": cluster,
+                            "resource_type": resource_type,
+                            "namespace": obj.namespace,
+                            "name": obj.name,
+                            **details,
+                        }
+                    )
+
+    def get_findings(self, severity):
+        """
+        Provide the findings of the rules of a severity.
+
+        :param str severity: ``failure`` or ``warning``
+
+        :returns: a dictionary of findings keyed by rule
+        """
+        return {
+            r: self.findings[r.name]
+            for r in self.rules
+            if r.severity == severity and self.findings[r.name]
+        }
+
+
+def _get_pod_spec(item):
+    spec = item.get("spec")
+    if not isinstance(spec, dict):
+        return None
+    if "containers" in spec:
+        return spec
+    if "jobTemplate" in spec:
+        spec = (spec["jobTemplate"] or {}).get("spec") or {}
+    template = spec.get("template") or {}
+    pod_spec = template.get("spec")
+    if isinstance(pod_spec, dict) and "containers" in pod_spec:
+        return pod_spec
+    return None
+
+
+@rule("privileged_container", "Privileged containers")
+def _privileged_container(obj):
+    for container in obj.containers:
+        if (container.get("securityContext") or {}).get("privileged"):
+            yield {"container": container.get("name")}
+
+
+@rule("host_path_volume", "Host path volumes")
+def _host_path_volume(obj):
+    for volume in (obj.pod_spec or {}).get("volumes") or []:
+        if volume.get("hostPath"):
+            yield {"volume": volume.get("name"), "path": volume["hostPath"].get("path")}
+
+
+@rule("missing_resource_limits", "Missing resource limits", WARNING)
+def _missing_resource_limits(obj):
+    for container in obj.containers:
+        limits = (container.get("resources") or {}).get("limits") or {}
+        missing = [r for r in ("cpu", "memory") if r not in limits]
+        if missing:
+            yield {"container": container.get("name"), "missing": missing}
+
+
+@rule("latest_image_tag", "Latest image tags", WARNING)
+def _latest_image_tag(obj):
+    for container in obj.containers:
+        image = container.get("image") or ""
+        if not image or "@" in image:
+            continue
+        name = image.rsplit("/", 1)[-1]
+        if ":" not in name or name.rsplit(":", 1)[1] == "latest":
+            yield {"container": container.get("name"), "image": image}
@@ -0,0 +1,197 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes RBAC effective permission index."""
+
+from arboretum.common.kube_constants import RBAC_API_VERSION
+
+# Namespace and resource name of permissions that apply to all of them
+ALL = "*"
+
+
+def build_permission_index(resources):
+    """
+    Build the effective permissions of every subject of a cluster.
+
+    The rules of aggregated ClusterRoles are resolved from the ClusterRoles
+    matching their aggregation selectors, and the roles referenced by every
+    RoleBinding and ClusterRoleBinding are expanded into permissions.
+
+    :param dict resources: the cluster resources keyed by resource type, as
+      retrieved with :data:`arboretum.common.kube_constants.RBAC_RESOURCE_TYPES`
+
+    :returns: a dictionary keyed by subject of sorted ``[verb, resource,
+      namespace, resource name]`` permissions.  Subjects are ``User:<name>``,
+      ``Group:<name>`` or ``ServiceAccount:<namespace>/<name>``.  Resources
+      are in ``resource.group`` form, such as ``secrets``, ``pods/log`` or
+      ``deployments.apps``, or are non-resource URLs such as ``/healthz``.
+      Non-resource URLs always start with ``/``, the ``*`` URL being indexed
+      as ``/*``, and are only granted by ClusterRoleBindings.  The namespace
+      and resource name are ``*`` when the permission applies to all of them.
+    """
+    cluster_roles = {
+        r["metadata"]["name"]: r
+        for r in resources.get(f"{RBAC_API_VERSION}/clusterroles") or []
+    }
+    roles = {
+        (r["metadata"].get("namespace"), r["metadata"]["name"]): r
+        for r in resources.get(f"{RBAC_API_VERSION}/roles") or []
+    }
+    cluster_rules = {}
+    for name in cluster_roles:
+        _resolve_cluster_role(name, cluster_roles, cluster_rules, set())
+    index = {}
+    bindings = [
+        (b, ALL) for b in resources.get(f"{RBAC_API_VERSION}/clusterrolebindings") or []
+    ]
+    bindings.extend(
+        (b, b["metadata"].get("namespace"))
+        for b in resources.get(f"{RBAC_API_VERSION}/rolebindings") or []
+    )
+    for binding, namespace in bindings:
+        role_ref = binding.get("roleRef") or {}
+        if role_ref.get("kind") == "ClusterRole":
+            rules = cluster_rules.get(role_ref.get("name"), [])
+        else:
+            role = roles.get((namespace, role_ref.get("name"))) or {}
+            rules = role.get("rules") or []
+        permissions = set()
+        for rule in rules:
+            permissions.update(_expand_rule(rule, namespace))
+        if not permissions:
+            continue
+        for subject in binding.get("subjects") or []:
+            index.setdefault(_subject_key(subject, namespace), set()).update(
+                permissions
+            )
+    return {s: sorted(list(p) for p in index[s]) for s in sorted(index)}
+
+
+def who_can(index, verb, resource, namespace=None, resource_name=None):
+    """
+    Find the subjects allowed to perform an action.
+
+    :param dict index: a permission index as built by
+      :func:`build_permission_index`
+    :param str verb: the verb such as ``get`` or ``list``
+    :param str resource: the resource in ``resource.group`` form or a
+      non-resource URL
+    :param str namespace: the namespace, or None for cluster scope access
+    :param str resource_name: an optional resource name
+
+    :returns: the sorted list of subjects allowed to perform the action
+    """
+    return sorted(
+        subject
+        for subject, permissions in index.items()
+        if any(allows(p, verb, resource, namespace, resource_name) for p in permissions)
+    )
+
+
+def allows(permission, verb, resource, namespace=None, resource_name=None):
+    """
+    Tell whether a permission of an index allows an action.
+
+    :param list permission: a ``[verb, resource, namespace, resource name]``
+      permission
+    :param str verb: the verb such as ``get`` or ``list``
+    :param str resource: the resource in ``resource.group`` form or a
+      non-resource URL
+    :param str namespace: the namespace, or None for cluster scope access
+    :param str resource_name: an optional resource name
+
+    :returns: True when the permission allows the action
+    """
+    p_verb, p_resource, p_namespace, p_name = permission
+    if p_verb not in (verb, ALL):
+        return False
+    if p_resource.startswith("/") or resource.startswith("/"):
+        # Non-resource URLs and resources never match each other
+        if not (p_resource.startswith("/") and resource.startswith("/")):
+            return False
+        if p_resource.endswith("*"):
+            return resource.startswith(p_resource[:-1])
+        return p_resource == resource
+    if p_namespace != ALL and p_namespace != namespace:
+        return False
+    if p_name != ALL and p_name != resource_name:
+        return False
+    p_type, _, p_group = p_resource.partition(".")
+    r_type, _, r_group = resource.partition(".")
+    return p_type in (r_type, ALL) and p_group in (r_group, ALL)
+
+
+def _resolve_cluster_role(name, cluster_roles, resolved, visiting):
+    if name in resolved:
+        return resolved[name]
+    role = cluster_roles.get(name) or {}
+    rules = list(role.get("rules") or [])
+    selectors = (role.get("aggregationRule") or {}).get("clusterRoleSelectors") or []
+    if selectors and name not in visiting:
+        visiting.add(name)
+        for other_name, other in sorted(cluster_roles.items()):
+            if other_name == name or other_name in visiting:
+                continue
+            labels = (other.get("metadata") or {}).get("labels") or {}
+            if any(_selector_matches(s, labels) for s in selectors):
+                for rule in _resolve_cluster_role(
+                    other_name, cluster_roles, resolved, visiting
+                ):
+                    if rule not in rules:
+                        rules.append(rule)
+        visiting.discard(name)
+    resolved[name] = rules
+    return rules
+
+
+def _selector_matches(selector, labels):
+    for key, value in (selector.get("matchLabels") or {}).items():
+        if labels.get(key) != value:
+            return False
+    for expression in selector.get("matchExpressions") or []:
+        key, operator = expression.get("key"), expression.get("operator")
+        values = expression.get("values") or []
+        if operator == "In" and labels.get(key) not in values:
+            return False
+        if operator == "NotIn" and key in labels and labels[key] in values:
+            return False
+        if operator == "Exists" and key not in labels:
+            return False
+        if operator == "DoesNotExist" and key in labels:
+            return False
+    return True
+
+
+def _expand_rule(rule, namespace):
+    verbs = rule.get("verbs") or []
+    names = rule.get("resourceNames") or [ALL]
+    if namespace == ALL:
+        # Non-resource URLs are only granted by ClusterRoleBindings
+        for url in rule.get("nonResourceURLs") or []:
+            url = url if url.startswith("/") else f"/{url}"
+            for verb in verbs:
+                yield (verb, url, ALL, ALL)
+    for group in rule.get("apiGroups") or []:
+        for resource_type in rule.get("resources") or []:
+            resource = f"{resource_type}.{group}" if group else resource_type
+            for verb in verbs:
+                for name in names:
+                    yield (verb, resource, namespace, name)
+
+
+def _subject_key(subject, namespace):
+    kind, name = subject.get("kind"), subject.get("name")
+    if kind == "ServiceAccount":
+        sa_namespace = subject.get("namespace") or namespace
+        return f"{kind}:{sa_namespace}/{name}"
+    return f"{kind}:{name}"
@@ -13,33 +13,769 @@
 # limitations under the License.
 """Common Kubernetes functions."""
 
+import json
+import logging
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from arboretum.common.kube_constants import (
+    DISCOVERY_TTL_DEFAULT,
+    LIST_RESTARTS_MAX,
+    NAMESPACE_WORKERS_DEFAULT,
+    PAGE_SIZE_DEFAULT,
+    PROJECTION_EXCLUDE_DEFAULT,
+    RESOURCE_FORMATS,
+    SELECTOR_PARAMS,
+    WATCH_RESOURCE_FORMATS,
+    WATCH_TIMEOUT_DEFAULT,
+)
+from arboretum.common.utils import (
+    get_user_cache_dir,
+    load_cache_file,
+    save_cache_file,
+)
 
 from requests import HTTPError
 
+logger = logging.getLogger(__name__)
+
+
+class ResourceVersionExpiredError(Exception):
+    """The API server no longer keeps the history of a resource version."""
+
 
-def get_cluster_resources(session, token, resource_types, verify=True):
+def get_cluster_resources(
+    session,
+    token,
+    resource_types,
+    verify=True,
+    page_size=PAGE_SIZE_DEFAULT,
+    max_workers=1,
+    resource_versions=None,
+    previous=None,
+    watch_timeout=WATCH_TIMEOUT_DEFAULT,
+    exclude=PROJECTION_EXCLUDE_DEFAULT,
+    discovery=None,
+    namespace_workers=NAMESPACE_WORKERS_DEFAULT,
+    fresh=(),
+    limiter=None,
+):
     """Get resource from cluster.
 
     :param requests.Session session: a requests.session object
     :param str token: Bearer token
     :param list resource_types: list of resource types. Valid values can
       be pluralized resource types like "nodes" and "pods" or custom
-      resource API names such as "apigroup.example.com/v1/mycustom".
+      resource API names such as "apigroup.example.com/v1/mycustom".  A
+      resource type can also be a dictionary with the resource type as
+      "name" and the options for that resource type: "include", a list of
+      fields to keep, "exclude", a list of fields to remove from every
+      item, "format", either "metadata" to only retrieve the object
+      metadata (``PartialObjectMetadataList``) or "table" to retrieve the
+      server-side ``Table`` representation, "namespace_sharding", set to True
+      to list a namespaced resource type one namespace at a time and in
+      parallel rather than with a single cluster-wide list, "namespaces", a
+      list of the only namespaces to list a namespaced resource type from,
+      and "label_selector" and "field_selector", Kubernetes selectors as a
+      string or a list of requirements applied by the API server.  A field is
+      a dot notation string such as "metadata.labels" or a list of keys such
+      as ["metadata", "annotations", "example.com/key"].  Items are keyed by
+      resource type name in the dictionary returned.
     :param verify: path to a CA certificate, or True/False. Set to False to
       skip TLS server certificate verification.  Defaults to True.
+    :param int page_size: maximum number of items requested per list call.
+      Set to 0 or None to disable paging.  Defaults to 500.
+    :param int max_workers: maximum number of resource types listed
+      concurrently.  Defaults to 1 (one resource type at a time).
+    :param dict resource_versions: optional dictionary of list resource
+      versions keyed by resource type.  When provided it is updated with the
+      resource version of each list retrieved.
+    :param dict previous: optional dictionary of previously retrieved items
+      keyed by resource type.  When a resource type has both previous items
+      and a resource version, the changes made since that version are
+      watched and applied to the previous items instead of listing every
+      object again.  A full list is retrieved when the version has expired.
+    :param int watch_timeout: number of seconds spent watching for changes
+      made since a previous resource version.  Defaults to 5.
+    :param list exclude: fields removed from the items of every resource type
+      that does not have its own "exclude" option.  Defaults to
+      "metadata.managedFields" and the
+      "kubectl.kubernetes.io/last-applied-configuration" annotation.
+    :param DiscoveryCache discovery: optional API discovery cache used to
+      resolve resource type names such as "deployments", "deploy" or
+      "cronjobs.batch" to their preferred API group and version.  Without
+      it, names in "APIGROUP/VERSION/NAME" format are listed from the named
+      group and all other names from the core group.
+    :param int namespace_workers: maximum number of namespaces listed
+      concurrently for a resource type using namespace sharding.
+      Defaults to 4.
+    :param fresh: optional collection of resource type names whose
+      ``previous`` items are still fresh.  These items are returned as is
+      without contacting the cluster and their resource version is kept.
+    :param limiter: optional semaphore acquired for every list and watch
+      request, e.g. a ``threading.BoundedSemaphore`` shared by the sessions of
+      several clusters to bound the number of requests in flight across them.
+    """
+    return dict(
+        iter_cluster_resources(
+            session,
+            token,
+            resource_types,
+            verify=verify,
+            page_size=page_size,
+            max_workers=max_workers,
+            resource_versions=resource_versions,
+            previous=previous,
+            watch_timeout=watch_timeout,
+            exclude=exclude,
+            discovery=discovery,
+            namespace_workers=namespace_workers,
+            fresh=fresh,
+            limiter=limiter,
+        )
+    )
+
+
+def iter_cluster_resources(
+    session,
+    token,
+    resource_types,
+    verify=True,
+    page_size=PAGE_SIZE_DEFAULT,
+    max_workers=1,
+    resource_versions=None,
+    previous=None,
+    watch_timeout=WATCH_TIMEOUT_DEFAULT,
+    exclude=PROJECTION_EXCLUDE_DEFAULT,
+    discovery=None,
+    namespace_workers=NAMESPACE_WORKERS_DEFAULT,
+    fresh=(),
+    limiter=None,
+):
+    """Get resource from cluster, one resource type at a time.
+
+    Same as :func:`get_cluster_resources` except that ``(resource_type,
+    items)`` pairs are yielded in ``resource_types`` order as they are
+    retrieved, so that a caller can process and release each list before the
+    next one is held in memory.  Resource types that are not found are
+    skipped.
     """
     session.headers.update({"Authorization": f"Bearer {token}"})
-    resources = {}
+    previous = previous or {}
+    namespaces = []
+    namespaces_lock = threading.Lock()
+
+    def _get_namespaces():
+        with namespaces_lock:
+            if not namespaces:
+                namespaces.extend(
+                    _list_resources(
+                        session,
+                        "api/v1/namespaces",
+                        verify,
+                        page_size,
+                        lambda item: item["metadata"]["name"],
+                        _format_headers("metadata"),
+                        limiter=limiter,
+                    )[0]
+                )
+            return namespaces
+
+    def _get_resource(resource_type):
+        resource_type, options = _resource_type_options(resource_type)
+        if resource_type in fresh and previous.get(resource_type) is not None:
+            return previous[resource_type]
+        project = _projection(options.get("include"), options.get("exclude", exclude))
+        headers = _format_headers(options.get("format"))
+        params = _selector_params(options)
+        namespaced = True
+        if discovery is not None:
+            resource = discovery.resolve(session, resource_type, verify)
+            if resource is None:
+                return None
+            url = resource["path"]
+            namespaced = resource["namespaced"] is not False
+        else:
+            resource_is_named_group = re.match(r"[^/]+/[^/]+/[^/]+", resource_type)
+            base_url = "apis" if resource_is_named_group else "api/v1"
+            url = f"{base_url}/{resource_type}"
+        sharded = namespaced and options.get("namespace_sharding", False)
+        scoped = namespaced and bool(options.get("namespaces"))
+        version = (resource_versions or {}).get(resource_type)
+        try:
+            items = None
+            watchable = options.get("format") != "table"
+            watchable = watchable and not sharded and not scoped
+            if watchable and version and previous.get(resource_type) is not None:
+                try:
+                    items, version = watch_resources(
+                        session,
+                        url,
+                        previous[resource_type],
+                        version,
+                        verify,
+                        watch_timeout,
+                        project,
+                        _format_headers(options.get("format"), watch=True),
+                        params,
+                        limiter,
+                    )
+                except ResourceVersionExpiredError:
+                    items = None
+            if items is None and (sharded or scoped):
+                # Per namespace lists do not share a single resource version
+                items, version = [], None
+                if scoped:
+                    # Sorted to merge items in the order of a cluster-wide list
+                    listed = sorted(set(options["namespaces"]))
+                else:
+                    listed = _get_namespaces()
+                namespaced_lists = _list_namespaced_resources(
+                    session,
+                    url,
+                    listed,
+                    verify,
+                    page_size,
+                    project,
+                    headers,
+                    namespace_workers,
+                    params,
+                    limiter,
+                )
+                for namespaced_items in namespaced_lists:
+                    items.extend(namespaced_items)
+            elif items is None:
+                items, version = _list_resources(
+                    session, url, verify, page_size, project, headers, params, limiter
+                )
+        except HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            return None
+        if resource_versions is not None:
+            resource_versions[resource_type] = version
+        return items
+
+    if max_workers > 1 and len(resource_types) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_get_resource, resource_types)
+            for resource_type, items in zip(resource_types, results):
+                if items is not None:
+                    yield _resource_type_options(resource_type)[0], items
+    else:
+        for resource_type in resource_types:
+            items = _get_resource(resource_type)
+            if items is not None:
+                yield _resource_type_options(resource_type)[0], items
+
+
+class DiscoveryCache(object):
+    """
+    Kubernetes API discovery cache.
+
+    Resolve resource type names to the API path of their preferred group
+    version.  The core group (``/api``) and every named group (``/apis``) of a
+    cluster are discovered once and the result is kept in memory and
+    persisted to a JSON file private to the current user, keyed by cluster
+    base URL, until it is older than the cache TTL.  The cache can be shared
+    by threads and fetchers.  When the file cannot be read or written, such as
+    when the home directory is read-only, the cache is kept in memory only.
+    """
+
+    def __init__(self, path=None, ttl=DISCOVERY_TTL_DEFAULT):
+        """
+        Construct and initialize the discovery cache.
+
+        :param str path: path to the cache file.  Defaults to
+          ``kube_discovery.json`` in the user cache directory, see
+          :func:`arboretum.common.utils.get_user_cache_dir`.  Set to an empty
+          string to keep the cache in memory only.
+        :param int ttl: the number of seconds discovery results are valid.
+
+        :raises ValueError: if the cache file or its directory can be written
+          by another user
+        """
+        if path is None:
+            path = Path(get_user_cache_dir(), "kube_discovery.json")
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cluster_locks = {}
+        self._clusters = {}
+        if self.path:
+            try:
+                self._clusters = load_cache_file(self.path)
+            except OSError as e:
+                self._disable_persistence(e)
+
+    def resolve(self, session, resource_type, verify=True):
+        """
+        Resolve a resource type name.
+
+        :param requests.Session session: a session to the cluster, the
+          session base URL identifies the cluster in the cache.
+        :param str resource_type: a resource name in plural, singular or short
+          form, optionally qualified by its group as in "cronjobs.batch", or
+          an "APIGROUP/VERSION/NAME" resource name.
+        :param verify: path to a CA certificate, or True/False.
+
+        :returns: a dictionary with the resource list "path" and whether the
+          resource is "namespaced", or None if the cluster does not serve the
+          resource
+        """
+        if re.match(r"[^/]+/[^/]+/[^/]+", resource_type):
+            group_version, name = resource_type.rsplit("/", 1)
+            resource = self._resources(session, verify).get(
+                f'{name}.{group_version.split("/")[0]}', {}
+            )
+            return {
+                "path": f"apis/{resource_type}",
+                "namespaced": resource.get("namespaced"),
+            }
+        return self._resources(session, verify).get(resource_type.lower())
+
+    def _resources(self, session, verify):
+        cluster = getattr(session, "baseurl", "")
+        with self._lock:
+            cluster_lock = self._cluster_locks.setdefault(cluster, threading.Lock())
+        with cluster_lock:
+            cached = self._clusters.get(cluster)
+            if cached and time.time() - cached["timestamp"] < self.ttl:
+                return cached["resources"]
+            resources = _discover_resources(session, verify)
+            with self._lock:
+                self._clusters[cluster] = {
+                    "timestamp": time.time(),
+                    "resources": resources,
+                }
+                self._save()
+            return resources
+
+    def _save(self):
+        if self.path:
+            try:
+                save_cache_file(self.path, self._clusters)
+            except OSError as e:
+                self._disable_persistence(e)
+
+    def _disable_persistence(self, error):
+        logger.warning(
+            f"Discovery cache {self.path} unavailable, kept in memory only: {error}"
+        )
+        self.path = None
+
+
+_discovery_caches = {}
+_discovery_caches_lock = threading.Lock()
+
+
+def get_discovery_cache(path=None, ttl=DISCOVERY_TTL_DEFAULT):
+    """
+    Provide the discovery cache shared by every caller using the same file.
+
+    :param str path: path to the cache file.  See :class:`DiscoveryCache`.
+    :param int ttl: the number of seconds discovery results are valid.
+
+    :returns: a DiscoveryCache object
+    """
+    with _discovery_caches_lock:
+        key = str(path)
+        if key not in _discovery_caches:
+            _discovery_caches[key] = DiscoveryCache(path, ttl)
+        _discovery_caches[key].ttl = ttl
+        return _discovery_caches[key]
+
+
+def list_resources(
+    session,
+    url,
+    verify=True,
+    page_size=PAGE_SIZE_DEFAULT,
+    project=None,
+    headers=None,
+    params=None,
+    limiter=None,
+):
+    """Get all items of a resource list, one page at a time.
+
+    The Kubernetes ``limit``/``continue`` protocol is used so that neither
+    the API server nor the client ever handles the complete list in a single
+    response.  When a continue token expires before the list is complete the
+    API server responds with ``410 Gone`` and the list is restarted from the
+    beginning.
+
+    :param requests.Session session: a requests.session object
+    :param str url: the path to the resource list, e.g. "api/v1/pods"
+    :param verify: path to a CA certificate, or True/False.
+    :param int page_size: maximum number of items requested per list call.
+      Set to 0 or None to disable paging.
+    :param project: optional function applied to every item as it is decoded
+    :param dict headers: optional request headers, e.g. an ``Accept`` header
+      requesting ``PartialObjectMetadataList`` or ``Table`` responses.  The
+      rows of a ``Table`` response are returned as items holding the object
+      metadata and the row cells keyed by column name.
+    :param dict params: optional query parameters, e.g. ``labelSelector`` and
+      ``fieldSelector``, sent with every list call
+    :param limiter: optional semaphore acquired while each page is retrieved
+
+    :returns: the list of resource items
+    """
+    return _list_resources(
+        session, url, verify, page_size, project, headers, params, limiter
+    )[0]
+
+
+def watch_resources(
+    session,
+    url,
+    items,
+    resource_version,
+    verify=True,
+    timeout=WATCH_TIMEOUT_DEFAULT,
+    project=None,
+    headers=None,
+    params=None,
+    limiter=None,
+):
+    """Apply the changes made since a resource version to a list of items.
+
+    A watch is started from ``resource_version`` and runs for ``timeout``
+    seconds.  Every added, modified and deleted object reported is applied to
+    ``items``, which is expected to be the content of the resource list at
+    ``resource_version``.
+
+    :param requests.Session session: a requests.session object
+    :param str url: the path to the resource list, e.g. "api/v1/pods"
+    :param list items: the resource items at ``resource_version``
+    :param str resource_version: the resource version to watch from
+    :param verify: path to a CA certificate, or True/False.
+    :param int timeout: number of seconds to watch for.
+    :param project: optional function applied to every object reported
+    :param dict headers: optional request headers
+    :param dict params: optional query parameters, e.g. ``labelSelector`` and
+      ``fieldSelector``.  Objects that stop matching a selector are reported
+      as deleted by the API server.
+    :param limiter: optional semaphore acquired for the duration of the watch
+
+    :returns: a tuple containing the updated list of items, sorted the same
+      way the API server sorts lists, and the latest resource version seen
+    :raises ResourceVersionExpiredError: if the API server no longer has the
+      history needed to watch from ``resource_version``
+    """
+    params = {
+        **(params or {}),
+        "watch": 1,
+        "resourceVersion": resource_version,
+        "timeoutSeconds": timeout,
+        "allowWatchBookmarks": "true",
+    }
+    kwargs = {"headers": headers} if headers else {}
+    with limiter or nullcontext():
+        return _watch_resources(
+            session, url, items, resource_version, verify, params, project, kwargs
+        )
+
+
+def _watch_resources(
+    session, url, items, resource_version, verify, params, project, kwargs
+):
+    resp = session.get(url, params=params, verify=verify, stream=True, **kwargs)
+    try:
+        try:
+            resp.raise_for_status()
+        except HTTPError as e:
+            if e.response is None:
+                e.response = resp
+            if resp.status_code == 410:
+                raise ResourceVersionExpiredError(resource_version)
+            raise
+        current = {_item_key(item): item for item in items}
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            obj = event["object"]
+            if event["type"] == "ERROR":
+                if obj.get("code") == 410:
+                    raise ResourceVersionExpiredError(resource_version)
+                raise HTTPError(obj.get("message"), response=resp)
+            if event["type"] in ("ADDED", "MODIFIED"):
+                current[_item_key(obj)] = project(obj) if project else obj
+            elif event["type"] == "DELETED":
+                current.pop(_item_key(obj), None)
+            resource_version = obj["metadata"]["resourceVersion"]
+    finally:
+        resp.close()
+    return [current[k] for k in sorted(current)], resource_version
+
+
+def _item_key(item):
+    # Same "namespace/name" ordering as the API server storage keys
+    metadata = item["metadata"]
+    if metadata.get("namespace"):
+        return f'{metadata["namespace"]}/{metadata["name"]}'
+    return metadata["name"]
+
+
+def _list_namespaced_resources(
+    session,
+    url,
+    namespaces,
+    verify,
+    page_size,
+    project,
+    headers,
+    max_workers,
+    params,
+    limiter=None,
+):
+    prefix, name = url.rsplit("/", 1)
+
+    def _list_namespace(namespace):
+        try:
+            return _list_resources(
+                session,
+                f"{prefix}/namespaces/{namespace}/{name}",
+                verify,
+                page_size,
+                project,
+                headers,
+                params,
+                limiter,
+            )[0]
+        except HTTPError as e:
+            # The namespace may have been deleted since it was listed
+            if e.response is None or e.response.status_code != 404:
+                raise
+            return []
+
+    if max_workers > 1 and len(namespaces) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(_list_namespace, namespaces)
+    else:
+        yield from map(_list_namespace, namespaces)
+
+
+def _list_resources(
+    session,
+    url,
+    verify,
+    page_size,
+    project=None,
+    headers=None,
+    params=None,
+    limiter=None,
+):
+    restarts = 0
+    items = []
+    params = dict(params or {})
+    if page_size:
+        params["limit"] = page_size
+    kwargs = {"headers": headers} if headers else {}
+    while True:
+        with limiter or nullcontext():
+            resp = session.get(url, params=params, verify=verify, **kwargs)
+        try:
+            resp.raise_for_status()
+        except HTTPError as e:
+            if e.response is None:
+                e.response = resp
+            expired = resp.status_code == 410 and "continue" in params
+            if not expired or restarts >= LIST_RESTARTS_MAX:
+                raise
+            restarts += 1
+            items = []
+            params.pop("continue")
+            continue
+        body = resp.json()
+        page = _table_items(body) if "rows" in body else body["items"]
+        if project:
+            items.extend(project(item) for item in page)
+        else:
+            items.extend(page)
+        metadata = body.get("metadata") or {}
+        if not page_size or not metadata.get("continue"):
+            return items, metadata.get("resourceVersion")
+        params["continue"] = metadata["continue"]
+
+
+def project_item(item, include=None, exclude=None):
+    """Keep or remove fields of a resource item.
+
+    :param dict item: the resource item
+    :param list include: optional list of fields to keep.  The item name and
+      namespace are always kept.
+    :param list exclude: optional list of fields to remove.  Fields are
+      removed after ``include`` has been applied.
+
+    A field is a dot notation string such as "metadata.labels" or a list of
+    keys such as ["metadata", "annotations", "example.com/key"].  Fields
+    inside lists, for example "spec.containers.image", are applied to every
+    element of the list.
+
+    :returns: the projected item
+    """
+    if not isinstance(item, dict):
+        return item
+    if include:
+        paths = [_field_path(f) for f in include]
+        paths += [["metadata", "name"], ["metadata", "namespace"]]
+        item = _include_paths(item, paths)
+    for field in exclude or []:
+        _exclude_path(item, _field_path(field))
+    return item
+
+
+def get_resource_type_ttls(resource_types, default):
+    """Provide the time to live of each resource type.
+
+    :param list resource_types: list of resource types as accepted by
+      :func:`get_cluster_resources`.  A resource type dictionary can have a
+      "ttl" option with the number of seconds its items are valid.
+    :param int default: the time to live of resource types without a "ttl"
+      option.
+
+    :returns: dictionary of time to live in seconds keyed by resource type
+    """
+    ttls = {}
     for resource_type in resource_types:
-        resource_is_named_group = re.match(r"[^/]+/[^/]+/[^/]+", resource_type)
-        base_url = "apis" if resource_is_named_group else "api/v1"
+        name, options = _resource_type_options(resource_type)
+        ttls[name] = options.get("ttl", default)
+    return ttls
+
+
+def get_fresh_resource_types(ttls, fetched, tolerance=0, now=None):
+    """Provide the resource types that do not need to be retrieved again.
+
+    :param dict ttls: time to live in seconds keyed by resource type, as
+      provided by :func:`get_resource_type_ttls`.
+    :param dict fetched: the time, in seconds since the epoch, each resource
+      type was last retrieved keyed by resource type.
+    :param int tolerance: number of seconds before the time to live expires
+      that a resource type is considered stale, in line with the evidence
+      locker time to live tolerance.
+    :param float now: the current time in seconds since the epoch.  Defaults
+      to the current time.
+
+    :returns: set of resource types retrieved less than their time to live ago
+    """
+    now = time.time() if now is None else now
+    return {
+        name
+        for name, ttl in ttls.items()
+        if name in fetched and now - fetched[name] < ttl - tolerance
+    }
+
+
+def _resource_type_options(resource_type):
+    if isinstance(resource_type, dict):
+        return resource_type["name"], resource_type
+    return resource_type, {}
+
+
+def _selector_params(options):
+    params = {}
+    for option, param in SELECTOR_PARAMS.items():
+        selector = options.get(option)
+        if selector:
+            if not isinstance(selector, str):
+                selector = ",".join(selector)
+            params[param] = selector
+    return params
+
+
+def _discover_resources(session, verify):
+    resources = {}
+    group_versions = []
+    resp = session.get("api", verify=verify)
+    resp.raise_for_status()
+    group_versions += [("", f"api/{v}") for v in resp.json()["versions"][:1]]
+    resp = session.get("apis", verify=verify)
+    resp.raise_for_status()
+    for group in resp.json().get("groups", []):
+        preferred = group["preferredVersion"]["groupVersion"]
+        group_versions.append((group["name"], f"apis/{preferred}"))
+    for group, path in group_versions:
+        resp = session.get(path, verify=verify)
         try:
-            resp = session.get(f"{base_url}/{resource_type}", verify=verify)
             resp.raise_for_status()
-            resources[resource_type] = resp.json()["items"]
         except HTTPError:
-            if resp.status_code != 404:
+            if not group:
                 raise
+            # An unavailable aggregated API must not prevent other lookups
             continue
+        for resource in resp.json().get("resources", []):
+            if "/" in resource["name"]:
+                continue  # subresource
+            entry = {
+                "path": f'{path}/{resource["name"]}',
+                "namespaced": resource.get("namespaced", False),
+            }
+            names = [resource["name"], resource.get("singularName")]
+            names += resource.get("shortNames") or []
+            if group:
+                names += [f"{n}.{group}" for n in names if n]
+            for name in names:
+                if name:
+                    resources.setdefault(name.lower(), entry)
     return resources
+
+
+def _format_headers(resource_format, watch=False):
+    if not resource_format:
+        return None
+    if resource_format not in RESOURCE_FORMATS:
+        raise ValueError(f"Unsupported resource format {resource_format}")
+    if watch:
+        # Each watch event object is converted on its own, not as a list
+        return {"Accept": WATCH_RESOURCE_FORMATS[resource_format]}
+    return {"Accept": RESOURCE_FORMATS[resource_format]}
+
+
+def _table_items(table):
+    columns = [column["name"] for column in table["columnDefinitions"]]
+    items = []
+    for row in table["rows"]:
+        item = {"cells": dict(zip(columns, row["cells"]))}
+        if row.get("object"):
+            item["metadata"] = row["object"]["metadata"]
+        items.append(item)
+    return items
+
+
+def _projection(include, exclude):
+    if not include and not exclude:
+        return None
+    return lambda item: project_item(item, include, exclude)
+
+
+def _field_path(field):
+    return list(field) if isinstance(field, (list, tuple)) else field.split(".")
+
+
+def _include_paths(data, paths):
+    if any(not path for path in paths):
+        return data
+    if isinstance(data, list):
+        return [_include_paths(element, paths) for element in data]
+    if not isinstance(data, dict):
+        return data
+    subpaths = {}
+    for path in paths:
+        subpaths.setdefault(path[0], []).append(path[1:])
+    return {k: _include_paths(data[k], v) for k, v in subpaths.items() if k in data}
+
+
+def _exclude_path(data, path):
+    if isinstance(data, list):
+        for element in data:
+            _exclude_path(element, path)
+    elif isinstance(data, dict):
+        if len(path) == 1:
+            data.pop(path[0], None)
+        elif path[0] in data:
+            _exclude_path(data[path[0]], path[1:])
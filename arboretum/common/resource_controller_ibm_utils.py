@@ -0,0 +1,122 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Utility module for the IBM Cloud resource controller."""
+
+import itertools
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from arboretum.common.ibm_constants import RESOURCE_INSTANCES_PAGE_SIZE_DEFAULT
+
+logger = logging.getLogger(__name__)
+
+
+def iter_resource_instances(
+    session, page_size=RESOURCE_INSTANCES_PAGE_SIZE_DEFAULT, project=None, **params
+):
+    """
+    Yield the resource instances of an account as each page is retrieved.
+
+    Pages are requested one at a time by following the ``next_url`` of each
+    page so that only the current page is held in memory.
+
+    See: https://cloud.ibm.com/apidocs/resource-controller/resource-controller
+
+    :param session: a session for the resource controller API, authorized
+      for the account
+    :param int page_size: the number of instances requested per page, up to
+      100
+    :param project: an optional callable applied to each instance
+    :param params: optional list filters such as ``resource_group_id``
+
+    :returns: a generator of resource instances
+    """
+    url = "/v2/resource_instances"
+    params = {"limit": page_size, **params}
+    while url:
+        resp = session.get(url, params=params)
+        resp.raise_for_status()
+        page = resp.json()
+        for instance in page.get("resources") or []:
+            yield project(instance) if project else instance
+        # The next URL carries the list parameters and the page token
+        url, params = page.get("next_url"), None
+
+
+def iter_sharded_resource_instances(
+    session,
+    page_size=RESOURCE_INSTANCES_PAGE_SIZE_DEFAULT,
+    project=None,
+    max_workers=1,
+):
+    """
+    Yield the resource instances of an account one resource group at a time.
+
+    Resource groups are paged concurrently, each following its own
+    ``next_url`` chain, and their instances are yielded in resource group id
+    order.  Only the instances of up to ``max_workers`` resource groups are
+    held in memory ahead of the resource group being yielded.  Instances that
+    do not belong to a resource group cannot be filtered on and are not
+    listed, which is logged as a warning.
+
+    See: https://cloud.ibm.com/apidocs/resource-controller/resource-manager
+
+    :param session: a session for the resource controller API, authorized
+      for the account
+    :param int page_size: the number of instances requested per page, up to
+      100
+    :param project: an optional callable applied to each instance
+    :param int max_workers: the number of resource groups paged concurrently
+
+    :returns: a generator of resource instances
+    """
+    resp = session.get("/v2/resource_groups")
+    resp.raise_for_status()
+    groups = sorted(g["id"] for g in resp.json().get("resources") or [])
+    logger.warning(
+        "Resource instances listed by resource group, "
+        "instances without a resource group are not listed"
+    )
+
+    def _list_group(group):
+        return list(
+            iter_resource_instances(
+                session, page_size, project, resource_group_id=group
+            )
+        )
+
+    if max_workers > 1 and len(groups) > 1:
+        groups = iter(groups)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # A resource group is submitted as each one is yielded, instead of
+            # all at once, so that completed groups are not all held in memory
+            pending = deque(
+                executor.submit(_list_group, group)
+                for group in itertools.islice(groups, max_workers)
+            )
+            try:
+                while pending:
+                    instances = pending.popleft().result()
+                    for group in itertools.islice(groups, 1):
+                        pending.append(executor.submit(_list_group, group))
+                    yield from instances
+            finally:
+                for future in pending:
+                    future.cancel()
+    else:
+        for group in groups:
+            yield from iter_resource_instances(
+                session, page_size, project, resource_group_id=group
+            )
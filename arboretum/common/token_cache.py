@@ -0,0 +1,219 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Expiring token cache."""
+
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+from arboretum.common.utils import load_cache_file, save_cache_file
+
+logger = logging.getLogger(__name__)
+
+# Default number of seconds before expiry that a token is refreshed
+EXPIRY_MARGIN_DEFAULT = 300
+
+
+class TokenCache(object):
+    """
+    Thread-safe in-memory cache of expiring tokens.
+
+    Tokens are produced by callables returning the token and the time it
+    expires at, in seconds since the epoch.  A cached token is returned until
+    it is due for refresh, ``margin`` seconds before it expires.  It is then
+    refreshed, when a refresh callable is provided, or fetched again.  When
+    several threads request the same key only one of them fetches the token
+    while the others wait for it.
+
+    The cache can be persisted to a JSON file private to the current user so
+    that tokens are reused by later runs.  Keys must then be tuples of strings
+    and tokens strings or tuples of strings.  When the file cannot be read or
+    written the cache is kept in memory only.
+    """
+
+    def __init__(self, margin=EXPIRY_MARGIN_DEFAULT, path=None):
+        """
+        Construct a token cache.
+
+        :param int margin: number of seconds before expiry that a token is
+          refreshed.  Defaults to 300.
+        :param str path: optional path to the file the cache is persisted to,
+          see :func:`arboretum.common.utils.save_cache_file`.  The tokens of
+          the file that have not expired are loaded.  Defaults to a cache kept
+          in memory only.
+        """
+        self.margin = margin
+        self.path = Path(path) if path else None
+        self._tokens = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        if self.path:
+            now = time.time()
+            try:
+                cached = load_cache_file(self.path)
+            except OSError as e:
+                self._disable_persistence(e)
+                cached = {}
+            for key, (token, expires_at) in cached.items():
+                if expires_at > now:
+                    self._tokens[tuple(json.loads(key))] = (
+                        tuple(token) if isinstance(token, list) else token,
+                        expires_at,
+                    )
+
+    def get(self, key, fetch, refresh=None):
+        """
+        Provide the token of a key, fetching it when needed.
+
+        :param key: a hashable key identifying the token
+        :param fetch: a callable without arguments returning a
+          ``(token, expires_at)`` tuple.  ``expires_at`` can be None when the
+          token must not be cached.
+        :param refresh: an optional callable taking the cached token and
+          returning a ``(token, expires_at)`` tuple, called instead of
+          ``fetch`` when the cached token is due for refresh but has not
+          expired yet.  ``fetch`` is called if it raises an exception.
+
+        :returns: the token
+        """
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            now = time.time()
+            cached = self._tokens.get(key)
+            if cached is not None and now < cached[1] - self.margin:
+                return cached[0]
+            result = None
+            if cached is not None and refresh is not None and now < cached[1]:
+                try:
+                    result = refresh(cached[0])
+                except Exception:
+                    result = None
+            if result is None:
+                result = fetch()
+            token, expires_at = result
+            with self._lock:
+                if expires_at is None:
+                    self._tokens.pop(key, None)
+                else:
+                    self._tokens[key] = (token, expires_at)
+                self._save()
+            return token
+
+    def set(self, key, token, expires_at):
+        """
+        Cache a token.
+
+        :param key: a hashable key identifying the token
+        :param token: the token
+        :param float expires_at: the time the token expires at, in seconds
+          since the epoch
+        """
+        with self._lock:
+            self._tokens[key] = (token, expires_at)
+            self._save()
+
+    def invalidate(self, key):
+        """
+        Remove the token of a key from the cache.
+
+        :param key: a hashable key identifying the token
+        """
+        with self._lock:
+            self._tokens.pop(key, None)
+            self._save()
+
+    def clear(self):
+        """Remove all tokens from the cache."""
+        with self._lock:
+            self._tokens.clear()
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        now = time.time()
+        try:
+            save_cache_file(
+                self.path,
+                {
+                    json.dumps(list(key)): cached
+                    for key, cached in self._tokens.items()
+                    if cached[1] > now
+                },
+            )
+        except OSError as e:
+            self._disable_persistence(e)
+
+    def _disable_persistence(self, error):
+        logger.warning(
+            f"Token cache {self.path} unavailable, kept in memory only: {error}"
+        )
+        self.path = None
+
+
+_token_caches = {}
+_token_caches_lock = threading.Lock()
+
+
+def get_token_cache(path=None):
+    """
+    Provide the token cache shared by every caller using the same file.
+
+    :param str path: optional path to the file the cache is persisted to, see
+      :class:`TokenCache`.  Callers without a path share a cache kept in
+      memory only.
+
+    :returns: a TokenCache object
+    """
+    with _token_caches_lock:
+        key = str(path or "")
+        if key not in _token_caches:
+            _token_caches[key] = TokenCache(path=path)
+        return _token_caches[key]
+
+
+def hash_secret(secret):
+    """
+    Provide a cache key for a secret so that the secret is not used as a key.
+
+    :param str secret: a secret such as an API key
+
+    :returns: the SHA256 hex digest of the secret
+    """
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def get_jwt_expiry(token):
+    """
+    Provide the expiry time of a JSON Web Token.
+
+    The token signature is not verified, the expiry is only used to know how
+    long the token can be cached for.
+
+    :param str token: the encoded token
+
+    :returns: the ``exp`` claim in seconds since the epoch, or None when the
+      token is not a JWT or has no expiry
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
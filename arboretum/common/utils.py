@@ -13,7 +13,18 @@
 # limitations under the License.
 """Common utility functions."""
 
-from compliance.evidence import DAY, HOUR
+import hashlib
+import json
+import os
+import re
+import ssl
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+from compliance.evidence import DAY, HOUR, RawEvidence
+from compliance.utils.http import BaseSession
+
+from requests.adapters import HTTPAdapter
 
 
 def parse_seconds(seconds):
@@ -31,3 +42,270 @@ def parse_seconds(seconds):
             formatted.append(f"{q} {unit}")
         seconds = r
     return ", ".join(formatted)
+
+
+def new_session(config, url, timeout=None, **headers):
+    """
+    Provide a new requests session object with User-Agent header.
+
+    Unlike ``ComplianceFetcher.session`` the session returned is not shared
+    by the fetcher class, so that one session can be used per thread or per
+    remote host.  The caller is responsible for closing the session.
+
+    :param config: the compliance configuration object
+    :param str url: base URL for the session requests to use
+    :param timeout: optional default timeout of the session requests, in
+      seconds or as a ``(connect, read)`` tuple
+    :param headers: optional kwargs to add to session headers
+
+    :returns: a BaseSession object
+    """
+    session = BaseSession(url)
+    session.headers.update(headers)
+    org = config.raw_config.get("org", {}).get("name", "")
+    ua = f'{org.lower().replace(" ", "-")}-compliance-checks'
+    session.headers.update({"User-Agent": ua})
+    if timeout is not None:
+        session.mount("https://", TimeoutAdapter(timeout=timeout))
+        session.mount("http://", TimeoutAdapter(timeout=timeout))
+    return session
+
+
+class TimeoutAdapter(HTTPAdapter):
+    """
+    A transport adapter applying a default timeout to requests.
+
+    Requests sent without a timeout otherwise wait on the default socket
+    timeouts, possibly forever, when a server is unreachable or stops
+    responding.
+    """
+
+    def __init__(self, timeout=None, **kwargs):
+        """
+        Construct the adapter.
+
+        :param timeout: the default timeout of requests, in seconds or as a
+          ``(connect, read)`` tuple
+        :param kwargs: optional ``HTTPAdapter`` arguments
+        """
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        """Send a request with the default timeout unless one is provided."""
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class CADataAdapter(TimeoutAdapter):
+    """
+    A transport adapter verifying servers with in-memory CA certificates.
+
+    Mount it on a session for the URL prefix of the servers to verify, such
+    as ``session.mount("https://", CADataAdapter(pem))``, and send requests
+    with ``verify=True``.  No certificate file needs to be written.
+    """
+
+    def __init__(self, cadata, **kwargs):
+        """
+        Construct the adapter.
+
+        :param str cadata: PEM encoded CA certificates
+        :param kwargs: optional ``TimeoutAdapter`` arguments
+        """
+        self.ssl_context = ssl.create_default_context(cadata=cadata)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Initialize the pool manager with the CA certificates SSL context."""
+        kwargs["ssl_context"] = self.ssl_context
+        return super().init_poolmanager(*args, **kwargs)
+
+
+class StreamedObject(object):
+    """
+    A JSON object whose members are produced lazily.
+
+    Wrap an iterable of ``(key, value)`` pairs, typically a generator, so that
+    :func:`write_json` writes each member as soon as it is produced instead of
+    requiring the whole object to be built in memory first.
+    """
+
+    def __init__(self, pairs):
+        """Construct the streamed object from an iterable of key/value pairs."""
+        self.pairs = pairs
+
+
+def write_json(fp, data):
+    """
+    Write data as JSON to a file-like object, one element at a time.
+
+    Dictionaries, lists and tuples are encoded as usual.  Iterators, including
+    generators, are encoded as JSON arrays and :class:`StreamedObject` objects
+    as JSON objects.  Iterators are consumed as they are written so that only
+    the element currently being written needs to be held in memory.
+
+    Note that ``set_content`` of JSON evidence decodes the written content
+    again to format it, so the whole content is held in memory decoded when
+    an evidence is stored.  Only the building of the content is streamed.
+
+    :param fp: a file-like object with a ``write`` method accepting strings
+    :param data: the data to write
+    """
+    if isinstance(data, StreamedObject):
+        _write_members(fp, data.pairs)
+    elif isinstance(data, Mapping):
+        _write_members(fp, data.items())
+    elif isinstance(data, (list, tuple, Iterator)):
+        fp.write("[")
+        for idx, element in enumerate(data):
+            if idx:
+                fp.write(", ")
+            write_json(fp, element)
+        fp.write("]")
+    else:
+        fp.write(json.dumps(data))
+
+
+def _write_members(fp, pairs):
+    fp.write("{")
+    for idx, (key, value) in enumerate(pairs):
+        if idx:
+            fp.write(", ")
+        fp.write(f"{json.dumps(str(key))}: ")
+        write_json(fp, value)
+    fp.write("}")
+
+
+def store_raw_evidence_content(
+    locker, config, evidence_path, content, ttl=DAY, description=""
+):
+    """
+    Store raw evidence content whose evidence name is only known at run time.
+
+    The evidence is added to the evidence cache if it is not already there.
+    The caller is responsible for deciding whether the evidence is due.
+
+    :param locker: the evidence locker object
+    :param config: the compliance configuration object
+    :param str evidence_path: the path to the raw evidence, for example
+      ``raw/category/evidence.json``
+    :param str content: the evidence content
+    :param int ttl: the evidence time to live in seconds.  Defaults to a day.
+    :param str description: the evidence description
+
+    :returns: the SHA256 hash of the evidence content as stored
+    """
+    evidence = config.get_evidence(evidence_path)
+    if evidence is None:
+        _, category, name = evidence_path.split("/")
+        evidence = RawEvidence(name, category, ttl, description)
+        config.add_evidences([evidence])
+    evidence.set_content(content)
+    locker.add_evidence(evidence)
+    return hashlib.sha256(evidence.content.encode()).hexdigest()
+
+
+def to_evidence_name_part(value):
+    """
+    Convert a string to a form that is safe to use in an evidence file name.
+
+    :param str value: the string to convert, such as a cluster name
+
+    :returns: the string with each run of characters other than letters,
+      digits, hyphens and underscores replaced by an underscore
+    """
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", str(value)).strip("_")
+
+
+def to_unique_evidence_name_part(*values):
+    """
+    Convert strings to a form that is safe and unique in an evidence file name.
+
+    The strings are converted with :func:`to_evidence_name_part` and joined
+    with underscores.  When that loses information, because a string is
+    changed by the conversion or because one of several strings holds an
+    underscore, the first characters of a hash of the strings are appended so
+    that different strings, such as ``prod.east`` and ``prod_east``, do not
+    provide the same name part.
+
+    :param values: the strings to convert, such as an account and a cluster name
+
+    :returns: the converted strings
+    """
+    values = [str(v) for v in values]
+    parts = [to_evidence_name_part(v) for v in values]
+    name = "_".join(parts)
+    if (
+        parts != values
+        or not all(parts)
+        or (len(values) > 1 and any("_" in v for v in values))
+    ):
+        digest = hashlib.sha256(json.dumps(values).encode()).hexdigest()
+        name = f"{name}_{digest[:8]}"
+    return name
+
+
+def get_user_cache_dir():
+    """
+    Provide the arboretum cache directory of the current user.
+
+    The directory is ``arboretum`` in ``$XDG_CACHE_HOME``, or in ``~/.cache``
+    when that variable is not set.  It is not created.
+
+    :returns: the path of the cache directory
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache", "arboretum")
+
+
+def load_cache_file(path):
+    """
+    Load a JSON cache file private to the current user.
+
+    :param path: the path to the cache file
+
+    :returns: the cached data, or an empty dictionary when the file does not
+      exist or is not valid JSON
+    :raises ValueError: if the file or its directory can be written by another
+      user, so that cached data cannot be planted by someone else
+    """
+    path = Path(path)
+    if not path.is_file():
+        return {}
+    _check_private(path.parent)
+    _check_private(path)
+    try:
+        return json.loads(path.read_text())
+    except ValueError:
+        return {}
+
+
+def save_cache_file(path, data):
+    """
+    Save data to a JSON cache file private to the current user.
+
+    Missing directories are created readable by the current user only and the
+    file is written with ``0o600`` permissions then atomically replaced.
+
+    :param path: the path to the cache file
+    :param data: the data to save
+    :raises ValueError: if the directory of the file can be written by another
+      user
+    """
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    _check_private(path.parent)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(json.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def _check_private(path):
+    status = path.stat()
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        raise ValueError(f"{path} is not owned by the current user")
+    if status.st_mode & 0o022:
+        raise ValueError(f"{path} is writable by other users")
@@ -14,9 +14,10 @@
 """IBM Cloud cluster list fetcher."""
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-from arboretum.common.iam_ibm_utils import get_tokens
-from arboretum.common.ibm_constants import IC_CONTAINERS_BASE_URL
+from arboretum.common.containers_ibm_utils import get_cluster_list
+from arboretum.common.ibm_constants import ACCOUNT_WORKERS_DEFAULT
 
 from compliance.evidence import DAY, RawEvidence, store_raw_evidence
 from compliance.fetch import ComplianceFetcher
@@ -38,8 +39,9 @@ class ClusterListFetcher(ComplianceFetcher):
                 )
             ]
         )
-        headers = {"Accept": "application/json"}
-        cls.session(IC_CONTAINERS_BASE_URL, **headers)
+        cls.max_workers = cls.config.get(
+            "org.ibm_cloud.cluster_list.max_workers", ACCOUNT_WORKERS_DEFAULT
+        )
 
         return cls
 
@@ -47,20 +49,14 @@ class ClusterListFetcher(ComplianceFetcher):
     def fetch_cluster_list(self):
         """Fetch IBM Cloud cluster list."""
         accounts = self.config.get("org.ibm_cloud.accounts")
-        cluster_list = {}
-        for account in accounts:
-            cluster_list[account] = self._get_cluster_list(account)
-        return json.dumps(cluster_list)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Accounts are listed in configuration order whatever the order
+            # their clusters are retrieved in
+            cluster_lists = executor.map(self._get_cluster_list, accounts)
+            return json.dumps(dict(zip(accounts, cluster_lists)))
 
     def _get_cluster_list(self, account):
 
         # get credential for the account
         api_key = getattr(self.config.creds["ibm_cloud"], f"{account}_api_key")
-        # get cluster list
-        # https://cloud.ibm.com/apidocs/kubernetes#getclusters
-        self.session().headers.update(
-            {"Authorization": f"Bearer {get_tokens(api_key)[0]}"}
-        )
-        resp = self.session().get("/global/v1/clusters")
-        resp.raise_for_status()
-        return resp.json()
+        return get_cluster_list(self.config, api_key)
@@ -14,97 +14,428 @@
 """IBM Cloud cluster resource fetcher."""
 
 import io
+import itertools
 import json
 import pathlib
-import tempfile
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlparse
 
+from arboretum.common.cluster_resources import ClusterResourcesFetcherMixin
+from arboretum.common.containers_ibm_utils import get_cluster_list
 from arboretum.common.iam_ibm_utils import get_tokens
-from arboretum.common.kube_constants import RESOURCE_TYPES_DEFAULT
-from arboretum.common.kube_utils import get_cluster_resources
+from arboretum.common.ibm_constants import (
+    ACCOUNT_WORKERS_DEFAULT,
+    CLUSTER_TIMEOUT_DEFAULT,
+    IC_CONTAINERS_BASE_URL,
+)
+from arboretum.common.kube_constants import MAX_WORKERS_DEFAULT
+from arboretum.common.kube_utils import iter_cluster_resources
+from arboretum.common.token_cache import get_jwt_expiry, get_token_cache, hash_secret
+from arboretum.common.utils import (
+    CADataAdapter,
+    StreamedObject,
+    get_user_cache_dir,
+    new_session,
+    write_json,
+)
 
 from compliance.evidence import (
     DAY,
     RawEvidence,
+    get_evidence_by_path,
     get_evidence_dependency,
-    store_raw_evidence,
+    raw_evidence,
 )
 from compliance.fetch import ComplianceFetcher
 
 import yaml
 
+# Number of seconds a discovered OpenShift OAuth token endpoint is cached for
+OAUTH_DISCOVERY_TTL = DAY
+
 
-class ICClusterResourceFetcher(ComplianceFetcher):
+class ICClusterResourceFetcher(ClusterResourcesFetcherMixin, ComplianceFetcher):
     """Fetch resources of IBM Cloud Kubernetes clusters."""
 
+    config_prefix = "org.ibm_cloud.cluster_resources"
+    evidence_category = "ibm_cloud"
+    evidence_title = "IBM Cloud Kubernetes"
+
     @classmethod
     def setUpClass(cls):
         """Initialize the fetcher object with configuration settings."""
-        cls.config.add_evidences(
-            [
-                RawEvidence(
-                    "cluster_resources.json",
-                    "ibm_cloud",
-                    DAY,
-                    "IBM Cloud Kubernetes cluster resources",
+        cls._setup_cluster_resources()
+        cls.oauth_cache = get_token_cache(
+            cls.config.get(
+                "org.ibm_cloud.cluster_resources.oauth_cache",
+                str(get_user_cache_dir() / "ibm_cloud_oauth.json"),
+            )
+        )
+        cls.credentials_cache = get_token_cache(
+            cls.config.get("org.ibm_cloud.cluster_resources.credentials_cache")
+        )
+        cls.max_workers = cls.config.get(
+            "org.ibm_cloud.cluster_resources.max_workers", MAX_WORKERS_DEFAULT
+        )
+        cls.pipeline = cls.config.get("org.ibm_cloud.cluster_resources.pipeline", False)
+        if cls.pipeline:
+            cls.list_workers = cls.config.get(
+                "org.ibm_cloud.cluster_list.max_workers", ACCOUNT_WORKERS_DEFAULT
+            )
+            if cls.config.get_evidence("raw/ibm_cloud/cluster_list.json") is None:
+                cls.config.add_evidences(
+                    [
+                        RawEvidence(
+                            "cluster_list.json",
+                            "ibm_cloud",
+                            DAY,
+                            "IBM Cloud cluster list inventory",
+                        )
+                    ]
                 )
-            ]
+        timeout = cls.config.get(
+            "org.ibm_cloud.cluster_resources.timeout", CLUSTER_TIMEOUT_DEFAULT
         )
-        cls.resource_types = cls.config.get(
-            "org.ibm_cloud.cluster_resources.types", RESOURCE_TYPES_DEFAULT
+        cls.timeout = tuple(timeout) if isinstance(timeout, list) else timeout
+        cls.deadline = cls.config.get("org.ibm_cloud.cluster_resources.deadline")
+        cls.slowest_first = cls.config.get(
+            "org.ibm_cloud.cluster_resources.slowest_first", False
+        )
+        cls.keep_state = cls.per_type_ttl or cls.slowest_first
+        cls.keep_resources = cls.per_type_ttl
+        cls._setup_state(
+            "IBM Cloud Kubernetes cluster resource list times and "
+            "cluster fetch durations"
         )
-        cls.tempdir = tempfile.TemporaryDirectory()
         return cls
 
-    @classmethod
-    def tearDownClass(cls):
-        """Cleanup class."""
-        cls.tempdir.cleanup()
-
-    @store_raw_evidence("ibm_cloud/cluster_resources.json")
     def fetch_cluster_resource(self):
         """Fetch cluster resources."""
-        cluster_list_evidence = get_evidence_dependency(
-            "raw/ibm_cloud/cluster_list.json", self.locker
+        with raw_evidence(self.locker, self.evidence_path) as evidence:
+            if evidence:
+                evidence.set_content(self._fetch_cluster_resource())
+
+    def _fetch_cluster_resource(self):
+        previous, previous_state = self._get_previous_snapshot()
+        state = {"fetched": {}, "durations": {}}
+        deadline = None
+        if self.deadline:
+            deadline = time.time() + self.deadline
+        indexes = self._new_indexes()
+        get_cluster = partial(
+            self._get_cluster,
+            previous=previous,
+            state=state,
+            indexes=indexes,
+            deadline=deadline,
         )
-        cluster_list = cluster_list_evidence.content_as_json
-        resources = {}
-        for account in cluster_list:
-            api_key = self.config.creds.get("ibm_cloud", f"{account}_api_key")
-            access_token, refresh_token = get_tokens(api_key)
-            headers = {
-                "Accept": "application/json",
-                "Authorization": f"Bearer {access_token}",
-                "X-Auth-Refresh-Token": refresh_token,
+        content = io.StringIO()
+        if self.pipeline:
+            list_account_clusters = partial(
+                self._list_account_clusters,
+                previous_state=previous_state,
+                state=state,
+                get_cluster=get_cluster,
+            )
+            cluster_list = self._write_pipelined(content, list_account_clusters)
+            cluster_list_evidence = get_evidence_by_path(
+                "raw/ibm_cloud/cluster_list.json"
+            )
+            cluster_list_evidence.set_content(json.dumps(cluster_list))
+            self.locker.add_evidence(cluster_list_evidence)
+        else:
+            cluster_list_evidence = get_evidence_dependency(
+                "raw/ibm_cloud/cluster_list.json", self.locker
+            )
+            # Account errors entries recorded by a pipelined run are kept
+            cluster_list = {
+                account: (
+                    [c for c in clusters if "id" in c],
+                    [c for c in clusters if "id" not in c],
+                )
+                for account, clusters in cluster_list_evidence.content_as_json.items()
             }
-            self.session("https://containers.cloud.ibm.com", **headers)
-
-            resources[account] = []
-            for cluster in cluster_list[account]:
-                self.session("https://containers.cloud.ibm.com", **headers)
-                config_url = f'/global/v1/clusters/{cluster["id"]}/config'
-                resp = self.session().get(config_url)
-                resp.raise_for_status()
-                cluster_config = zipfile.ZipFile(io.BytesIO(resp.content))
-                if cluster["type"] == "kubernetes":
-                    cluster_token, ca_cert = self._get_iks_credentials(cluster_config)
-                elif cluster["type"] == "openshift":
-                    cluster_token = self._get_roks_credentials(cluster, api_key)
-                    ca_cert = None
-                self.session(cluster["serverURL"], **headers)
-                cluster["resources"] = get_cluster_resources(
-                    self.session(), cluster_token, self.resource_types, ca_cert
+            for account, (clusters, _) in cluster_list.items():
+                self._init_state(account, clusters, previous_state, state)
+            self._write_clusters(content, get_cluster, cluster_list, state)
+        if self.keep_state:
+            self._store_state(state)
+        self._store_indexes(indexes)
+        return content.getvalue()
+
+    def _write_clusters(self, content, get_cluster, cluster_list, state):
+        get_cluster = partial(get_cluster, stream=self.max_workers == 1)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            account_clusters = [
+                (account, cluster)
+                for account, (clusters, _) in cluster_list.items()
+                for cluster in clusters
+            ]
+            if self.max_workers > 1:
+                # Results are provided in cluster list order whatever the
+                # order clusters are scheduled and fetched in
+                futures = {}
+                for idx in self._schedule(account_clusters, state):
+                    futures[idx] = executor.submit(get_cluster, *account_clusters[idx])
+                results = (futures[idx].result() for idx in range(len(futures)))
+            else:
+                # Stream each resource list to the evidence as it is retrieved
+                results = (get_cluster(*ac) for ac in account_clusters)
+            results = iter(results)
+            write_json(
+                content,
+                StreamedObject(
+                    (
+                        account,
+                        self._iter_account_manifest(
+                            account,
+                            itertools.chain(errors, (next(results) for _ in clusters)),
+                        ),
+                    )
+                    for account, (clusters, errors) in cluster_list.items()
+                ),
+            )
+
+    def _write_pipelined(self, content, list_account_clusters):
+        # Clusters of an account are handed to the resource workers as soon as
+        # the account cluster list is retrieved, while other accounts are
+        # still being listed.  Accounts and clusters are written in
+        # configuration and cluster list order whatever the completion order.
+        accounts = self.config.get("org.ibm_cloud.accounts")
+        cluster_list = {}
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor, ThreadPoolExecutor(
+            max_workers=self.list_workers
+        ) as list_executor:
+            listed = list_executor.map(
+                partial(list_account_clusters, executor=executor), accounts
+            )
+            write_json(
+                content,
+                StreamedObject(
+                    (
+                        account,
+                        self._iter_account_manifest(
+                            account,
+                            self._iter_pipelined(account, clusters, cluster_list),
+                        ),
+                    )
+                    for account, clusters in zip(accounts, listed)
+                ),
+            )
+        return cluster_list
+
+    def _list_account_clusters(
+        self, account, previous_state, state, get_cluster, executor
+    ):
+        api_key = self.config.creds.get("ibm_cloud", f"{account}_api_key")
+        try:
+            clusters = get_cluster_list(self.config, api_key, timeout=self.timeout)
+        except Exception as e:
+            # A failing account is recorded as an errors entry in place of its
+            # clusters instead of failing the whole fetch
+            self._init_state(account, [], previous_state, state)
+            return [], [{"error": f"{e.__class__.__name__}: {e}"}]
+        self._init_state(account, clusters, previous_state, state)
+        futures = {}
+        for idx in self._schedule([(account, c) for c in clusters], state):
+            futures[idx] = executor.submit(
+                get_cluster, account, clusters[idx], stream=False
+            )
+        return [(cluster, futures[idx]) for idx, cluster in enumerate(clusters)], []
+
+    def _iter_pipelined(self, account, listed, cluster_list):
+        clusters, errors = listed
+        cluster_list[account] = [cluster for cluster, _ in clusters]
+        if errors:
+            # The failure is kept visible in the cluster list evidence as
+            # well, so that the account is not taken for an empty one
+            cluster_list[account].append({"errors": errors})
+            yield {"errors": errors}
+        for _, future in clusters:
+            yield future.result()
+
+    def _init_state(self, account, clusters, previous_state, state):
+        # Resource list times and cluster durations are initialized from the
+        # previous state before the account clusters are handed to the workers
+        fetched = previous_state.get("fetched", {}).get(account, {})
+        durations = previous_state.get("durations", {}).get(account, {})
+        state["fetched"][account] = {
+            c["id"]: dict(fetched.get(c["id"], {})) for c in clusters
+        }
+        state["durations"][account] = {
+            c["id"]: durations[c["id"]] for c in clusters if c["id"] in durations
+        }
+
+    def _schedule(self, account_clusters, state):
+        """Provide the indexes of clusters in the order they are started in."""
+        order = range(len(account_clusters))
+        if not self.slowest_first:
+            return order
+        # Clusters without a recorded duration are new and started first
+        return sorted(
+            order,
+            key=lambda idx: -state["durations"]
+            .get(account_clusters[idx][0], {})
+            .get(account_clusters[idx][1]["id"], float("inf")),
+        )
+
+    def _index_previous(self, accounts, get_resources):
+        # Account errors entries have no cluster id nor resources
+        return {
+            account: {c["id"]: get_resources(c) for c in clusters if "id" in c}
+            for account, clusters in accounts.items()
+        }
+
+    def _iter_account_manifest(self, account, clusters_resources):
+        if self.layout == "single":
+            return clusters_resources
+        # Account errors entries have no resources to store
+        return (
+            self._store_account_cluster(account, c) if "resources" in c else c
+            for c in clusters_resources
+        )
+
+    def _store_account_cluster(self, account, cluster):
+        return self._store_cluster(
+            (account, cluster["name"]), f'IBM Cloud cluster {cluster["name"]}', cluster
+        )
+
+    def _get_cluster(
+        self, account, cluster, previous, state, indexes, deadline, stream
+    ):
+        previous = previous.get(account, {}).get(cluster["id"])
+        fetched = state["fetched"][account][cluster["id"]]
+        fresh = self._get_fresh_types(previous, fetched)
+        # Errors are appended as resources are retrieved, and the errors list
+        # is only written once the cluster resources have been written
+        errors = []
+        if fresh == set(self.ttls):
+            # Every resource type is still fresh, the cluster is not accessed
+            resources = [(t, previous[t]) for t in self.ttls]
+        else:
+            resources = self._iter_guarded(
+                self._iter_cluster_resources(
+                    account, cluster, previous, fresh, fetched
+                ),
+                errors,
+                deadline,
+                state["durations"][account],
+                cluster["id"],
+            )
+        resources = self._iter_indexed(resources, indexes, account, cluster)
+        if stream:
+            # Resource lists are retrieved while the evidence is being written
+            resources = StreamedObject(resources)
+        else:
+            resources = dict(resources)
+        return {**cluster, "resources": resources, "errors": errors}
+
+    def _iter_guarded(self, resources, errors, deadline, durations, cluster_id):
+        # A failing cluster is recorded in its errors instead of failing the
+        # whole fetch, the resource lists retrieved until then are kept
+        if deadline is not None and time.time() >= deadline:
+            errors.append({"error": "Run deadline exceeded before cluster access"})
+            return
+        start = time.time()
+        retrieved = set()
+        try:
+            for resource_type, items in resources:
+                retrieved.add(resource_type)
+                yield resource_type, items
+                if deadline is None or time.time() < deadline:
+                    continue
+                if set(self.ttls) - retrieved:
+                    errors.append({"error": "Run deadline exceeded"})
+                break
+        except Exception as e:
+            errors.append({"error": f"{e.__class__.__name__}: {e}"})
+        finally:
+            resources.close()
+            durations[cluster_id] = round(time.time() - start, 3)
+
+    def _iter_indexed(self, resources, indexes, account, cluster):
+        for resource_type, items in resources:
+            if "images" in indexes:
+                indexes["images"].add(items, account=account, cluster=cluster["name"])
+            if "objects" in indexes:
+                indexes["objects"].add(
+                    f'{account}/{cluster["name"]}', resource_type, items
                 )
-                resources[account].append(cluster)
+            yield resource_type, items
 
-        return json.dumps(resources)
+    def _iter_cluster_resources(self, account, cluster, previous, fresh, fetched):
+        api_key = self.config.creds.get("ibm_cloud", f"{account}_api_key")
+        access_token, refresh_token = get_tokens(api_key)
+        headers = {
+            "Accept": "application/json",
+            "Authorization": f"Bearer {access_token}",
+            "X-Auth-Refresh-Token": refresh_token,
+        }
+        cluster_token, ca_data = self._get_cluster_credentials(
+            cluster, api_key, headers
+        )
+        now = time.time()
+        session = new_session(
+            self.config, cluster["serverURL"], timeout=self.timeout, **headers
+        )
+        if ca_data:
+            session.mount("https://", CADataAdapter(ca_data, timeout=self.timeout))
+        try:
+            for resource_type, items in iter_cluster_resources(
+                session,
+                cluster_token,
+                self.resource_types,
+                page_size=self.page_size,
+                exclude=self.exclude,
+                discovery=self.discovery,
+                namespace_workers=self.namespace_workers,
+                previous=previous,
+                fresh=fresh,
+            ):
+                if resource_type not in fresh:
+                    fetched[resource_type] = now
+                yield resource_type, items
+        finally:
+            session.close()
 
-    def _get_iks_credentials(self, cluster_config):
+    def _get_cluster_credentials(self, cluster, api_key, headers):
+        if cluster["type"] == "kubernetes":
+            return self.credentials_cache.get(
+                ("kubernetes", cluster["id"]),
+                partial(self._get_iks_credentials, cluster, headers),
+            )
+        elif cluster["type"] == "openshift":
+            cluster_token = self.credentials_cache.get(
+                ("openshift", cluster["id"], hash_secret(api_key)),
+                partial(self._get_roks_credentials, cluster, api_key),
+            )
+            return cluster_token, None
+        raise ValueError(f'Unsupported cluster type {cluster["type"]}')
+
+    def _get_iks_credentials(self, cluster, headers):
         """Get credentials for an IKS cluster.
 
         This function implements the procedure described in
         https://cloud.ibm.com/apidocs/kubernetes#getclusterconfig
+
+        The cluster config is read in memory and the id-token and CA
+        certificates are cached until the id-token expires.
         """
+        session = new_session(
+            self.config, IC_CONTAINERS_BASE_URL, timeout=self.timeout, **headers
+        )
+        try:
+            resp = session.get(f'/global/v1/clusters/{cluster["id"]}/config')
+            resp.raise_for_status()
+        finally:
+            session.close()
+        cluster_config = zipfile.ZipFile(io.BytesIO(resp.content))
+        ca_data = []
         for name in cluster_config.namelist():
             p = pathlib.PurePath(name)
             if p.name.startswith("kube-config"):
@@ -112,34 +443,52 @@ class ICClusterResourceFetcher(ComplianceFetcher):
                 usr = kubeconfig["users"][0]["user"]
                 cluster_token = usr["auth-provider"]["config"]["id-token"]
             if p.suffix == ".pem":
-                cluster_config.extract(name, path=self.tempdir.name)
-                ca_cert_filepath = str(pathlib.PurePath(self.tempdir.name, name))
-        return cluster_token, ca_cert_filepath
+                ca_data.append(cluster_config.read(name).decode())
+        credentials = (cluster_token, "\n".join(ca_data) or None)
+        return credentials, get_jwt_expiry(cluster_token)
 
     def _get_roks_credentials(self, cluster, api_key):
         """Get credentials for a ROKS cluster.
 
         This function implements the procedure described in
         https://cloud.ibm.com/docs/openshift?topic=openshift-access_cluster#access_automation
+
+        The OAuth token endpoint is discovered once a day per cluster server
+        URL and the access token is cached until it expires.
         """
-        s = self.session(cluster["serverURL"])
-        oauth_path = "/.well-known/oauth-authorization-server"
-        resp = s.get(oauth_path)
-        resp.raise_for_status()
-        token_endpoint = resp.json()["token_endpoint"]
+        token_endpoint = self.oauth_cache.get(
+            ("oauth", cluster["serverURL"]),
+            partial(self._get_roks_token_endpoint, cluster),
+        )
         oauth_server = token_endpoint.split("/")[2]
-        s = self.session(f"https://{oauth_server}")
+        s = new_session(self.config, f"https://{oauth_server}", timeout=self.timeout)
         token_path = (
             "/oauth/authorize?client_id="  # nosec B105
             "openshift-challenging-client&response_type=token"
         )
-        resp = s.get(
-            token_path,
-            auth=("apikey", api_key),
-            headers={"X-CSRF-Token": "a"},
-            allow_redirects=False,
-        )
-        location = resp.headers["Location"]
-        cluster_token = location.split("access_token=", 1)[1].split("&", 1)[0]
+        requested = time.time()
+        try:
+            resp = s.get(
+                token_path,
+                auth=("apikey", api_key),
+                headers={"X-CSRF-Token": "a"},
+                allow_redirects=False,
+            )
+        finally:
+            s.close()
+        fragment = parse_qs(urlparse(resp.headers["Location"]).fragment)
+        cluster_token = fragment["access_token"][0]
+        expires_at = None
+        if fragment.get("expires_in"):
+            expires_at = requested + int(fragment["expires_in"][0])
+        return cluster_token, expires_at
 
-        return cluster_token
+    def _get_roks_token_endpoint(self, cluster):
+        s = new_session(self.config, cluster["serverURL"], timeout=self.timeout)
+        try:
+            oauth_path = "/.well-known/oauth-authorization-server"
+            resp = s.get(oauth_path)
+            resp.raise_for_status()
+        finally:
+            s.close()
+        return resp.json()["token_endpoint"], time.time() + OAUTH_DISCOVERY_TTL
@@ -0,0 +1,126 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""IBM Cloud resource instance inventory fetcher."""
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from arboretum.common.iam_ibm_utils import get_tokens
+from arboretum.common.ibm_constants import (
+    ACCOUNT_WORKERS_DEFAULT,
+    IC_RESOURCE_CONTROLLER_BASE_URL,
+    RESOURCE_GROUP_WORKERS_DEFAULT,
+    RESOURCE_INSTANCES_EXCLUDE_DEFAULT,
+    RESOURCE_INSTANCES_PAGE_SIZE_DEFAULT,
+    RESOURCE_INSTANCES_TIMEOUT_DEFAULT,
+)
+from arboretum.common.kube_utils import project_item
+from arboretum.common.resource_controller_ibm_utils import (
+    iter_resource_instances,
+    iter_sharded_resource_instances,
+)
+from arboretum.common.utils import new_session, to_evidence_name_part, write_json
+
+from compliance.evidence import DAY, RawEvidence, get_evidence_by_path
+from compliance.fetch import ComplianceFetcher
+
+
+class ResourceInstancesFetcher(ComplianceFetcher):
+    """Fetch the resource instance inventory of IBM Cloud accounts."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Initialize the fetcher object with configuration settings."""
+        cls.accounts = cls.config.get("org.ibm_cloud.accounts")
+        cls.config.add_evidences(
+            [
+                RawEvidence(
+                    f"resource_instances_{to_evidence_name_part(account)}.json",
+                    "ibm_cloud",
+                    DAY,
+                    f"IBM Cloud {account} account resource instances",
+                )
+                for account in cls.accounts
+            ]
+        )
+        cls.max_workers = cls.config.get(
+            "org.ibm_cloud.resource_instances.max_workers", ACCOUNT_WORKERS_DEFAULT
+        )
+        cls.page_size = cls.config.get(
+            "org.ibm_cloud.resource_instances.page_size",
+            RESOURCE_INSTANCES_PAGE_SIZE_DEFAULT,
+        )
+        cls.include = cls.config.get("org.ibm_cloud.resource_instances.include")
+        cls.exclude = cls.config.get(
+            "org.ibm_cloud.resource_instances.exclude",
+            RESOURCE_INSTANCES_EXCLUDE_DEFAULT,
+        )
+        cls.resource_group_sharding = cls.config.get(
+            "org.ibm_cloud.resource_instances.resource_group_sharding", False
+        )
+        cls.group_workers = cls.config.get(
+            "org.ibm_cloud.resource_instances.group_workers",
+            RESOURCE_GROUP_WORKERS_DEFAULT,
+        )
+        timeout = cls.config.get(
+            "org.ibm_cloud.resource_instances.timeout",
+            RESOURCE_INSTANCES_TIMEOUT_DEFAULT,
+        )
+        cls.timeout = tuple(timeout) if isinstance(timeout, list) else timeout
+        return cls
+
+    def fetch_resource_instances(self):
+        """Fetch the resource instances of each IBM Cloud account."""
+        evidences = {}
+        for account in self.accounts:
+            evidence = get_evidence_by_path(
+                "raw/ibm_cloud/"
+                f"resource_instances_{to_evidence_name_part(account)}.json"
+            )
+            if not self.locker.validate(evidence):
+                evidences[account] = evidence
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Evidence is stored from this thread, in configuration order,
+            # as each account inventory completes
+            contents = executor.map(self._get_resource_instances, evidences)
+            for evidence, content in zip(evidences.values(), contents):
+                evidence.set_content(content)
+                self.locker.add_evidence(evidence)
+
+    def _get_resource_instances(self, account):
+        api_key = self.config.creds.get("ibm_cloud", f"{account}_api_key")
+        session = new_session(
+            self.config,
+            IC_RESOURCE_CONTROLLER_BASE_URL,
+            timeout=self.timeout,
+            Accept="application/json",
+            Authorization=f"Bearer {get_tokens(api_key)[0]}",
+        )
+        project = None
+        if self.include or self.exclude:
+            project = partial(project_item, include=self.include, exclude=self.exclude)
+        try:
+            if self.resource_group_sharding:
+                instances = iter_sharded_resource_instances(
+                    session, self.page_size, project, self.group_workers
+                )
+            else:
+                instances = iter_resource_instances(session, self.page_size, project)
+            # Instances are written as each page is retrieved
+            content = io.StringIO()
+            write_json(content, instances)
+            return content.getvalue()
+        finally:
+            session.close()
@@ -0,0 +1,98 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes cluster RBAC checks."""
+
+from fnmatch import fnmatch
+
+from arboretum.kubernetes.evidences.cluster_rbac_index import ClusterRBACIndexEvidence
+
+from compliance.check import ComplianceCheck
+from compliance.evidence import DAY, ReportEvidence, with_raw_evidences
+
+
+class ClusterRBACCheck(ComplianceCheck):
+    """Check which subjects are allowed sensitive actions in clusters."""
+
+    @property
+    def title(self):
+        """
+        Return the title of the checks.
+
+        :returns: the title of the checks
+        """
+        return "Cluster RBAC Permissions"
+
+    @classmethod
+    def setUpClass(cls):
+        """Initialize the check object with configuration settings."""
+        cls.config.add_evidences(
+            [
+                ReportEvidence(
+                    "cluster_rbac.md",
+                    "kubernetes",
+                    DAY,
+                    "Kubernetes cluster RBAC permissions report.",
+                )
+            ]
+        )
+        return cls
+
+    @with_raw_evidences("kubernetes/cluster_rbac_index.json")
+    def test_cluster_rbac_permissions(self, raw):
+        """Check that only allowed subjects can perform restricted actions."""
+        evidence = ClusterRBACIndexEvidence.from_evidence(raw)
+        restrictions = self.config.get("org.kubernetes.cluster_rbac.restrictions", [])
+        for cluster in evidence.index:
+            for restriction in restrictions:
+                subjects = evidence.who_can(
+                    cluster,
+                    restriction["verb"],
+                    restriction["resource"],
+                    restriction.get("namespace"),
+                )
+                allowed = restriction.get("allowed", [])
+                exceptions = [
+                    s for s in subjects if any(fnmatch(s, a) for a in allowed)
+                ]
+                failed = [s for s in subjects if s not in exceptions]
+                action = {
+                    "cluster": cluster,
+                    "verb": restriction["verb"],
+                    "resource": restriction["resource"],
+                    "namespace": restriction.get("namespace"),
+                }
+                if failed:
+                    self.add_failures(
+                        "unexpected-permissions", {**action, "subjects": failed}
+                    )
+                if exceptions:
+                    self.add_warnings(
+                        "allowed-permissions", {**action, "subjects": exceptions}
+                    )
+
+    def get_reports(self):
+        """
+        Provide the check report name.
+
+        :returns: the report(s) generated for this check
+        """
+        return ["kubernetes/cluster_rbac.md"]
+
+    def msg_cluster_rbac_permissions(self):
+        """
+        Cluster RBAC permissions check notifier.
+
+        :returns: notification dictionary
+        """
+        return {"subtitle": "Cluster RBAC permissions", "body": None}
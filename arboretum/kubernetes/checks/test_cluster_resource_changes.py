@@ -0,0 +1,102 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes cluster resource changes checks."""
+
+from datetime import datetime, timedelta
+
+from arboretum.kubernetes.evidences.cluster_resources_index import (
+    ClusterResourcesIndexEvidence,
+)
+
+from compliance.check import ComplianceCheck
+from compliance.evidence import DAY, ReportEvidence, evidences
+
+
+class ClusterResourceChangesCheck(ComplianceCheck):
+    """Report the cluster resources changed since the previous day."""
+
+    @property
+    def title(self):
+        """
+        Return the title of the checks.
+
+        :returns: the title of the checks
+        """
+        return "Cluster Resource Changes"
+
+    @classmethod
+    def setUpClass(cls):
+        """Initialize the check object with configuration settings."""
+        cls.config.add_evidences(
+            [
+                ReportEvidence(
+                    "cluster_resource_changes.md",
+                    "kubernetes",
+                    DAY,
+                    "Kubernetes cluster resource changes report.",
+                )
+            ]
+        )
+        return cls
+
+    def test_cluster_resource_changes(self):
+        """Check which cluster resources were added, removed or changed."""
+        paths = self.config.get(
+            "org.kubernetes.cluster_resource_changes.evidence",
+            ["raw/kubernetes/cluster_resources_index.json"],
+        )
+        for path in paths:
+            with evidences(self, path) as raw:
+                previous_dt = datetime.utcnow() - timedelta(days=1)
+                try:
+                    previous_raw = self.get_historical_evidence(path, previous_dt)
+                except ValueError:
+                    self.add_warnings(
+                        "No prior evidence",
+                        (
+                            "No prior evidence found on or prior "
+                            f'to {previous_dt.strftime("%b %d, %Y")} '
+                            f"for `{path}`."
+                        ),
+                    )
+                    continue
+                current = ClusterResourcesIndexEvidence.from_evidence(raw)
+                previous = ClusterResourcesIndexEvidence.from_evidence(previous_raw)
+                changes = current.get_changes(previous)
+                for cluster, resources in changes.items():
+                    for resource_type, diff in resources.items():
+                        self.add_warnings(
+                            "Resources changed",
+                            {
+                                "cluster": cluster,
+                                "resource_type": resource_type,
+                                **diff,
+                            },
+                        )
+
+    def get_reports(self):
+        """
+        Provide the check report name.
+
+        :returns: the report(s) generated for this check
+        """
+        return ["kubernetes/cluster_resource_changes.md"]
+
+    def msg_cluster_resource_changes(self):
+        """
+        Cluster resource changes check notifier.
+
+        :returns: notification dictionary
+        """
+        return {"subtitle": "Cluster resource changes", "body": None}
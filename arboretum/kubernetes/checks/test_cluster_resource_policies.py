@@ -0,0 +1,125 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes cluster resource policy checks."""
+
+from arboretum.common.kube_policy import FAILURE, PolicyEngine, WARNING
+from arboretum.kubernetes.evidences.cluster_resources_manifest import (
+    ClusterResourcesManifestEvidence,
+)
+
+from compliance.check import ComplianceCheck
+from compliance.evidence import DAY, ReportEvidence, evidences
+
+
+class ClusterResourcePolicyCheck(ComplianceCheck):
+    """Evaluate policy rules against Kubernetes cluster resources."""
+
+    @property
+    def title(self):
+        """
+        Return the title of the checks.
+
+        :returns: the title of the checks
+        """
+        return "Cluster Resource Policies"
+
+    @classmethod
+    def setUpClass(cls):
+        """Initialize the check object with configuration settings."""
+        cls.config.add_evidences(
+            [
+                ReportEvidence(
+                    "cluster_resource_policies.md",
+                    "kubernetes",
+                    DAY,
+                    "Kubernetes cluster resource policies report.",
+                )
+            ]
+        )
+        return cls
+
+    def test_cluster_resource_policies(self):
+        """Check cluster resources against the configured policy rules."""
+        paths = self.config.get(
+            "org.kubernetes.cluster_resource_policies.evidence",
+            ["raw/kubernetes/cluster_resources.json"],
+        )
+        engine = PolicyEngine(
+            self.config.get("org.kubernetes.cluster_resource_policies.rules"),
+            self.config.get(
+                "org.kubernetes.cluster_resource_policies.exclude_namespaces", []
+            ),
+        )
+        for path in paths:
+            with evidences(self, path) as raw:
+                for cluster, resources in self._iter_clusters(raw):
+                    for resource_type, items in resources.items():
+                        engine.evaluate(cluster, resource_type, items)
+        for policy_rule, findings in engine.get_findings(FAILURE).items():
+            for finding in findings:
+                self.add_failures(policy_rule.title, finding)
+        for policy_rule, findings in engine.get_findings(WARNING).items():
+            for finding in findings:
+                self.add_warnings(policy_rule.title, finding)
+
+    def _iter_clusters(self, raw):
+        manifest = None
+        if raw.path.endswith("_manifest.json"):
+            manifest = ClusterResourcesManifestEvidence.from_evidence(raw)
+            manifest.locker = self.locker
+        content = raw.content_as_json
+        if isinstance(content, list):
+            clusters = [(c["label"], c) for c in content]
+        else:
+            clusters = []
+            for account, account_clusters in content.items():
+                for c in account_clusters:
+                    if "name" in c:
+                        clusters.append((f'{account}/{c["name"]}', c))
+                        continue
+                    # The clusters of an account that could not be listed
+                    # were not checked
+                    for error in c.get("errors", []):
+                        self.add_failures(
+                            "Accounts not listed",
+                            {"cluster": f"{account}/*", "error": error["error"]},
+                        )
+        for name, cluster in clusters:
+            if manifest is None:
+                yield name, cluster["resources"]
+            else:
+                yield name, manifest.get_resources(
+                    cluster, get_evidence=self._get_evidence
+                )
+
+    def _get_evidence(self, path):
+        # Referenced evidence is handled like the evidence checked directly
+        with evidences(self, path) as evidence:
+            return evidence
+
+    def get_reports(self):
+        """
+        Provide the check report name.
+
+        :returns: the report(s) generated for this check
+        """
+        return ["kubernetes/cluster_resource_policies.md"]
+
+    def msg_cluster_resource_policies(self):
+        """
+        Cluster resource policies check notifier.
+
+        :returns: notification dictionary
+        """
+        return {"subtitle": "Cluster resource policies", "body": None}
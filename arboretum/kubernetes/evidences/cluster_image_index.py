@@ -0,0 +1,56 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster container image index evidence."""
+
+import json
+
+from compliance.evidence import RawEvidence
+
+
+class ClusterImageIndexEvidence(RawEvidence):
+    """Cluster container image index raw evidence class."""
+
+    @property
+    def images(self):
+        """Provide the image entries keyed by image as specified in pods."""
+        if self.content:
+            return self._index["images"]
+
+    @property
+    def digests(self):
+        """Provide the images keyed by the digest they resolved to."""
+        if self.content:
+            return self._index["digests"]
+
+    def get_references(self, image):
+        """
+        Provide the pod containers using an image.
+
+        :param str image: an image as specified in pod specs, or a digest
+
+        :returns: the list of pod container references, empty when the image
+          is not used
+        """
+        if image in self.images:
+            return self.images[image]["references"]
+        references = []
+        for name in self.digests.get(image, []):
+            references.extend(self.images[name]["references"])
+        return references
+
+    @property
+    def _index(self):
+        if not hasattr(self, "_index_content"):
+            self._index_content = json.loads(self.content)
+        return self._index_content
@@ -0,0 +1,62 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster RBAC effective permission index evidence."""
+
+import json
+
+from arboretum.common.kube_rbac import who_can
+
+from compliance.evidence import RawEvidence
+
+
+class ClusterRBACIndexEvidence(RawEvidence):
+    """Cluster RBAC effective permission index raw evidence class."""
+
+    @property
+    def index(self):
+        """Provide the permission indexes keyed by cluster."""
+        if self.content:
+            if not hasattr(self, "_index"):
+                self._index = json.loads(self.content)
+            return self._index
+
+    def get_permissions(self, cluster, subject):
+        """
+        Provide the effective permissions of a subject.
+
+        :param str cluster: the cluster label
+        :param str subject: the subject such as ``User:<name>``,
+          ``Group:<name>`` or ``ServiceAccount:<namespace>/<name>``
+
+        :returns: the list of ``[verb, resource, namespace, resource name]``
+          permissions, empty when the subject has none
+        """
+        return self.index.get(cluster, {}).get(subject, [])
+
+    def who_can(self, cluster, verb, resource, namespace=None, resource_name=None):
+        """
+        Find the subjects of a cluster allowed to perform an action.
+
+        :param str cluster: the cluster label
+        :param str verb: the verb such as ``get`` or ``list``
+        :param str resource: the resource in ``resource.group`` form, such as
+          ``secrets`` or ``deployments.apps``, or a non-resource URL
+        :param str namespace: the namespace, or None for cluster scope access
+        :param str resource_name: an optional resource name
+
+        :returns: the sorted list of subjects
+        """
+        return who_can(
+            self.index.get(cluster, {}), verb, resource, namespace, resource_name
+        )
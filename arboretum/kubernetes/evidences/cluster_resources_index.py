@@ -0,0 +1,43 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster resources object index evidence."""
+
+import json
+
+from arboretum.common.kube_object_index import diff_object_indexes
+
+from compliance.evidence import RawEvidence
+
+
+class ClusterResourcesIndexEvidence(RawEvidence):
+    """Cluster resources object index raw evidence class."""
+
+    @property
+    def index(self):
+        """Provide the object index keyed by cluster and resource type."""
+        if self.content:
+            if not hasattr(self, "_index"):
+                self._index = json.loads(self.content)
+            return self._index
+
+    def get_changes(self, previous):
+        """
+        Provide the objects added, removed and changed since another index.
+
+        :param ClusterResourcesIndexEvidence previous: the earlier index
+
+        :returns: the changes keyed by cluster and resource type as provided
+          by :func:`arboretum.common.kube_object_index.diff_object_indexes`
+        """
+        return diff_object_indexes(previous.index or {}, self.index or {})
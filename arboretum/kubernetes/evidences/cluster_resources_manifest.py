@@ -0,0 +1,84 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster resources manifest evidence."""
+
+import hashlib
+import json
+from functools import partial
+
+from compliance.evidence import RawEvidence
+
+
+class ClusterResourcesManifestEvidence(RawEvidence):
+    """
+    Cluster resources manifest raw evidence class.
+
+    The manifest has the shape of the single file cluster resources evidence
+    except that each cluster refers to the evidence holding its resources
+    instead of including them.  A cluster entry either has an ``evidence``
+    path and ``sha256`` hash for the cluster as a whole, or a ``resources``
+    dictionary with the ``evidence`` path and ``sha256`` hash of each
+    resource type.
+    """
+
+    @property
+    def as_a_dict(self):
+        """Provide the manifest content as a dictionary or list."""
+        if self.content:
+            if not hasattr(self, "_as_a_dict"):
+                self._as_a_dict = json.loads(self.content)
+            return self._as_a_dict
+
+    def get_resources(
+        self, cluster, resource_type=None, ignore_ttl=False, get_evidence=None
+    ):
+        """
+        Provide the resources of a cluster from the evidence locker.
+
+        Only the evidence needed is loaded and its content is verified
+        against the hash recorded in the manifest.
+
+        :param dict cluster: a cluster entry of the manifest
+        :param str resource_type: optional resource type.  When provided only
+          the items of that resource type are returned.
+        :param bool ignore_ttl: ignore the referenced evidence time to live
+        :param get_evidence: optional function providing a referenced evidence
+          from its path, such as one using the ``evidences`` context manager of
+          a check.  Defaults to getting it from the manifest locker.
+
+        :returns: the cluster resources dictionary keyed by resource type, or
+          the list of items when ``resource_type`` is provided
+        """
+        if get_evidence is None:
+            get_evidence = partial(self.locker.get_evidence, ignore_ttl=ignore_ttl)
+        if "evidence" in cluster:
+            resources = self._load(cluster, get_evidence)["resources"]
+            if resource_type is None:
+                return resources
+            return resources.get(resource_type, [])
+        if resource_type is not None:
+            if resource_type not in cluster["resources"]:
+                return []
+            return self._load(cluster["resources"][resource_type], get_evidence)
+        return {
+            rt: self._load(ref, get_evidence)
+            for rt, ref in cluster["resources"].items()
+        }
+
+    def _load(self, ref, get_evidence):
+        evidence = get_evidence(ref["evidence"])
+        digest = hashlib.sha256(evidence.content.encode()).hexdigest()
+        if digest != ref["sha256"]:
+            raise ValueError(f'Evidence {ref["evidence"]} does not match manifest')
+        return json.loads(evidence.content)
@@ -0,0 +1,82 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Kubernetes stand-alone cluster RBAC fetcher."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from arboretum.common.kube_constants import (
+    MAX_WORKERS_DEFAULT,
+    PAGE_SIZE_DEFAULT,
+    RBAC_RESOURCE_TYPES,
+)
+from arboretum.common.kube_rbac import build_permission_index
+from arboretum.common.kube_utils import get_cluster_resources
+from arboretum.common.utils import new_session
+from arboretum.kubernetes.evidences.cluster_rbac_index import ClusterRBACIndexEvidence
+
+from compliance.evidence import DAY, store_raw_evidence
+from compliance.fetch import ComplianceFetcher
+
+
+class ClusterRBACFetcher(ComplianceFetcher):
+    """Fetch the effective RBAC permissions of Kubernetes stand-alone clusters."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Initialize the fetcher object with configuration settings."""
+        cls.config.add_evidences(
+            [
+                ClusterRBACIndexEvidence(
+                    "cluster_rbac_index.json",
+                    "kubernetes",
+                    DAY,
+                    "Kubernetes cluster RBAC effective permission index",
+                )
+            ]
+        )
+        cls.page_size = cls.config.get(
+            "org.kubernetes.cluster_resources.page_size", PAGE_SIZE_DEFAULT
+        )
+        cls.max_workers = cls.config.get(
+            "org.kubernetes.cluster_resources.max_workers", MAX_WORKERS_DEFAULT
+        )
+        return cls
+
+    @store_raw_evidence("kubernetes/cluster_rbac_index.json")
+    def fetch_cluster_rbac_index(self):
+        """Fetch cluster RBAC resources and index effective permissions."""
+        clusters = self.config.get("org.kubernetes.cluster_resources.clusters")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            indexes = executor.map(self._get_permission_index, clusters)
+            return json.dumps(
+                {c["label"]: index for c, index in zip(clusters, indexes)}
+            )
+
+    def _get_permission_index(self, cluster):
+        label = cluster["label"]
+        token = self.config.creds.get("kubernetes", f"{label}_token")
+        session = new_session(self.config, cluster["server"])
+        try:
+            resources = get_cluster_resources(
+                session,
+                token,
+                RBAC_RESOURCE_TYPES,
+                verify=False,
+                page_size=self.page_size,
+                max_workers=len(RBAC_RESOURCE_TYPES),
+            )
+        finally:
+            session.close()
+        return build_permission_index(resources)
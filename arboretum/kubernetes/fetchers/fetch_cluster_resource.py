@@ -13,46 +13,154 @@
 # limitations under the License.
 """Kubernetes stand-alone cluster resource fetcher."""
 
-import json
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-from arboretum.common.kube_constants import RESOURCE_TYPES_DEFAULT
-from arboretum.common.kube_utils import get_cluster_resources
+from arboretum.common.cluster_resources import ClusterResourcesFetcherMixin
+from arboretum.common.kube_constants import (
+    MAX_WORKERS_DEFAULT,
+    WATCH_TIMEOUT_DEFAULT,
+)
+from arboretum.common.kube_utils import iter_cluster_resources
+from arboretum.common.utils import (
+    StreamedObject,
+    new_session,
+    write_json,
+)
 
-from compliance.evidence import DAY, RawEvidence, store_raw_evidence
+from compliance.evidence import raw_evidence
 from compliance.fetch import ComplianceFetcher
 
 
-class ClusterResourceFetcher(ComplianceFetcher):
+class ClusterResourceFetcher(ClusterResourcesFetcherMixin, ComplianceFetcher):
     """Fetch resources of Kubernetes stand-alone clusters."""
 
+    config_prefix = "org.kubernetes.cluster_resources"
+    evidence_category = "kubernetes"
+    evidence_title = "Kubernetes"
+
     @classmethod
     def setUpClass(cls):
         """Initialize the fetcher object with configuration settings."""
-        cls.config.add_evidences(
-            [
-                RawEvidence(
-                    "cluster_resources.json",
-                    "kubernetes",
-                    DAY,
-                    "Kubernetes cluster resources",
-                )
-            ]
+        cls._setup_cluster_resources()
+        cls.max_workers = cls.config.get(
+            "org.kubernetes.cluster_resources.max_workers", MAX_WORKERS_DEFAULT
+        )
+        cls.max_workers_per_cluster = cls.config.get(
+            "org.kubernetes.cluster_resources.max_workers_per_cluster",
+            MAX_WORKERS_DEFAULT,
+        )
+        cls.limiter = None
+        max_requests = cls.config.get("org.kubernetes.cluster_resources.max_requests")
+        if max_requests:
+            cls.limiter = threading.BoundedSemaphore(max_requests)
+        cls.incremental = cls.config.get(
+            "org.kubernetes.cluster_resources.incremental", False
         )
-        cls.resource_types = cls.config.get(
-            "org.kubernetes.cluster_resources.types", RESOURCE_TYPES_DEFAULT
+        cls.watch_timeout = cls.config.get(
+            "org.kubernetes.cluster_resources.watch_timeout", WATCH_TIMEOUT_DEFAULT
         )
+        cls.keep_state = cls.keep_resources = cls.incremental or cls.per_type_ttl
+        cls._setup_state("Kubernetes cluster resource list versions and times")
         return cls
 
-    @store_raw_evidence("kubernetes/cluster_resources.json")
     def fetch_cluster_resources(self):
         """Fetch cluster resources."""
+        with raw_evidence(self.locker, self.evidence_path) as evidence:
+            if evidence:
+                evidence.set_content(self._fetch_cluster_resources())
+
+    def _fetch_cluster_resources(self):
         clusters = self.config.get("org.kubernetes.cluster_resources.clusters")
+        previous, state = self._get_previous_snapshot()
+        versions, fetched = {}, {}
         for cluster in clusters:
-            token = self.config.creds.get("kubernetes", f'{cluster["label"]}_token')
-            cluster["resources"] = get_cluster_resources(
-                self.session(cluster["server"]),
+            label = cluster["label"]
+            versions[label] = dict(state.get("resource_versions", {}).get(label, {}))
+            fetched[label] = dict(state.get("fetched", {}).get(label, {}))
+        indexes = self._new_indexes()
+        content = io.StringIO()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if self.max_workers > 1:
+                get_resources = partial(
+                    self._get_cluster_resources,
+                    previous=previous,
+                    versions=versions,
+                    fetched=fetched,
+                    indexes=indexes,
+                )
+                results = executor.map(get_resources, clusters)
+            else:
+                # Stream each resource list to the evidence as it is retrieved
+                results = (
+                    StreamedObject(
+                        self._iter_cluster_resources(
+                            c, previous, versions, fetched, indexes
+                        )
+                    )
+                    for c in clusters
+                )
+            clusters_resources = (
+                {**c, "resources": r} for c, r in zip(clusters, results)
+            )
+            if self.layout != "single":
+                clusters_resources = (
+                    self._store_cluster(
+                        (c["label"],),
+                        f'Kubernetes cluster {c["label"]}',
+                        c,
+                    )
+                    for c in clusters_resources
+                )
+            write_json(content, clusters_resources)
+        if self.keep_state:
+            state = {"fetched": fetched}
+            if self.incremental:
+                state["resource_versions"] = versions
+            self._store_state(state)
+        self._store_indexes(indexes)
+        return content.getvalue()
+
+    def _index_previous(self, clusters, get_resources):
+        return {c["label"]: get_resources(c) for c in clusters}
+
+    def _get_cluster_resources(self, cluster, previous, versions, fetched, indexes):
+        return dict(
+            self._iter_cluster_resources(cluster, previous, versions, fetched, indexes)
+        )
+
+    def _iter_cluster_resources(self, cluster, previous, versions, fetched, indexes):
+        label = cluster["label"]
+        token = self.config.creds.get("kubernetes", f"{label}_token")
+        fresh = self._get_fresh_types(previous.get(label), fetched[label])
+        now = time.time()
+        session = new_session(self.config, cluster["server"])
+        try:
+            for resource_type, items in iter_cluster_resources(
+                session,
                 token,
                 self.resource_types,
                 verify=False,
-            )
-        return json.dumps(clusters)
+                page_size=self.page_size,
+                max_workers=self.max_workers_per_cluster,
+                resource_versions=versions[label],
+                previous=previous.get(label),
+                watch_timeout=self.watch_timeout,
+                exclude=self.exclude,
+                discovery=self.discovery,
+                namespace_workers=self.namespace_workers,
+                fresh=fresh,
+                limiter=self.limiter,
+            ):
+                if resource_type not in fresh:
+                    fetched[label][resource_type] = now
+                if "images" in indexes:
+                    indexes["images"].add(items, cluster=label)
+                if "objects" in indexes:
+                    indexes["objects"].add(label, resource_type, items)
+                yield resource_type, items
+        finally:
+            session.close()
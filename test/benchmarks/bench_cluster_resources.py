@@ -0,0 +1,168 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Cluster resources fetch benchmark.
+
+Each run fetches the resources of a local fake Kubernetes API server the way
+``ClusterResourceFetcher`` does and reports the wall time, the peak resident
+set size and the number of bytes of evidence content written.  Every run is
+executed in its own process so that peak memory is measured per size.
+
+Usage::
+
+    python -m test.benchmarks.bench_cluster_resources --sizes 1000,10000,100000
+"""
+
+import argparse
+import io
+import json
+import resource
+import subprocess  # nosec B404
+import sys
+import time
+
+from arboretum.common.kube_constants import (
+    NAMESPACE_WORKERS_DEFAULT,
+    PAGE_SIZE_DEFAULT,
+    RESOURCE_TYPES_DEFAULT,
+)
+from arboretum.common.kube_utils import DiscoveryCache, iter_cluster_resources
+from arboretum.common.utils import StreamedObject, write_json
+
+from compliance.evidence import RawEvidence
+from compliance.utils.http import BaseSession
+
+from .fake_kube_api import FakeKubeAPIServer
+
+SIZES_DEFAULT = "1000,10000,100000"
+
+
+def fetch(url, options):
+    """Fetch the cluster resources and store them as evidence content."""
+    types = RESOURCE_TYPES_DEFAULT
+    type_options = {}
+    if options.format:
+        type_options["format"] = options.format
+    if options.namespace_sharding:
+        type_options["namespace_sharding"] = True
+    if type_options:
+        types = [{"name": t, **type_options} for t in types]
+    clusters = [{"label": "bench", "server": url}]
+    session = BaseSession(url)
+    content = io.StringIO()
+    write_json(
+        content,
+        (
+            {
+                **cluster,
+                "resources": StreamedObject(
+                    iter_cluster_resources(
+                        session,
+                        "token",
+                        types,
+                        verify=False,
+                        page_size=options.page_size,
+                        max_workers=options.max_workers,
+                        discovery=DiscoveryCache(""),
+                        namespace_workers=options.namespace_workers,
+                    )
+                ),
+            }
+            for cluster in clusters
+        ),
+    )
+    evidence = RawEvidence("cluster_resources.json", "kubernetes")
+    evidence.set_content(content.getvalue())
+    session.close()
+    return len(evidence.content.encode())
+
+
+def run(url, options):
+    """Measure one fetch in the current process."""
+    start = time.perf_counter()
+    written = fetch(url, options)
+    wall = time.perf_counter() - start
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        max_rss //= 1024
+    return {"wall_s": round(wall, 3), "max_rss_kib": max_rss, "bytes": written}
+
+
+def benchmark(size, options):
+    """Serve a cluster of the given size and measure a fetch in a subprocess."""
+    with FakeKubeAPIServer(size) as server:
+        cmd = [sys.executable, "-m", __spec__.name, "--run", server.url]
+        cmd += _option_args(options)
+        out = subprocess.run(  # nosec B603
+            cmd, check=True, stdout=subprocess.PIPE, universal_newlines=True
+        ).stdout
+        result = {"size": size, **json.loads(out)}
+        result["list_requests"] = len(server.requests)
+    return result
+
+
+def _option_args(options):
+    args = [
+        f"--page-size={options.page_size}",
+        f"--max-workers={options.max_workers}",
+        f"--namespace-workers={options.namespace_workers}",
+    ]
+    if options.format:
+        args.append(f"--format={options.format}")
+    if options.namespace_sharding:
+        args.append("--namespace-sharding")
+    return args
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes",
+        default=SIZES_DEFAULT,
+        help=f"comma separated numbers of objects (default: {SIZES_DEFAULT})",
+    )
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE_DEFAULT)
+    parser.add_argument("--max-workers", type=int, default=1)
+    parser.add_argument(
+        "--namespace-workers", type=int, default=NAMESPACE_WORKERS_DEFAULT
+    )
+    parser.add_argument("--format", choices=["metadata", "table"])
+    parser.add_argument("--namespace-sharding", action="store_true")
+    parser.add_argument(
+        "--json", action="store_true", help="print one JSON object per size"
+    )
+    parser.add_argument("--run", metavar="URL", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the benchmark for each size and print the results."""
+    options = _parse_args(argv)
+    if options.run:
+        print(json.dumps(run(options.run, options)))
+        return
+    columns = ["size", "wall_s", "max_rss_kib", "bytes", "list_requests"]
+    if not options.json:
+        print("".join(f"{c:>15}" for c in columns))
+    for size in options.sizes.split(","):
+        result = benchmark(int(size), options)
+        if options.json:
+            print(json.dumps(result))
+        else:
+            print("".join(f"{result[c]:>15}" for c in columns))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
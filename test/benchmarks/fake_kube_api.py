@@ -0,0 +1,343 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A local stand-in for the Kubernetes API server used by benchmarks."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RESOURCE_VERSION = "1000"
+
+DISCOVERY = {
+    "/api": {"kind": "APIVersions", "versions": ["v1"]},
+    "/apis": {
+        "kind": "APIGroupList",
+        "groups": [
+            {
+                "name": "apps",
+                "versions": [{"groupVersion": "apps/v1", "version": "v1"}],
+                "preferredVersion": {"groupVersion": "apps/v1", "version": "v1"},
+            }
+        ],
+    },
+    "/api/v1": {
+        "kind": "APIResourceList",
+        "groupVersion": "v1",
+        "resources": [
+            {
+                "name": "configmaps",
+                "singularName": "",
+                "namespaced": True,
+                "kind": "ConfigMap",
+                "shortNames": ["cm"],
+            },
+            {
+                "name": "namespaces",
+                "singularName": "",
+                "namespaced": False,
+                "kind": "Namespace",
+                "shortNames": ["ns"],
+            },
+            {
+                "name": "nodes",
+                "singularName": "",
+                "namespaced": False,
+                "kind": "Node",
+                "shortNames": ["no"],
+            },
+            {
+                "name": "pods",
+                "singularName": "",
+                "namespaced": True,
+                "kind": "Pod",
+                "shortNames": ["po"],
+            },
+            {"name": "pods/log", "singularName": "", "namespaced": True},
+        ],
+    },
+    "/apis/apps/v1": {
+        "kind": "APIResourceList",
+        "groupVersion": "apps/v1",
+        "resources": [
+            {
+                "name": "deployments",
+                "singularName": "",
+                "namespaced": True,
+                "kind": "Deployment",
+                "shortNames": ["deploy"],
+            }
+        ],
+    },
+}
+
+
+class FakeCluster(object):
+    """
+    Synthetic cluster content.
+
+    Objects are generated from their index when a page is requested so that
+    the server memory does not grow with the number of objects.  Of ``size``
+    objects 60% are pods, 35% are configmaps and 5% are nodes.  Namespaced
+    objects are spread over one namespace per 100 pods.
+    """
+
+    def __init__(self, size):
+        """Construct the cluster content for a total number of objects."""
+        self.counts = {
+            "nodes": max(1, size * 5 // 100),
+            "configmaps": size * 35 // 100,
+        }
+        self.counts["pods"] = max(0, size - sum(self.counts.values()))
+        self.counts["namespaces"] = max(1, self.counts["pods"] // 100)
+        self.counts["deployments"] = 0
+
+    @property
+    def namespaces(self):
+        """Provide the namespace names."""
+        return [f"ns-{i:05d}" for i in range(self.counts["namespaces"])]
+
+    def namespace_range(self, resource_type, namespace):
+        """Provide the range of object indexes within a namespace."""
+        count = self.counts[resource_type]
+        namespaces = self.counts["namespaces"]
+        index = int(namespace.rsplit("-", 1)[1])
+        if index >= namespaces:
+            return range(0)
+        per_namespace, extra = divmod(count, namespaces)
+        start = index * per_namespace + min(index, extra)
+        return range(start, start + per_namespace + (index < extra))
+
+    def namespace_of(self, resource_type, index):
+        """Provide the namespace of an object index."""
+        count = self.counts[resource_type]
+        namespaces = self.counts["namespaces"]
+        per_namespace, extra = divmod(count, namespaces)
+        boundary = extra * (per_namespace + 1)
+        if index < boundary:
+            return self.namespaces[index // (per_namespace + 1)]
+        return self.namespaces[extra + (index - boundary) // per_namespace]
+
+    def item(self, resource_type, index):
+        """Provide the object of a resource type at an index."""
+        build = getattr(self, f"_{resource_type}")
+        return build(index)
+
+    def _metadata(self, name, namespace=None, index=0):
+        metadata = {
+            "name": name,
+            "uid": f"00000000-0000-0000-0000-{index:012d}",
+            "resourceVersion": str(index + 1),
+            "creationTimestamp": "2021-01-01T00:00:00Z",
+            "labels": {"app": f"app-{index % 50}", "tier": "backend"},
+            "annotations": {
+                "kubectl.kubernetes.io/last-applied-configuration": "x" * 512
+            },
+            "managedFields": [
+                {
+                    "manager": "kubectl",
+                    "operation": "Update",
+                    "apiVersion": "v1",
+                    "time": "2021-01-01T00:00:00Z",
+                    "fieldsType": "FieldsV1",
+                    "fieldsV1": {"f:metadata": {"f:labels": {"f:app": {}}}},
+                }
+            ],
+        }
+        if namespace:
+            metadata["namespace"] = namespace
+        return metadata
+
+    def _pods(self, index):
+        namespace = self.namespace_of("pods", index)
+        return {
+            "metadata": self._metadata(f"pod-{index:07d}", namespace, index),
+            "spec": {
+                "nodeName": f"node-{index % self.counts['nodes']:05d}",
+                "serviceAccountName": "default",
+                "containers": [
+                    {
+                        "name": "main",
+                        "image": f"registry.example.com/app-{index % 50}:1.0",
+                        "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                        "resources": {
+                            "limits": {"cpu": "500m", "memory": "256Mi"},
+                            "requests": {"cpu": "100m", "memory": "128Mi"},
+                        },
+                        "securityContext": {"runAsNonRoot": True},
+                    }
+                ],
+            },
+            "status": {
+                "phase": "Running",
+                "podIP": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+                "containerStatuses": [
+                    {"name": "main", "ready": True, "restartCount": 0}
+                ],
+            },
+        }
+
+    def _configmaps(self, index):
+        namespace = self.namespace_of("configmaps", index)
+        return {
+            "metadata": self._metadata(f"cm-{index:07d}", namespace, index),
+            "data": {f"key-{k}": f"value-{index}-{k}" * 4 for k in range(8)},
+        }
+
+    def _nodes(self, index):
+        return {
+            "metadata": self._metadata(f"node-{index:05d}", index=index),
+            "spec": {"podCIDR": f"10.244.{index % 256}.0/24"},
+            "status": {
+                "capacity": {"cpu": "16", "memory": "64Gi", "pods": "110"},
+                "nodeInfo": {
+                    "kubeletVersion": "v1.21.0",
+                    "osImage": "Ubuntu 20.04",
+                    "containerRuntimeVersion": "containerd://1.4.4",
+                },
+            },
+        }
+
+    def _namespaces(self, index):
+        return {
+            "metadata": self._metadata(self.namespaces[index], index=index),
+            "status": {"phase": "Active"},
+        }
+
+    def _deployments(self, index):
+        raise IndexError(index)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path.rstrip("/")
+        if path in DISCOVERY:
+            return self._send(200, DISCOVERY[path])
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["apis", "apps"]:
+            parts = parts[2:]
+        else:
+            parts = parts[1:]
+        namespace = None
+        if len(parts) == 4 and parts[1] == "namespaces":
+            namespace = parts[2]
+        elif len(parts) != 2:
+            return self._send(404, {"kind": "Status", "code": 404})
+        resource_type = parts[-1]
+        if resource_type not in self.server.cluster.counts:
+            return self._send(404, {"kind": "Status", "code": 404})
+        if params.get("watch"):
+            return self._send_watch()
+        self._send(200, self._list(resource_type, namespace, params))
+
+    def _list(self, resource_type, namespace, params):
+        cluster = self.server.cluster
+        if namespace:
+            indexes = cluster.namespace_range(resource_type, namespace)
+        else:
+            indexes = range(cluster.counts[resource_type])
+        offset = int(params.get("continue", 0))
+        limit = int(params.get("limit", 0)) or len(indexes)
+        page = indexes[offset : offset + limit]
+        self.server.requests.append((resource_type, namespace, offset))
+        items = [cluster.item(resource_type, i) for i in page]
+        metadata = {"resourceVersion": RESOURCE_VERSION}
+        if offset + limit < len(indexes):
+            metadata["continue"] = str(offset + limit)
+        accept = self.headers.get("Accept", "")
+        if "as=Table" in accept:
+            return {
+                "kind": "Table",
+                "apiVersion": "meta.k8s.io/v1",
+                "metadata": metadata,
+                "columnDefinitions": [{"name": "Name", "type": "string"}],
+                "rows": [
+                    {
+                        "cells": [item["metadata"]["name"]],
+                        "object": {"metadata": item["metadata"]},
+                    }
+                    for item in items
+                ],
+            }
+        if "as=PartialObjectMetadataList" in accept:
+            items = [{"metadata": item["metadata"]} for item in items]
+        return {"kind": "List", "metadata": metadata, "items": items}
+
+    def _send_watch(self):
+        # Nothing changes in the fake cluster, so only a bookmark is reported
+        event = {
+            "type": "BOOKMARK",
+            "object": {"metadata": {"resourceVersion": RESOURCE_VERSION}},
+        }
+        content = f"{json.dumps(event)}\n".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeKubeAPIServer(object):
+    """
+    A local HTTP server answering Kubernetes list and discovery requests.
+
+    The paths of the core and ``apps`` API groups are served, both cluster
+    wide and per namespace, with ``limit``/``continue`` paging and the
+    metadata only and ``Table`` list formats.  Watch requests report a
+    bookmark at the current resource version.  Use as a context manager.
+    """
+
+    def __init__(self, size, host="127.0.0.1", port=0):
+        """Construct the server for a total number of objects."""
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.cluster = FakeCluster(size)
+        self.httpd.requests = []
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """Provide the base URL of the server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        """Provide the (resource type, namespace, offset) of each list request."""
+        return self.httpd.requests
+
+    def __enter__(self):
+        """Start serving requests in a background thread."""
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Stop serving requests."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
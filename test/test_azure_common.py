@@ -0,0 +1,83 @@
+# Copyright (c) 2023 EnterpriseDB Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum Azure Cloud common utility module tests."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from arboretum.azure_cloud.fetchers.common import (
+    TOKEN_CACHE,
+    get_credentials,
+    get_token,
+)
+
+
+class AzureCommonTest(unittest.TestCase):
+    """Arboretum Azure Cloud common utility tests."""
+
+    def setUp(self):
+        """Initialize supporting test objects before each test."""
+        TOKEN_CACHE.clear()
+        get_credentials.cache_clear()
+        self.post_patcher = patch("requests.post")
+        self.mock_post = self.post_patcher.start()
+        self.mock_json = MagicMock(
+            return_value={"access_token": "foo", "expires_in": 3600}
+        )
+        self.mock_post.return_value.json = self.mock_json
+
+    def tearDown(self):
+        """Clean up and house keeping after each test."""
+        self.post_patcher.stop()
+
+    def test_get_token_cached(self):
+        """Ensure tokens are cached per tenant, client and scope."""
+        self.assertEqual(get_token("client", "secret", "tenant"), "foo")
+        self.assertEqual(get_token("client", "secret", "tenant"), "foo")
+        self.mock_post.assert_called_once()
+        self.assertEqual(
+            self.mock_post.call_args[0][0],
+            "https://login.microsoftonline.com/tenant/oauth2/v2.0/token",
+        )
+        get_token("other", "secret", "tenant")
+        get_token("client", "secret", "tenant", scope="https://vault.azure.net")
+        self.assertEqual(self.mock_post.call_count, 3)
+
+    @patch("arboretum.common.token_cache.time.time")
+    def test_get_token_expired(self, mock_time):
+        """Ensure tokens due to expire are requested again."""
+        mock_time.return_value = 1000
+        with patch("arboretum.azure_cloud.fetchers.common.time.time") as requested:
+            requested.return_value = 1000
+            get_token("client", "secret", "tenant")
+        mock_time.return_value = 1000 + 3600 - 60
+        self.mock_json.return_value = {"access_token": "bar", "expires_in": 3600}
+        self.assertEqual(get_token("client", "secret", "tenant"), "bar")
+        self.assertEqual(self.mock_post.call_count, 2)
+
+    def test_get_token_not_cached(self):
+        """Ensure tokens without expiry are not cached."""
+        self.mock_json.return_value = {"access_token": "foo"}
+        get_token("client", "secret", "tenant")
+        get_token("client", "secret", "tenant")
+        self.assertEqual(self.mock_post.call_count, 2)
+
+    def test_get_credentials_memoized(self):
+        """Ensure account credentials are looked up once."""
+        config = MagicMock()
+        config.creds.get.side_effect = lambda c, key, account: f"{account}-{key}"
+        expected = ("a-clientid", "a-clientsecret", "a-tenantid", "a-subscriptionid")
+        self.assertEqual(get_credentials(config, "a"), expected)
+        self.assertEqual(get_credentials(config, "a"), expected)
+        self.assertEqual(config.creds.get.call_count, 4)
@@ -0,0 +1,155 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum cluster resource fetcher mixin tests."""
+
+import json
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from arboretum.common.cluster_resources import ClusterResourcesFetcherMixin
+
+from compliance.evidence import DAY
+from compliance.utils.exceptions import EvidenceNotFoundError
+
+
+class _Fetcher(ClusterResourcesFetcherMixin):
+    config_prefix = "org.test.cluster_resources"
+    evidence_category = "test"
+    evidence_title = "Test"
+
+    def _index_previous(self, clusters, get_resources):
+        return {c["label"]: get_resources(c) for c in clusters}
+
+
+class ClusterResourcesFetcherMixinTest(unittest.TestCase):
+    """Arboretum cluster resource fetcher mixin tests."""
+
+    def setUp(self):
+        """Initialize test objects."""
+        self.options = {}
+        self.registered = {}
+        self.config = MagicMock()
+        self.config.get = lambda key, default=None: self.options.get(
+            key.rsplit(".", 1)[-1], default
+        )
+        self.config.get_evidence = self.registered.get
+        self.config.add_evidences = lambda evidences: self.registered.update(
+            (e.path, e) for e in evidences
+        )
+        self.stored = {}
+        self.locker = MagicMock(forced_evidence=[], ttl_tolerance=0)
+        self.locker.get_evidence = self._get_evidence
+        self.locker.add_evidence = lambda e: self.stored.__setitem__(e.path, e)
+        patcher = patch(
+            "arboretum.common.cluster_resources.get_evidence_by_path",
+            side_effect=lambda path: self.registered[path],
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_evidence(self, path, ignore_ttl=False):
+        if path not in self.stored:
+            raise EvidenceNotFoundError(path)
+        evidence = self.stored[path]
+        evidence.locker = self.locker
+        return evidence
+
+    def _fetcher(self, keep_state=True):
+        cls = type("Fetcher", (_Fetcher,), {"config": self.config})
+        cls._setup_cluster_resources()
+        cls.keep_state = cls.keep_resources = keep_state
+        cls._setup_state("Test cluster resource state")
+        fetcher = cls()
+        fetcher.locker = self.locker
+        return fetcher
+
+    def test_setup(self):
+        """Ensure that options are read and evidences registered."""
+        self.options = {
+            "types": [{"name": "pods", "ttl": 3600}, "nodes"],
+            "layout": "cluster",
+            "image_index": True,
+        }
+        fetcher = self._fetcher()
+        self.assertEqual(fetcher.ttls, {"pods": 3600, "nodes": DAY})
+        self.assertEqual(fetcher.ttl, 3600)
+        self.assertTrue(fetcher.per_type_ttl)
+        self.assertEqual(
+            fetcher.evidence_path, "raw/test/cluster_resources_manifest.json"
+        )
+        self.assertEqual(
+            sorted(self.registered),
+            [
+                "raw/test/cluster_image_index.json",
+                "raw/test/cluster_resources_manifest.json",
+                "raw/test/cluster_resources_state.json",
+            ],
+        )
+        self.options["layout"] = "foo"
+        with self.assertRaises(ValueError):
+            self._fetcher()
+
+    def test_previous_snapshot(self):
+        """Ensure that stored clusters are provided as the previous snapshot."""
+        self.options = {"layout": "resource_type"}
+        fetcher = self._fetcher()
+        self.assertEqual(fetcher._get_previous_snapshot(), ({}, {}))
+        cluster = {"label": "a", "resources": {"pods": ["p"], "nodes": ["n"]}}
+        entry = fetcher._store_cluster(("a",), "Test cluster a", cluster)
+        self.assertEqual(
+            entry["resources"]["pods"]["evidence"],
+            "raw/test/cluster_resources_a_pods.json",
+        )
+        manifest = self.registered[fetcher.evidence_path]
+        manifest.set_content(json.dumps([entry]))
+        self.locker.add_evidence(manifest)
+        state = {"fetched": {"a": {"pods": 1}}}
+        fetcher._store_state(state)
+        previous, previous_state = fetcher._get_previous_snapshot()
+        self.assertEqual(previous, {"a": {"pods": ["p"], "nodes": ["n"]}})
+        self.assertEqual(previous_state, state)
+        self.assertEqual(
+            self.stored["raw/test/cluster_resources_a_nodes.json"].description,
+            "Test cluster a nodes",
+        )
+
+    def test_fresh_types(self):
+        """Ensure that previous resource types within their TTL are fresh."""
+        self.options = {"types": [{"name": "pods", "ttl": 3600}, "nodes"]}
+        fetcher = self._fetcher()
+        previous = {"pods": [], "nodes": []}
+        fetched = {"pods": time.time(), "nodes": time.time() - DAY}
+        self.assertEqual(fetcher._get_fresh_types(previous, fetched), {"pods"})
+        self.assertEqual(fetcher._get_fresh_types({}, fetched), set())
+        self.locker.forced_evidence = [fetcher.evidence_path]
+        self.assertEqual(fetcher._get_fresh_types(previous, fetched), set())
+
+    def test_evidence_names(self):
+        """Ensure that clusters with similar names do not share an evidence."""
+        self.options = {"layout": "cluster"}
+        fetcher = self._fetcher()
+        paths = {
+            fetcher._store_cluster(names, "Test cluster", {"resources": {}})["evidence"]
+            for names in [("prod.east",), ("prod_east",), ("a", "b.c"), ("a_b", "c")]
+        }
+        self.assertEqual(len(paths), 4)
+        self.assertIn("raw/test/cluster_resources_prod_east.json", paths)
+        self.options = {"layout": "resource_type"}
+        fetcher = self._fetcher()
+        resources = {"deployments.apps": [], "deployments_apps": []}
+        entry = fetcher._store_cluster(
+            ("a",), "Test cluster a", {"resources": resources}
+        )
+        self.assertEqual(len({r["evidence"] for r in entry["resources"].values()}), 2)
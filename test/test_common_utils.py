@@ -13,9 +13,25 @@
 # limitations under the License.
 """Arboretum common utilities tests."""
 
+import hashlib
+import io
+import json
 import unittest
+from unittest.mock import MagicMock, patch
 
-from arboretum.common.utils import parse_seconds
+from arboretum.common.utils import (
+    CADataAdapter,
+    StreamedObject,
+    TimeoutAdapter,
+    new_session,
+    parse_seconds,
+    store_raw_evidence_content,
+    to_evidence_name_part,
+    to_unique_evidence_name_part,
+    write_json,
+)
+
+import certifi
 
 
 class CommonUtilsTest(unittest.TestCase):
@@ -41,3 +57,113 @@ class CommonUtilsTest(unittest.TestCase):
         self.assertEqual(
             parse_seconds(123456), "1 day, 10 hours, 17 minutes, 36 seconds"
         )
+
+    def test_new_session(self):
+        """Ensure that a new session is returned with the expected headers."""
+        config = MagicMock()
+        config.raw_config = {"org": {"name": "My Org"}}
+        first = new_session(config, "https://foo.bar/", Accept="application/json")
+        second = new_session(config, "https://foo.bar/")
+        self.assertIsNot(first, second)
+        self.assertEqual(first.baseurl, "https://foo.bar")
+        self.assertEqual(first.headers["Accept"], "application/json")
+        self.assertEqual(first.headers["User-Agent"], "my-org-compliance-checks")
+        self.assertIsNone(
+            getattr(first.get_adapter("https://foo.bar"), "timeout", None)
+        )
+        timed = new_session(config, "https://foo.bar/", timeout=(5, 30))
+        self.assertEqual(timed.get_adapter("https://foo.bar").timeout, (5, 30))
+        self.assertEqual(timed.get_adapter("http://foo.bar").timeout, (5, 30))
+
+    def test_write_json(self):
+        """Ensure that streamed content is written as valid JSON."""
+        data = {
+            "foo": (i for i in range(3)),
+            "bar": StreamedObject((k, [k, None]) for k in ["x", "y"]),
+            "baz": [{"a": 1.5}, True, "text"],
+            "empty": iter([]),
+        }
+        fp = io.StringIO()
+        write_json(fp, data)
+        self.assertEqual(
+            json.loads(fp.getvalue()),
+            {
+                "foo": [0, 1, 2],
+                "bar": {"x": ["x", None], "y": ["y", None]},
+                "baz": [{"a": 1.5}, True, "text"],
+                "empty": [],
+            },
+        )
+
+    def test_write_json_consumes_lazily(self):
+        """Ensure that streamed elements are written as they are produced."""
+        fp = io.StringIO()
+        written = []
+
+        def _elements():
+            for i in range(3):
+                written.append(fp.getvalue())
+                yield i
+
+        write_json(fp, _elements())
+        self.assertEqual(written, ["[", "[0", "[0, 1"])
+
+    def test_store_raw_evidence_content(self):
+        """Ensure evidence is registered, stored and its hash returned."""
+        config = MagicMock()
+        config.get_evidence.return_value = None
+        locker = MagicMock()
+        digest = store_raw_evidence_content(
+            locker, config, "raw/foo/bar_baz.json", '{"b": 1, "a": 2}'
+        )
+        evidence = locker.add_evidence.call_args[0][0]
+        config.add_evidences.assert_called_once_with([evidence])
+        self.assertEqual(evidence.path, "raw/foo/bar_baz.json")
+        self.assertEqual(json.loads(evidence.content), {"a": 2, "b": 1})
+        self.assertEqual(digest, hashlib.sha256(evidence.content.encode()).hexdigest())
+
+    def test_to_evidence_name_part(self):
+        """Ensure unsafe characters are replaced in evidence names."""
+        self.assertEqual(to_evidence_name_part("dev-cluster_1"), "dev-cluster_1")
+        self.assertEqual(to_evidence_name_part("apps/v1/deploy.x"), "apps_v1_deploy_x")
+        self.assertEqual(to_evidence_name_part(" my cluster! "), "my_cluster")
+
+    def test_to_unique_evidence_name_part(self):
+        """Ensure converted evidence names are unique."""
+        self.assertEqual(to_unique_evidence_name_part("dev-cluster_1"), "dev-cluster_1")
+        self.assertEqual(to_unique_evidence_name_part("acct", "dev"), "acct_dev")
+        names = [
+            to_unique_evidence_name_part(*values)
+            for values in [
+                ("prod.east",),
+                ("prod_east",),
+                ("a", "b.c"),
+                ("a_b", "c"),
+                ("a", "b_c"),
+                ("a_",),
+                ("a", ""),
+            ]
+        ]
+        self.assertEqual(len(set(names)), len(names))
+        self.assertRegex(names[0], r"^prod_east_[0-9a-f]{8}$")
+
+    def test_ca_data_adapter(self):
+        """Ensure that in-memory CA certificates are used by the adapter."""
+        with open(certifi.where()) as f:
+            cadata = f.read()
+        adapter = CADataAdapter(cadata)
+        self.assertEqual(
+            adapter.poolmanager.connection_pool_kw["ssl_context"],
+            adapter.ssl_context,
+        )
+        self.assertGreater(adapter.ssl_context.cert_store_stats()["x509_ca"], 0)
+
+    def test_timeout_adapter(self):
+        """Ensure that the default timeout applies unless one is provided."""
+        adapter = TimeoutAdapter(timeout=(5, 30))
+        with patch("requests.adapters.HTTPAdapter.send") as send:
+            adapter.send(MagicMock(), timeout=None)
+            self.assertEqual(send.call_args[1]["timeout"], (5, 30))
+            adapter.send(MagicMock(), timeout=1)
+            self.assertEqual(send.call_args[1]["timeout"], 1)
+        self.assertEqual(CADataAdapter(certifi.contents(), timeout=2).timeout, 2)
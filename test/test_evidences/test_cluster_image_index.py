@@ -0,0 +1,54 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster image index evidence unit tests."""
+
+import json
+import unittest
+
+from arboretum.kubernetes.evidences.cluster_image_index import (
+    ClusterImageIndexEvidence,
+)
+
+
+class ClusterImageIndexEvidenceTest(unittest.TestCase):
+    """ClusterImageIndexEvidence unit tests."""
+
+    def test_no_content(self):
+        """Ensure properties requiring content return None when no content."""
+        evidence = ClusterImageIndexEvidence("cluster_image_index.json", "kubernetes")
+        self.assertIsNone(evidence.images)
+        self.assertIsNone(evidence.digests)
+
+    def test_get_references(self):
+        """Ensure references are found by image or digest."""
+        ref_a = {"cluster": "c1", "namespace": "ns", "pod": "p1", "container": "a"}
+        ref_b = {"cluster": "c1", "namespace": "ns", "pod": "p2", "container": "b"}
+        evidence = ClusterImageIndexEvidence("cluster_image_index.json", "kubernetes")
+        evidence.set_content(
+            json.dumps(
+                {
+                    "images": {
+                        "r/a:1": {"digests": ["sha256:1"], "references": [ref_a]},
+                        "r/a@sha256:1": {
+                            "digests": ["sha256:1"],
+                            "references": [ref_b],
+                        },
+                    },
+                    "digests": {"sha256:1": ["r/a:1", "r/a@sha256:1"]},
+                }
+            )
+        )
+        self.assertEqual(evidence.get_references("r/a:1"), [ref_a])
+        self.assertEqual(evidence.get_references("sha256:1"), [ref_a, ref_b])
+        self.assertEqual(evidence.get_references("r/x:1"), [])
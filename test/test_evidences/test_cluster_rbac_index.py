@@ -0,0 +1,51 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster RBAC index evidence unit tests."""
+
+import json
+import unittest
+
+from arboretum.kubernetes.evidences.cluster_rbac_index import ClusterRBACIndexEvidence
+
+
+class ClusterRBACIndexEvidenceTest(unittest.TestCase):
+    """ClusterRBACIndexEvidence unit tests."""
+
+    def test_no_content(self):
+        """Ensure properties requiring content return None when no content."""
+        evidence = ClusterRBACIndexEvidence("cluster_rbac_index.json", "kubernetes")
+        self.assertIsNone(evidence.index)
+
+    def test_lookups(self):
+        """Ensure permissions and subjects are looked up by cluster."""
+        evidence = ClusterRBACIndexEvidence("cluster_rbac_index.json", "kubernetes")
+        evidence.set_content(
+            json.dumps(
+                {
+                    "c1": {
+                        "User:alice": [["get", "secrets", "prod", "*"]],
+                        "User:bob": [["list", "secrets", "prod", "*"]],
+                    }
+                }
+            )
+        )
+        self.assertEqual(
+            evidence.get_permissions("c1", "User:alice"),
+            [["get", "secrets", "prod", "*"]],
+        )
+        self.assertEqual(evidence.get_permissions("c2", "User:alice"), [])
+        self.assertEqual(
+            evidence.who_can("c1", "get", "secrets", "prod"), ["User:alice"]
+        )
+        self.assertEqual(evidence.who_can("c1", "get", "secrets", "dev"), [])
@@ -0,0 +1,52 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster resources index evidence unit tests."""
+
+import json
+import unittest
+
+from arboretum.kubernetes.evidences.cluster_resources_index import (
+    ClusterResourcesIndexEvidence,
+)
+
+
+class ClusterResourcesIndexEvidenceTest(unittest.TestCase):
+    """ClusterResourcesIndexEvidence unit tests."""
+
+    def test_no_content(self):
+        """Ensure properties requiring content return None when no content."""
+        evidence = ClusterResourcesIndexEvidence(
+            "cluster_resources_index.json", "kubernetes"
+        )
+        self.assertIsNone(evidence.index)
+
+    def test_get_changes(self):
+        """Ensure changes are computed against a previous index."""
+        previous = ClusterResourcesIndexEvidence(
+            "cluster_resources_index.json", "kubernetes"
+        )
+        previous.set_content(
+            json.dumps({"c1": {"pods": {"u1": ["ns/p1", "1", "aaaa"]}}})
+        )
+        current = ClusterResourcesIndexEvidence(
+            "cluster_resources_index.json", "kubernetes"
+        )
+        current.set_content(
+            json.dumps({"c1": {"pods": {"u1": ["ns/p1", "2", "bbbb"]}}})
+        )
+        self.assertEqual(
+            current.get_changes(previous),
+            {"c1": {"pods": {"added": [], "removed": [], "changed": ["ns/p1"]}}},
+        )
+        self.assertEqual(current.get_changes(current), {})
@@ -0,0 +1,106 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cluster resources manifest evidence unit tests."""
+
+import hashlib
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from arboretum.kubernetes.evidences.cluster_resources_manifest import (
+    ClusterResourcesManifestEvidence,
+)
+
+from compliance.evidence import RawEvidence
+
+
+class ClusterResourcesManifestEvidenceTest(unittest.TestCase):
+    """ClusterResourcesManifestEvidence unit tests."""
+
+    def setUp(self):
+        """Initialize supporting test objects before each test."""
+        self.stored = {}
+        self.locker = MagicMock()
+        self.locker.get_evidence.side_effect = lambda path, **kw: self.stored[path]
+
+    def _store(self, path, data):
+        evidence = RawEvidence(path.rsplit("/", 1)[1], "kubernetes")
+        evidence.set_content(json.dumps(data))
+        self.stored[path] = evidence
+        digest = hashlib.sha256(evidence.content.encode()).hexdigest()
+        return {"evidence": path, "sha256": digest}
+
+    def _manifest(self, clusters):
+        evidence = ClusterResourcesManifestEvidence("manifest.json", "kubernetes")
+        evidence.set_content(json.dumps(clusters))
+        evidence.locker = self.locker
+        return evidence
+
+    def test_no_content(self):
+        """Ensure as_a_dict returns None when no content."""
+        evidence = ClusterResourcesManifestEvidence("manifest.json", "kubernetes")
+        self.assertIsNone(evidence.as_a_dict)
+
+    def test_cluster_layout(self):
+        """Ensure resources are loaded from the cluster evidence."""
+        resources = {"pods": [{"metadata": {"name": "p"}}], "nodes": []}
+        ref = self._store(
+            "raw/kubernetes/cluster_resources_c1.json",
+            {"label": "c1", "resources": resources},
+        )
+        evidence = self._manifest([{"label": "c1", **ref}])
+        cluster = evidence.as_a_dict[0]
+        self.assertEqual(evidence.get_resources(cluster), resources)
+        self.assertEqual(evidence.get_resources(cluster, "pods"), resources["pods"])
+        self.assertEqual(evidence.get_resources(cluster, "secrets"), [])
+
+    def test_resource_type_layout(self):
+        """Ensure only the evidence of the requested resource type is loaded."""
+        pods = [{"metadata": {"name": "p"}}]
+        refs = {
+            "pods": self._store("raw/kubernetes/cluster_resources_c1_pods.json", pods),
+            "nodes": self._store("raw/kubernetes/cluster_resources_c1_nodes.json", []),
+        }
+        evidence = self._manifest([{"label": "c1", "resources": refs}])
+        cluster = evidence.as_a_dict[0]
+        self.assertEqual(evidence.get_resources(cluster, "pods"), pods)
+        self.locker.get_evidence.assert_called_once_with(
+            "raw/kubernetes/cluster_resources_c1_pods.json", ignore_ttl=False
+        )
+        self.assertEqual(evidence.get_resources(cluster, "secrets"), [])
+        self.assertEqual(
+            evidence.get_resources(cluster, ignore_ttl=True),
+            {"pods": pods, "nodes": []},
+        )
+
+    def test_hash_mismatch(self):
+        """Ensure evidence not matching the manifest hash is rejected."""
+        ref = self._store("raw/kubernetes/cluster_resources_c1_pods.json", [])
+        self.stored[ref["evidence"]].set_content(json.dumps([{"changed": True}]))
+        evidence = self._manifest([{"label": "c1", "resources": {"pods": ref}}])
+        with self.assertRaises(ValueError):
+            evidence.get_resources(evidence.as_a_dict[0], "pods")
+
+    def test_get_evidence(self):
+        """Ensure referenced evidence can be provided by the caller."""
+        pods = [{"metadata": {"name": "p"}}]
+        ref = self._store("raw/kubernetes/cluster_resources_c1_pods.json", pods)
+        evidence = self._manifest([{"label": "c1", "resources": {"pods": ref}}])
+        get_evidence = MagicMock(side_effect=self.stored.get)
+        self.assertEqual(
+            evidence.get_resources(evidence.as_a_dict[0], get_evidence=get_evidence),
+            {"pods": pods},
+        )
+        get_evidence.assert_called_once_with(ref["evidence"])
+        self.locker.get_evidence.assert_not_called()
@@ -16,8 +16,11 @@
 import unittest
 from unittest.mock import MagicMock, patch
 
-from arboretum.common.iam_ibm_utils import get_tokens
-from arboretum.common.ibm_constants import IAM_API_KEY_GRANT_TYPE
+from arboretum.common.iam_ibm_utils import TOKEN_CACHE, get_tokens
+from arboretum.common.ibm_constants import (
+    IAM_API_KEY_GRANT_TYPE,
+    IAM_REFRESH_TOKEN_GRANT_TYPE,
+)
 
 from requests import HTTPError
 
@@ -27,6 +30,7 @@ class IAMIBMTest(unittest.TestCase):
 
     def setUp(self):
         """Initialize supporting test objects before each test."""
+        TOKEN_CACHE.clear()
         self.post_patcher = patch("requests.post")
         self.mock_post = self.post_patcher.start()
         mock_resp = MagicMock()
@@ -74,3 +78,39 @@ class IAMIBMTest(unittest.TestCase):
             self.mock_raise_for_status.assert_called_once()
             self.mock_json.assert_not_called()
         self.assertEqual(str(cm.exception), "boom!")
+
+    def test_get_tokens_cached(self):
+        """Ensure tokens are cached until they are due to expire."""
+        self.mock_json.return_value = {
+            "access_token": "foo",
+            "refresh_token": "bar",
+            "expires_in": 3600,
+        }
+        self.assertEqual(get_tokens("meh_api_key"), ("foo", "bar"))
+        self.assertEqual(get_tokens("meh_api_key"), ("foo", "bar"))
+        self.mock_post.assert_called_once()
+        get_tokens("other_api_key")
+        self.assertEqual(self.mock_post.call_count, 2)
+
+    @patch("arboretum.common.token_cache.time.time")
+    def test_get_tokens_refresh(self, mock_time):
+        """Ensure tokens due to expire are refreshed with the refresh token."""
+        mock_time.return_value = 1000
+        self.mock_json.return_value = {
+            "access_token": "foo",
+            "refresh_token": "bar",
+            "expires_in": 3600,
+        }
+        with patch("arboretum.common.iam_ibm_utils.time.time", return_value=1000):
+            get_tokens("meh_api_key")
+        mock_time.return_value = 1000 + 3600 - 60
+        self.mock_json.return_value = {
+            "access_token": "baz",
+            "refresh_token": "qux",
+            "expires_in": 3600,
+        }
+        self.assertEqual(get_tokens("meh_api_key"), ("baz", "qux"))
+        self.assertEqual(
+            self.mock_post.call_args[1]["data"],
+            f"grant_type={IAM_REFRESH_TOKEN_GRANT_TYPE}&refresh_token=bar",
+        )
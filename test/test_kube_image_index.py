@@ -0,0 +1,72 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum Kubernetes container image index tests."""
+
+import unittest
+
+from arboretum.common.kube_image_index import ImageIndex
+
+
+class ImageIndexTest(unittest.TestCase):
+    """Arboretum Kubernetes container image index tests."""
+
+    def test_add(self):
+        """Ensure that images are indexed with digests and references."""
+        index = ImageIndex()
+        index.add(
+            [
+                _pod(
+                    "p2", {"main": "r/a:1"}, {"main": "docker-pullable://r/a@sha256:1"}
+                ),
+                _pod("p1", {"main": "r/a:1", "side": "r/b@sha256:2"}),
+                {"metadata": {"name": "cm"}, "data": {}},
+                {"cells": {"Name": "p3"}, "metadata": {"name": "p3"}},
+            ],
+            cluster="c1",
+        )
+        index.add([_pod("p1", {"main": "r/a:1"})], cluster="c0")
+        content = index.as_dict()
+        self.assertEqual(list(content["images"]), ["r/a:1", "r/b@sha256:2"])
+        self.assertEqual(content["images"]["r/a:1"]["digests"], ["sha256:1"])
+        self.assertEqual(
+            [
+                (r["cluster"], r["pod"], r["container"])
+                for r in content["images"]["r/a:1"]["references"]
+            ],
+            [("c0", "p1", "main"), ("c1", "p1", "main"), ("c1", "p2", "main")],
+        )
+        self.assertEqual(
+            content["digests"], {"sha256:1": ["r/a:1"], "sha256:2": ["r/b@sha256:2"]}
+        )
+
+    def test_init_containers(self):
+        """Ensure that init and ephemeral container images are indexed."""
+        pod = _pod("p1", {"main": "r/a:1"})
+        pod["spec"]["initContainers"] = [{"name": "init", "image": "r/i:1"}]
+        pod["spec"]["ephemeralContainers"] = [{"name": "debug", "image": "r/d:1"}]
+        index = ImageIndex()
+        index.add([pod])
+        self.assertEqual(sorted(index.as_dict()["images"]), ["r/a:1", "r/d:1", "r/i:1"])
+
+
+def _pod(name, images, image_ids=None):
+    return {
+        "metadata": {"name": name, "namespace": "ns1"},
+        "spec": {"containers": [{"name": c, "image": i} for c, i in images.items()]},
+        "status": {
+            "containerStatuses": [
+                {"name": c, "imageID": i} for c, i in (image_ids or {}).items()
+            ]
+        },
+    }
@@ -0,0 +1,83 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum Kubernetes object index tests."""
+
+import unittest
+
+from arboretum.common.kube_object_index import (
+    HASH_LENGTH,
+    ObjectIndex,
+    diff_object_indexes,
+)
+
+
+class ObjectIndexTest(unittest.TestCase):
+    """Arboretum Kubernetes object index tests."""
+
+    def test_add(self):
+        """Ensure that objects are indexed by uid, or namespace and name."""
+        index = ObjectIndex()
+        index.add("c1", "pods", [_object("p1", "ns", uid="u1", rv="5")])
+        index.add("c1", "nodes", [_object("n1", rv=None)])
+        index.add("c0", "nodes", [])
+        content = index.as_dict()
+        self.assertEqual(list(content), ["c0", "c1"])
+        self.assertEqual(list(content["c1"]), ["nodes", "pods"])
+        name, version, digest = content["c1"]["pods"]["u1"]
+        self.assertEqual((name, version), ("ns/p1", "5"))
+        self.assertEqual(len(digest), HASH_LENGTH)
+        self.assertEqual(content["c1"]["nodes"]["n1"][:2], ["n1", None])
+
+    def test_hash_ignores_key_order(self):
+        """Ensure that the content hash does not depend on key order."""
+        index = ObjectIndex()
+        index.add("c1", "a", [{"metadata": {"name": "x"}, "data": {"k": 1, "l": 2}}])
+        index.add("c1", "b", [{"data": {"l": 2, "k": 1}, "metadata": {"name": "x"}}])
+        content = index.as_dict()["c1"]
+        self.assertEqual(content["a"], content["b"])
+
+    def test_diff(self):
+        """Ensure that added, removed and changed objects are found."""
+        before, after = ObjectIndex(), ObjectIndex()
+        before.add(
+            "c1",
+            "pods",
+            [_object("p1", uid="u1"), _object("p2", uid="u2"), _object("p3", uid="u3")],
+        )
+        after.add(
+            "c1",
+            "pods",
+            [
+                _object("p1", uid="u1"),
+                _object("p2", uid="u2", rv="2"),
+                _object("p4", uid="u4"),
+            ],
+        )
+        before.add("c1", "nodes", [_object("n1")])
+        after.add("c1", "nodes", [_object("n1")])
+        after.add("c1", "secrets", [_object("s1")])
+        after.add("c2", "pods", [_object("p1")])
+        self.assertEqual(
+            diff_object_indexes(before.as_dict(), after.as_dict()),
+            {"c1": {"pods": {"added": ["p4"], "removed": ["p3"], "changed": ["p2"]}}},
+        )
+
+
+def _object(name, namespace=None, uid=None, rv="1"):
+    metadata = {"name": name, "resourceVersion": rv}
+    if namespace:
+        metadata["namespace"] = namespace
+    if uid:
+        metadata["uid"] = uid
+    return {"metadata": metadata, "spec": {}}
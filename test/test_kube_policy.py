@@ -0,0 +1,124 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum Kubernetes policy engine tests."""
+
+import unittest
+
+from arboretum.common.kube_policy import (
+    FAILURE,
+    PolicyEngine,
+    PolicyObject,
+    RULES,
+    WARNING,
+    rule,
+)
+
+
+class PolicyEngineTest(unittest.TestCase):
+    """Arboretum Kubernetes policy engine tests."""
+
+    def test_pod_spec(self):
+        """Ensure that pod specs are found in pods and workload templates."""
+        pod_spec = {"containers": [{"name": "main", "image": "r/a:1"}]}
+        deployment = {"spec": {"template": {"spec": pod_spec}}}
+        cronjob = {"spec": {"jobTemplate": {"spec": {"template": {"spec": pod_spec}}}}}
+        for item in ({"spec": pod_spec}, deployment, cronjob):
+            self.assertIs(PolicyObject("c1", "t", item).pod_spec, pod_spec)
+        self.assertIsNone(PolicyObject("c1", "t", {"spec": {"podCIDR": "x"}}).pod_spec)
+        self.assertEqual(PolicyObject("c1", "t", {}).containers, [])
+
+    def test_built_in_rules(self):
+        """Ensure that the built-in rules report their findings."""
+        engine = PolicyEngine()
+        engine.evaluate(
+            "c1",
+            "deployments",
+            [
+                _workload(
+                    "d1",
+                    {
+                        "name": "main",
+                        "image": "r/a",
+                        "securityContext": {"privileged": True},
+                        "resources": {"limits": {"cpu": "1"}},
+                    },
+                    volumes=[{"name": "v", "hostPath": {"path": "/var"}}],
+                ),
+                _workload(
+                    "d2",
+                    {
+                        "name": "main",
+                        "image": "r:5000/a@sha256:1",
+                        "resources": {"limits": {"cpu": "1", "memory": "1Gi"}},
+                    },
+                ),
+            ],
+        )
+        failures = {r.name: f for r, f in engine.get_findings(FAILURE).items()}
+        warnings = {r.name: f for r, f in engine.get_findings(WARNING).items()}
+        self.assertEqual(
+            failures["privileged_container"],
+            [
+                {
+                    "cluster": "c1",
+                    "resource_type": "deployments",
+                    "namespace": "ns",
+                    "name": "d1",
+                    "container": "main",
+                }
+            ],
+        )
+        self.assertEqual(failures["host_path_volume"][0]["path"], "/var")
+        self.assertEqual(warnings["missing_resource_limits"][0]["missing"], ["memory"])
+        self.assertEqual([f["name"] for f in warnings["latest_image_tag"]], ["d1"])
+
+    def test_rule_selection(self):
+        """Ensure that only selected rules run and namespaces are excluded."""
+        with self.assertRaises(ValueError):
+            PolicyEngine(["no_such_rule"])
+        engine = PolicyEngine(["latest_image_tag"], exclude_namespaces=["kube"])
+        privileged = {"name": "c", "securityContext": {"privileged": True}}
+        engine.evaluate("c1", "pods", [_pod("p1", {**privileged, "image": "a"})])
+        engine.evaluate("c1", "pods", [_pod("p2", {"image": "a"}, namespace="kube")])
+        self.assertEqual(engine.get_findings(FAILURE), {})
+        self.assertEqual(
+            [f["name"] for f in engine.findings["latest_image_tag"]], ["p1"]
+        )
+
+    def test_register_rule(self):
+        """Ensure that rules can be registered once by name."""
+
+        @rule("test_no_labels", "Objects without labels", WARNING)
+        def no_labels(obj):
+            if not obj.item["metadata"].get("labels"):
+                yield "No labels"
+
+        self.addCleanup(RULES.pop, "test_no_labels")
+        with self.assertRaises(ValueError):
+            rule("test_no_labels", "Duplicate")(no_labels)
+        engine = PolicyEngine(["test_no_labels"])
+        engine.evaluate("c1", "configmaps", [{"metadata": {"name": "cm"}}])
+        self.assertEqual(engine.findings["test_no_labels"][0]["details"], "No labels")
+
+
+def _pod(name, *containers, namespace="ns", volumes=None):
+    spec = {"containers": list(containers)}
+    if volumes:
+        spec["volumes"] = volumes
+    return {"metadata": {"name": name, "namespace": namespace}, "spec": spec}
+
+
+def _workload(name, *containers, volumes=None):
+    pod = _pod(name, *containers, volumes=volumes)
+    return {"metadata": pod["metadata"], "spec": {"template": {"spec": pod["spec"]}}}
@@ -0,0 +1,102 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum Kubernetes cluster resource policy check tests."""
+
+import hashlib
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from arboretum.kubernetes.checks import test_cluster_resource_policies as policies
+
+from compliance.config import get_config
+from compliance.evidence import RawEvidence
+
+ERRORS_ENTRY = {"errors": [{"error": "HTTPError: 500 Server Error"}]}
+
+POD = {
+    "metadata": {"name": "p", "namespace": "n"},
+    "spec": {
+        "containers": [
+            {"name": "c", "image": "x:1", "securityContext": {"privileged": True}}
+        ]
+    },
+}
+
+
+class ClusterResourcePolicyCheckTest(unittest.TestCase):
+    """Arboretum Kubernetes cluster resource policy check tests."""
+
+    def setUp(self):
+        """Initialize test objects."""
+        self.stored = {}
+        self.locker = MagicMock()
+        self.locker.get_evidence.side_effect = lambda path, **kw: self.stored[path]
+        self.addCleanup(self._forget)
+
+    def _forget(self):
+        for path in self.stored:
+            get_config()._evidence_cache.pop(path, None)
+
+    def _store(self, name, data):
+        evidence = RawEvidence(name, "ibm_cloud")
+        evidence.set_content(json.dumps(data))
+        self.stored[evidence.path] = evidence
+        digest = hashlib.sha256(evidence.content.encode()).hexdigest()
+        return {"evidence": evidence.path, "sha256": digest}
+
+    def _run(self, path):
+        check = policies.ClusterResourcePolicyCheck("test_cluster_resource_policies")
+        check.config = MagicMock()
+        check.config.get = lambda key, default=None: (
+            [path] if key.endswith(".evidence") else default
+        )
+        check.locker = self.locker
+        check.test_cluster_resource_policies()
+        return check
+
+    def _assert_findings(self, check):
+        self.assertEqual(
+            check.failures["Accounts not listed"],
+            [{"cluster": "a1/*", "error": "HTTPError: 500 Server Error"}],
+        )
+        self.assertEqual(
+            [f["cluster"] for f in check.failures["Privileged containers"]],
+            ["a2/c1"],
+        )
+
+    def test_account_errors_single(self):
+        """Ensure account errors entries are reported as failures."""
+        self._store(
+            "cluster_resources.json",
+            {
+                "a1": [ERRORS_ENTRY],
+                "a2": [{"id": "1", "name": "c1", "resources": {"pods": [POD]}}],
+            },
+        )
+        self._assert_findings(self._run("raw/ibm_cloud/cluster_resources.json"))
+
+    def test_account_errors_manifest(self):
+        """Ensure account errors entries of a manifest are reported as failures."""
+        ref = self._store("cluster_resources_a2_c1_pods.json", [POD])
+        self._store(
+            "cluster_resources_manifest.json",
+            {
+                "a1": [ERRORS_ENTRY],
+                "a2": [{"id": "1", "name": "c1", "resources": {"pods": ref}}],
+            },
+        )
+        self._assert_findings(
+            self._run("raw/ibm_cloud/cluster_resources_manifest.json")
+        )
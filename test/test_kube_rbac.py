@@ -0,0 +1,187 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum Kubernetes RBAC permission index tests."""
+
+import unittest
+
+from arboretum.common.kube_constants import RBAC_API_VERSION
+from arboretum.common.kube_rbac import allows, build_permission_index, who_can
+
+RESOURCES = {
+    f"{RBAC_API_VERSION}/clusterroles": [
+        {
+            "metadata": {"name": "view"},
+            "aggregationRule": {
+                "clusterRoleSelectors": [{"matchLabels": {"aggregate-to-view": "true"}}]
+            },
+            "rules": [],
+        },
+        {
+            "metadata": {"name": "view-pods", "labels": {"aggregate-to-view": "true"}},
+            "rules": [{"apiGroups": [""], "resources": ["pods"], "verbs": ["get"]}],
+        },
+        {
+            "metadata": {
+                "name": "view-deploy",
+                "labels": {"aggregate-to-view": "true"},
+            },
+            "rules": [
+                {"apiGroups": ["apps"], "resources": ["deployments"], "verbs": ["get"]}
+            ],
+        },
+        {
+            "metadata": {"name": "admin"},
+            "rules": [
+                {"apiGroups": ["*"], "resources": ["*"], "verbs": ["*"]},
+                {"nonResourceURLs": ["/metrics*"], "verbs": ["get"]},
+            ],
+        },
+    ],
+    f"{RBAC_API_VERSION}/roles": [
+        {
+            "metadata": {"name": "secret-reader", "namespace": "prod"},
+            "rules": [
+                {
+                    "apiGroups": [""],
+                    "resources": ["secrets"],
+                    "verbs": ["get", "list"],
+                    "resourceNames": ["db"],
+                }
+            ],
+        }
+    ],
+    f"{RBAC_API_VERSION}/clusterrolebindings": [
+        {
+            "metadata": {"name": "admins"},
+            "roleRef": {"kind": "ClusterRole", "name": "admin"},
+            "subjects": [{"kind": "Group", "name": "admins"}],
+        }
+    ],
+    f"{RBAC_API_VERSION}/rolebindings": [
+        {
+            "metadata": {"name": "viewers", "namespace": "dev"},
+            "roleRef": {"kind": "ClusterRole", "name": "view"},
+            "subjects": [{"kind": "User", "name": "alice"}],
+        },
+        {
+            "metadata": {"name": "db", "namespace": "prod"},
+            "roleRef": {"kind": "Role", "name": "secret-reader"},
+            "subjects": [{"kind": "ServiceAccount", "name": "app"}],
+        },
+        {
+            "metadata": {"name": "missing", "namespace": "prod"},
+            "roleRef": {"kind": "Role", "name": "no-such-role"},
+            "subjects": [{"kind": "User", "name": "bob"}],
+        },
+    ],
+}
+
+
+class PermissionIndexTest(unittest.TestCase):
+    """Arboretum Kubernetes RBAC permission index tests."""
+
+    def test_build_permission_index(self):
+        """Ensure that bindings are expanded with aggregated cluster roles."""
+        index = build_permission_index(RESOURCES)
+        self.assertEqual(
+            list(index), ["Group:admins", "ServiceAccount:prod/app", "User:alice"]
+        )
+        self.assertEqual(
+            index["User:alice"],
+            [["get", "deployments.apps", "dev", "*"], ["get", "pods", "dev", "*"]],
+        )
+        self.assertEqual(
+            index["ServiceAccount:prod/app"],
+            [["get", "secrets", "prod", "db"], ["list", "secrets", "prod", "db"]],
+        )
+        self.assertIn(["get", "/metrics*", "*", "*"], index["Group:admins"])
+
+    def test_who_can(self):
+        """Ensure that subjects are found with wildcard permissions."""
+        index = build_permission_index(RESOURCES)
+        self.assertEqual(
+            who_can(index, "get", "secrets", "prod", "db"),
+            ["Group:admins", "ServiceAccount:prod/app"],
+        )
+        self.assertEqual(who_can(index, "get", "secrets", "prod"), ["Group:admins"])
+        self.assertEqual(
+            who_can(index, "get", "deployments.apps", "dev"),
+            ["Group:admins", "User:alice"],
+        )
+        self.assertEqual(who_can(index, "get", "pods"), ["Group:admins"])
+        self.assertEqual(who_can(index, "get", "/metrics/cadvisor"), ["Group:admins"])
+
+    def test_allows(self):
+        """Ensure that resource and group wildcards are matched."""
+        self.assertTrue(allows(["*", "*", "*", "*"], "get", "pods", "ns"))
+        self.assertTrue(allows(["get", "*", "*", "*"], "get", "pods"))
+        self.assertFalse(allows(["get", "*", "*", "*"], "get", "deployments.apps"))
+        self.assertTrue(
+            allows(["get", "*.apps", "ns", "*"], "get", "deployments.apps", "ns")
+        )
+        self.assertFalse(allows(["get", "pods", "ns", "*"], "get", "pods"))
+        self.assertFalse(allows(["get", "pods", "*", "*"], "get", "pods/log"))
+
+    def test_namespace_admin(self):
+        """Ensure that a namespaced cluster-admin binding stays namespaced."""
+        cluster_admin = {
+            "metadata": {"name": "cluster-admin"},
+            "rules": [
+                {"apiGroups": ["*"], "resources": ["*"], "verbs": ["*"]},
+                {"nonResourceURLs": ["*"], "verbs": ["*"]},
+            ],
+        }
+        index = build_permission_index(
+            {
+                f"{RBAC_API_VERSION}/clusterroles": [cluster_admin],
+                f"{RBAC_API_VERSION}/rolebindings": [
+                    {
+                        "metadata": {"name": "team-admin", "namespace": "team-x"},
+                        "roleRef": {"kind": "ClusterRole", "name": "cluster-admin"},
+                        "subjects": [{"kind": "User", "name": "alice"}],
+                    }
+                ],
+            }
+        )
+        self.assertEqual(index["User:alice"], [["*", "*.*", "team-x", "*"]])
+        self.assertEqual(who_can(index, "get", "secrets", "team-x"), ["User:alice"])
+        self.assertEqual(who_can(index, "get", "secrets", "prod"), [])
+        self.assertEqual(who_can(index, "list", "nodes"), [])
+        self.assertEqual(who_can(index, "get", "/healthz"), [])
+
+    def test_non_resource_url_wildcard(self):
+        """Ensure that the non-resource URL wildcard only matches URLs."""
+        index = build_permission_index(
+            {
+                f"{RBAC_API_VERSION}/clusterroles": [
+                    {
+                        "metadata": {"name": "urls"},
+                        "rules": [{"nonResourceURLs": ["*"], "verbs": ["get"]}],
+                    }
+                ],
+                f"{RBAC_API_VERSION}/clusterrolebindings": [
+                    {
+                        "metadata": {"name": "urls"},
+                        "roleRef": {"kind": "ClusterRole", "name": "urls"},
+                        "subjects": [{"kind": "Group", "name": "probes"}],
+                    }
+                ],
+            }
+        )
+        self.assertEqual(index["Group:probes"], [["get", "/*", "*", "*"]])
+        self.assertEqual(who_can(index, "get", "/healthz"), ["Group:probes"])
+        self.assertEqual(who_can(index, "get", "nodes"), [])
+        self.assertEqual(who_can(index, "get", "secrets", "prod"), [])
+        self.assertFalse(allows(["get", "/*", "*", "*"], "get", "pods", "ns"))
+        self.assertFalse(allows(["*", "*", "*", "*"], "get", "/healthz"))
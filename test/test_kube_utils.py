@@ -13,10 +13,25 @@
 # limitations under the License.
 """Arboretum Kubernetes common utility module tests."""
 
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
-from arboretum.common.kube_utils import get_cluster_resources
+from arboretum.common.kube_utils import (
+    DiscoveryCache,
+    get_cluster_resources,
+    get_fresh_resource_types,
+    get_resource_type_ttls,
+    iter_cluster_resources,
+    list_resources,
+    project_item,
+    watch_resources,
+)
 
 from requests import HTTPError
 
@@ -28,7 +43,7 @@ class KubernetesUtilTest(unittest.TestCase):
         """Initialize test objects."""
         self.session = MagicMock()
         self.resp = MagicMock()
-        self.data = {"foo", "bar"}
+        self.data = ["foo", "bar"]
         self.resp.json = MagicMock(return_value={"items": self.data})
 
     def test_get_cluster_resources_success_core_api(self):
@@ -41,7 +56,7 @@ class KubernetesUtilTest(unittest.TestCase):
             self.session, "", [resource_type], verify=verify
         )
         self.session.get.assert_called_once_with(
-            f"api/v1/{resource_type}", verify=verify
+            f"api/v1/{resource_type}", params={"limit": 500}, verify=verify
         )
         self.resp.raise_for_status.assert_called_once()
         self.assertEqual(resources, {resource_type: self.data})
@@ -55,7 +70,9 @@ class KubernetesUtilTest(unittest.TestCase):
         resources = get_cluster_resources(
             self.session, "", [resource_type], verify=verify
         )
-        self.session.get.assert_called_once_with(f"apis/{resource_type}", verify=verify)
+        self.session.get.assert_called_once_with(
+            f"apis/{resource_type}", params={"limit": 500}, verify=verify
+        )
         self.resp.raise_for_status.assert_called_once()
         self.assertEqual(resources, {resource_type: self.data})
 
@@ -69,7 +86,9 @@ class KubernetesUtilTest(unittest.TestCase):
         resources = get_cluster_resources(
             self.session, "", resource_types, verify=verify
         )
-        self.session.get.assert_called_once_with("api/v1/r1", verify=verify)
+        self.session.get.assert_called_once_with(
+            "api/v1/r1", params={"limit": 500}, verify=verify
+        )
         self.resp.raise_for_status.assert_called_once()
         self.assertEqual(resources, {})
 
@@ -82,3 +101,616 @@ class KubernetesUtilTest(unittest.TestCase):
         verify = True
         with self.assertRaises(HTTPError):
             get_cluster_resources(self.session, "", resource_types, verify=verify)
+
+    def test_get_cluster_resources_paging_disabled(self):
+        """Ensure that the limit parameter is omitted when paging is disabled."""
+        self.resp.raise_for_status = MagicMock()
+        self.session.get = MagicMock(return_value=self.resp)
+        resources = get_cluster_resources(self.session, "", ["r1"], page_size=0)
+        self.session.get.assert_called_once_with("api/v1/r1", params={}, verify=True)
+        self.assertEqual(resources, {"r1": self.data})
+
+    def test_list_resources_pages(self):
+        """Ensure that all pages of a list are retrieved."""
+        page1 = MagicMock()
+        page1.json = MagicMock(
+            return_value={"items": ["foo"], "metadata": {"continue": "c1"}}
+        )
+        page2 = MagicMock()
+        page2.json = MagicMock(return_value={"items": ["bar"], "metadata": {}})
+        self.session.get = MagicMock(side_effect=[page1, page2])
+        items = list_resources(self.session, "api/v1/r1", page_size=1)
+        self.assertEqual(items, ["foo", "bar"])
+        self.assertEqual(self.session.get.call_count, 2)
+        self.session.get.assert_called_with(
+            "api/v1/r1", params={"limit": 1, "continue": "c1"}, verify=True
+        )
+
+    def test_list_resources_expired_continue(self):
+        """Ensure that a list is restarted when its continue token expires."""
+        page1 = MagicMock()
+        page1.json = MagicMock(
+            return_value={"items": ["foo"], "metadata": {"continue": "c1"}}
+        )
+        gone = MagicMock()
+        gone.status_code = 410
+        gone.raise_for_status = MagicMock(side_effect=HTTPError())
+        page2 = MagicMock()
+        page2.json = MagicMock(return_value={"items": ["foo", "bar"]})
+        self.session.get = MagicMock(side_effect=[page1, gone, page2])
+        items = list_resources(self.session, "api/v1/r1", page_size=1)
+        self.assertEqual(items, ["foo", "bar"])
+        self.assertEqual(self.session.get.call_count, 3)
+        self.session.get.assert_called_with(
+            "api/v1/r1", params={"limit": 1}, verify=True
+        )
+
+    def test_list_resources_expired_continue_retries_exhausted(self):
+        """Ensure that a list is not restarted indefinitely."""
+        page1 = MagicMock()
+        page1.json = MagicMock(
+            return_value={"items": ["foo"], "metadata": {"continue": "c1"}}
+        )
+        gone = MagicMock()
+        gone.status_code = 410
+        gone.raise_for_status = MagicMock(side_effect=HTTPError())
+        self.session.get = MagicMock(side_effect=[page1, gone] * 4)
+        with self.assertRaises(HTTPError):
+            list_resources(self.session, "api/v1/r1", page_size=1)
+        self.assertEqual(self.session.get.call_count, 8)
+
+    def test_get_cluster_resources_concurrent(self):
+        """Ensure that concurrent retrieval keeps the resource type order."""
+        responses = {}
+        for resource_type in ["r1", "r2", "r3"]:
+            resp = MagicMock()
+            resp.json = MagicMock(return_value={"items": [resource_type]})
+            responses[f"api/v1/{resource_type}"] = resp
+        responses["api/v1/r2"].status_code = 404
+        responses["api/v1/r2"].raise_for_status = MagicMock(side_effect=HTTPError())
+        self.session.get = MagicMock(side_effect=lambda url, **kw: responses[url])
+        resources = get_cluster_resources(
+            self.session, "", ["r3", "r2", "r1"], max_workers=3
+        )
+        self.assertEqual(list(resources.items()), [("r3", ["r3"]), ("r1", ["r1"])])
+
+    def test_get_cluster_resources_limiter(self):
+        """Ensure that a shared limiter bounds the requests in flight."""
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def _get(url, **kwargs):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(url)
+            resp = MagicMock()
+            name = url.rsplit("/", 1)[-1]
+            if name == "namespaces":
+                items = [{"metadata": {"name": n}} for n in ["ns1", "ns2", "ns3"]]
+            else:
+                items = [name]
+            resp.json = MagicMock(return_value={"items": items})
+            return resp
+
+        self.session.get = MagicMock(side_effect=_get)
+        resources = get_cluster_resources(
+            self.session,
+            "",
+            [{"name": "r1", "namespace_sharding": True}, "r2", "r3"],
+            max_workers=3,
+            namespace_workers=3,
+            limiter=threading.BoundedSemaphore(2),
+        )
+        self.assertEqual(
+            resources, {"r1": ["r1", "r1", "r1"], "r2": ["r2"], "r3": ["r3"]}
+        )
+        self.assertEqual(max(peak), 2)
+
+    def test_iter_cluster_resources_lazy(self):
+        """Ensure that resource lists are only retrieved when consumed."""
+        self.session.get = MagicMock(return_value=self.resp)
+        resources = iter_cluster_resources(self.session, "", ["r1", "r2"])
+        self.session.get.assert_not_called()
+        self.assertEqual(next(resources), ("r1", self.data))
+        self.session.get.assert_called_once()
+        self.assertEqual(next(resources), ("r2", self.data))
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_get_cluster_resources_resource_versions(self):
+        """Ensure that list resource versions are returned."""
+        self.resp.json = MagicMock(
+            return_value={"items": self.data, "metadata": {"resourceVersion": "9"}}
+        )
+        self.session.get = MagicMock(return_value=self.resp)
+        versions = {}
+        get_cluster_resources(self.session, "", ["r1"], resource_versions=versions)
+        self.assertEqual(versions, {"r1": "9"})
+
+    def test_watch_resources(self):
+        """Ensure that watched changes are applied to the previous items."""
+        events = [
+            {"type": "ADDED", "object": _obj("c", "11", "ns2")},
+            {"type": "MODIFIED", "object": _obj("a", "12", "ns1")},
+            {"type": "DELETED", "object": _obj("b", "13", "ns1")},
+            {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "15"}}},
+        ]
+        self.resp.iter_lines = MagicMock(
+            return_value=[json.dumps(e).encode() for e in events]
+        )
+        self.session.get = MagicMock(return_value=self.resp)
+        previous = [_obj("a", "1", "ns1"), _obj("b", "2", "ns1")]
+        items, version = watch_resources(self.session, "api/v1/r1", previous, "10")
+        self.assertEqual(items, [_obj("a", "12", "ns1"), _obj("c", "11", "ns2")])
+        self.assertEqual(version, "15")
+        self.session.get.assert_called_once_with(
+            "api/v1/r1",
+            params={
+                "watch": 1,
+                "resourceVersion": "10",
+                "timeoutSeconds": 5,
+                "allowWatchBookmarks": "true",
+            },
+            verify=True,
+            stream=True,
+        )
+
+    def test_get_cluster_resources_watch_expired(self):
+        """Ensure that an expired resource version falls back to a full list."""
+        watch_resp = MagicMock()
+        expired = {"type": "ERROR", "object": {"code": 410, "message": "too old"}}
+        watch_resp.iter_lines = MagicMock(return_value=[json.dumps(expired)])
+        self.resp.json = MagicMock(
+            return_value={"items": self.data, "metadata": {"resourceVersion": "20"}}
+        )
+        self.session.get = MagicMock(side_effect=[watch_resp, self.resp])
+        versions = {"r1": "10"}
+        resources = get_cluster_resources(
+            self.session,
+            "",
+            ["r1"],
+            resource_versions=versions,
+            previous={"r1": [_obj("a", "1")]},
+        )
+        self.assertEqual(resources, {"r1": self.data})
+        self.assertEqual(versions, {"r1": "20"})
+        self.session.get.assert_called_with(
+            "api/v1/r1", params={"limit": 500}, verify=True
+        )
+
+    def test_get_cluster_resources_projection(self):
+        """Ensure that items are projected as they are decoded."""
+        item = {
+            "metadata": {
+                "name": "a",
+                "managedFields": [],
+                "annotations": {
+                    "kubectl.kubernetes.io/last-applied-configuration": "{}",
+                    "foo": "bar",
+                },
+            },
+            "spec": {"foo": "bar"},
+            "status": {"foo": "bar"},
+        }
+        self.resp.json = MagicMock(side_effect=lambda: {"items": [_json_copy(item)]})
+        self.session.get = MagicMock(return_value=self.resp)
+        resources = get_cluster_resources(
+            self.session, "", ["r1", {"name": "r2", "exclude": ["status"]}]
+        )
+        self.assertEqual(
+            resources,
+            {
+                "r1": [
+                    {
+                        "metadata": {"name": "a", "annotations": {"foo": "bar"}},
+                        "spec": {"foo": "bar"},
+                        "status": {"foo": "bar"},
+                    }
+                ],
+                "r2": [
+                    {
+                        "metadata": {
+                            "name": "a",
+                            "managedFields": [],
+                            "annotations": item["metadata"]["annotations"],
+                        },
+                        "spec": {"foo": "bar"},
+                    }
+                ],
+            },
+        )
+
+    def test_project_item(self):
+        """Ensure that fields are kept and removed as expected."""
+        item = {
+            "metadata": {"name": "a", "namespace": "b", "labels": {"c": "d"}},
+            "spec": {
+                "containers": [
+                    {"name": "e", "image": "f", "env": []},
+                    {"name": "g", "image": "h"},
+                ],
+                "volumes": [],
+            },
+        }
+        self.assertEqual(
+            project_item(
+                _json_copy(item),
+                include=["spec.containers"],
+                exclude=[["spec", "containers", "env"]],
+            ),
+            {
+                "metadata": {"name": "a", "namespace": "b"},
+                "spec": {
+                    "containers": [
+                        {"name": "e", "image": "f"},
+                        {"name": "g", "image": "h"},
+                    ]
+                },
+            },
+        )
+        self.assertEqual(
+            project_item(
+                _json_copy(item), include=["metadata", "spec.containers.image"]
+            ),
+            {
+                "metadata": item["metadata"],
+                "spec": {"containers": [{"image": "f"}, {"image": "h"}]},
+            },
+        )
+        self.assertEqual(project_item(_json_copy(item)), item)
+
+    def test_get_cluster_resources_metadata_format(self):
+        """Ensure that object metadata only lists can be requested."""
+        self.session.get = MagicMock(return_value=self.resp)
+        resources = get_cluster_resources(
+            self.session, "", [{"name": "r1", "format": "metadata"}]
+        )
+        self.assertEqual(resources, {"r1": self.data})
+        self.session.get.assert_called_once_with(
+            "api/v1/r1",
+            params={"limit": 500},
+            verify=True,
+            headers={
+                "Accept": (
+                    "application/json;as=PartialObjectMetadataList;v=v1;"
+                    "g=meta.k8s.io,application/json"
+                )
+            },
+        )
+
+    def test_get_cluster_resources_metadata_watch(self):
+        """Ensure that metadata lists are watched with single object metadata."""
+        event = {"type": "MODIFIED", "object": _obj("a", "12")}
+        self.resp.iter_lines = MagicMock(return_value=[json.dumps(event).encode()])
+        self.session.get = MagicMock(return_value=self.resp)
+        versions = {"r1": "10"}
+        resources = get_cluster_resources(
+            self.session,
+            "",
+            [{"name": "r1", "format": "metadata"}],
+            resource_versions=versions,
+            previous={"r1": [_obj("a", "1")]},
+        )
+        self.assertEqual(resources, {"r1": [_obj("a", "12")]})
+        self.assertEqual(versions, {"r1": "12"})
+        self.assertEqual(
+            self.session.get.call_args[1]["headers"],
+            {
+                "Accept": (
+                    "application/json;as=PartialObjectMetadata;v=v1;"
+                    "g=meta.k8s.io,application/json"
+                )
+            },
+        )
+        self.assertEqual(self.session.get.call_args[1]["params"]["watch"], 1)
+
+    def test_get_cluster_resources_table_format(self):
+        """Ensure that table rows are returned as items."""
+        self.resp.json = MagicMock(
+            return_value={
+                "kind": "Table",
+                "columnDefinitions": [{"name": "Name"}, {"name": "Age"}],
+                "rows": [
+                    {"cells": ["a", "1d"], "object": {"metadata": {"name": "a"}}},
+                    {"cells": ["b", "2d"]},
+                ],
+                "metadata": {"resourceVersion": "5"},
+            }
+        )
+        self.session.get = MagicMock(return_value=self.resp)
+        resources = get_cluster_resources(
+            self.session, "", [{"name": "r1", "format": "table"}]
+        )
+        self.assertEqual(
+            resources,
+            {
+                "r1": [
+                    {"cells": {"Name": "a", "Age": "1d"}, "metadata": {"name": "a"}},
+                    {"cells": {"Name": "b", "Age": "2d"}},
+                ]
+            },
+        )
+        self.assertIn("as=Table", self.session.get.call_args[1]["headers"]["Accept"])
+
+    def test_get_cluster_resources_namespace_sharding(self):
+        """Ensure that namespaced lists are merged in namespace order."""
+        lists = {
+            "api/v1/namespaces": {
+                "items": [{"metadata": {"name": n}} for n in ["ns1", "ns2", "ns3"]]
+            },
+            "api/v1/namespaces/ns1/r1": {"items": ["a", "b"]},
+            "api/v1/namespaces/ns3/r1": {"items": ["c"]},
+        }
+
+        def _get(url, **kwargs):
+            resp = MagicMock()
+            if url not in lists:
+                resp.status_code = 404
+                resp.raise_for_status = MagicMock(side_effect=HTTPError())
+            resp.json = MagicMock(return_value=lists.get(url))
+            return resp
+
+        self.session.get = MagicMock(side_effect=_get)
+        versions = {}
+        resources = get_cluster_resources(
+            self.session,
+            "",
+            [{"name": "r1", "namespace_sharding": True}],
+            resource_versions=versions,
+            namespace_workers=3,
+        )
+        self.assertEqual(resources, {"r1": ["a", "b", "c"]})
+        self.assertEqual(versions, {"r1": None})
+        self.assertEqual(self.session.get.call_count, 4)
+
+    def test_get_cluster_resources_selectors(self):
+        """Ensure that selectors are sent to the API server."""
+        self.session.get = MagicMock(return_value=self.resp)
+        get_cluster_resources(
+            self.session,
+            "",
+            [
+                {
+                    "name": "r1",
+                    "label_selector": ["compliance=in-scope", "tier!=test"],
+                    "field_selector": "status.phase=Running",
+                }
+            ],
+        )
+        self.session.get.assert_called_once_with(
+            "api/v1/r1",
+            params={
+                "labelSelector": "compliance=in-scope,tier!=test",
+                "fieldSelector": "status.phase=Running",
+                "limit": 500,
+            },
+            verify=True,
+        )
+
+    def test_get_cluster_resources_namespaces(self):
+        """Ensure that only the namespaces configured are listed."""
+        lists = {
+            "api/v1/namespaces/ns1/r1": {"items": ["a", "b"]},
+            "api/v1/namespaces/ns2/r1": {"items": ["c"]},
+        }
+        self.session.get = MagicMock(
+            side_effect=lambda url, **kw: MagicMock(json=lambda: lists[url])
+        )
+        versions = {"r1": "5"}
+        resources = get_cluster_resources(
+            self.session,
+            "",
+            [{"name": "r1", "namespaces": ["ns2", "ns1"], "label_selector": "x=y"}],
+            resource_versions=versions,
+            previous={"r1": ["z"]},
+        )
+        self.assertEqual(resources, {"r1": ["a", "b", "c"]})
+        self.assertEqual(versions, {"r1": None})
+        self.assertEqual(
+            [c[0][0] for c in self.session.get.call_args_list],
+            ["api/v1/namespaces/ns1/r1", "api/v1/namespaces/ns2/r1"],
+        )
+        for call in self.session.get.call_args_list:
+            self.assertEqual(call[1]["params"], {"labelSelector": "x=y", "limit": 500})
+
+    def test_watch_resources_selectors(self):
+        """Ensure that watches are restricted by selectors."""
+        self.resp.iter_lines = MagicMock(return_value=[])
+        self.session.get = MagicMock(return_value=self.resp)
+        watch_resources(
+            self.session, "api/v1/r1", [], "10", params={"labelSelector": "x=y"}
+        )
+        params = self.session.get.call_args[1]["params"]
+        self.assertEqual(params["labelSelector"], "x=y")
+        self.assertEqual(params["resourceVersion"], "10")
+
+    def test_get_cluster_resources_unknown_format(self):
+        """Ensure that an unsupported format raises an error."""
+        with self.assertRaises(ValueError):
+            get_cluster_resources(self.session, "", [{"name": "r1", "format": "x"}])
+
+    def test_get_cluster_resources_fresh(self):
+        """Ensure that fresh resource types are not retrieved again."""
+        self.session.get = MagicMock(return_value=self.resp)
+        versions = {"r1": "5", "r2": "6"}
+        resources = get_cluster_resources(
+            self.session,
+            "",
+            ["r1", {"name": "r2", "ttl": 3600}],
+            resource_versions=versions,
+            previous={"r2": ["baz"]},
+            fresh={"r2"},
+        )
+        self.session.get.assert_called_once_with(
+            "api/v1/r1", params={"limit": 500}, verify=True
+        )
+        self.assertEqual(resources, {"r1": self.data, "r2": ["baz"]})
+        self.assertEqual(versions, {"r1": None, "r2": "6"})
+
+    def test_get_resource_type_ttls(self):
+        """Ensure that resource types without a TTL get the default."""
+        ttls = get_resource_type_ttls(["r1", {"name": "r2", "ttl": 60}], 3600)
+        self.assertEqual(ttls, {"r1": 3600, "r2": 60})
+
+    def test_get_fresh_resource_types(self):
+        """Ensure that only resource types within their TTL are fresh."""
+        ttls = {"r1": 3600, "r2": 60, "r3": 60}
+        fetched = {"r1": 1000, "r2": 1000}
+        self.assertEqual(
+            get_fresh_resource_types(ttls, fetched, now=1059), {"r1", "r2"}
+        )
+        self.assertEqual(get_fresh_resource_types(ttls, fetched, now=1060), {"r1"})
+        self.assertEqual(
+            get_fresh_resource_types(ttls, fetched, tolerance=10, now=1050), {"r1"}
+        )
+
+
+class DiscoveryCacheTest(unittest.TestCase):
+    """Arboretum Kubernetes API discovery cache tests."""
+
+    def setUp(self):
+        """Initialize test objects."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name, "discovery.json")
+        discovery = {
+            "api": {"versions": ["v1"]},
+            "apis": {
+                "groups": [
+                    {"name": "apps", "preferredVersion": {"groupVersion": "apps/v1"}},
+                    {
+                        "name": "metrics.k8s.io",
+                        "preferredVersion": {"groupVersion": "metrics.k8s.io/v1"},
+                    },
+                ]
+            },
+            "api/v1": {
+                "resources": [
+                    {"name": "pods", "singularName": "pod", "namespaced": True},
+                    {"name": "pods/log", "namespaced": True},
+                    {"name": "nodes", "singularName": "node", "shortNames": ["no"]},
+                ]
+            },
+            "apis/apps/v1": {
+                "resources": [
+                    {
+                        "name": "deployments",
+                        "singularName": "deployment",
+                        "namespaced": True,
+                        "shortNames": ["deploy"],
+                    }
+                ]
+            },
+            "apis/apps/v1/deployments": {"items": []},
+        }
+
+        def _get(url, **kwargs):
+            resp = MagicMock()
+            if url not in discovery:
+                resp.status_code = 503
+                resp.raise_for_status = MagicMock(side_effect=HTTPError())
+            resp.json = MagicMock(return_value=discovery.get(url))
+            return resp
+
+        self.session = MagicMock()
+        self.session.baseurl = "https://cluster"
+        self.session.get = MagicMock(side_effect=_get)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.tempdir.cleanup()
+
+    def test_resolve(self):
+        """Ensure that resource names resolve to their preferred version."""
+        cache = DiscoveryCache(self.path)
+        pods = {"path": "api/v1/pods", "namespaced": True}
+        deployments = {"path": "apis/apps/v1/deployments", "namespaced": True}
+        self.assertEqual(cache.resolve(self.session, "pods"), pods)
+        self.assertEqual(cache.resolve(self.session, "Pod"), pods)
+        self.assertEqual(cache.resolve(self.session, "deployments"), deployments)
+        self.assertEqual(cache.resolve(self.session, "deploy"), deployments)
+        self.assertEqual(cache.resolve(self.session, "deployment.apps"), deployments)
+        self.assertEqual(
+            cache.resolve(self.session, "apps/v1beta1/deployments"),
+            {"path": "apis/apps/v1beta1/deployments", "namespaced": True},
+        )
+        self.assertEqual(
+            cache.resolve(self.session, "no"),
+            {"path": "api/v1/nodes", "namespaced": False},
+        )
+        self.assertIsNone(cache.resolve(self.session, "pods/log"))
+        self.assertIsNone(cache.resolve(self.session, "foo"))
+        # /api, /apis, /api/v1, /apis/apps/v1 and /apis/metrics.k8s.io/v1
+        self.assertEqual(self.session.get.call_count, 5)
+
+    def test_persisted(self):
+        """Ensure that discovery results are reused until they expire."""
+        DiscoveryCache(self.path).resolve(self.session, "pods")
+        self.assertEqual(self.session.get.call_count, 5)
+        DiscoveryCache(self.path).resolve(self.session, "deploy")
+        self.assertEqual(self.session.get.call_count, 5)
+        DiscoveryCache(self.path, ttl=0).resolve(self.session, "deploy")
+        self.assertEqual(self.session.get.call_count, 10)
+
+    def test_private_file(self):
+        """Ensure that the cache is private to the current user."""
+        path = Path(self.tempdir.name, "cache", "discovery.json")
+        DiscoveryCache(path).resolve(self.session, "pods")
+        self.assertEqual(path.parent.stat().st_mode & 0o777, 0o700)
+        self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+        self.assertIsNotNone(DiscoveryCache(path).resolve(self.session, "deploy"))
+
+    def test_shared_directory_refused(self):
+        """Ensure that a cache in a directory others can write is refused."""
+        path = Path(self.tempdir.name, "shared", "discovery.json")
+        DiscoveryCache(path).resolve(self.session, "pods")
+        os.chmod(path.parent, 0o777)
+        with self.assertRaises(ValueError):
+            DiscoveryCache(path)
+        with self.assertRaises(ValueError):
+            DiscoveryCache(Path(path.parent, "other.json")).resolve(
+                self.session, "pods"
+            )
+
+    def test_default_path(self):
+        """Ensure that the cache defaults to the user cache directory."""
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": self.tempdir.name}):
+            cache = DiscoveryCache()
+        self.assertEqual(
+            cache.path, Path(self.tempdir.name, "arboretum", "kube_discovery.json")
+        )
+
+    def test_unwritable_path(self):
+        """Ensure that a cache file that cannot be written is kept in memory."""
+        Path(self.tempdir.name, "home").touch()
+        path = Path(self.tempdir.name, "home", ".cache", "discovery.json")
+        cache = DiscoveryCache(path)
+        with self.assertLogs("arboretum.common.kube_utils", "WARNING"):
+            self.assertIsNotNone(cache.resolve(self.session, "pods"))
+        self.assertIsNone(cache.path)
+        self.assertIsNotNone(cache.resolve(self.session, "deploy"))
+        self.assertEqual(self.session.get.call_count, 5)
+
+    def test_get_cluster_resources(self):
+        """Ensure that resources are listed from the discovered path."""
+        cache = DiscoveryCache("")
+        get_cluster_resources(
+            self.session, "", ["deploy", "foo"], page_size=0, discovery=cache
+        )
+        self.session.get.assert_called_with(
+            "apis/apps/v1/deployments", params={}, verify=True
+        )
+        self.assertFalse(self.path.exists())
+
+
+def _json_copy(data):
+    return json.loads(json.dumps(data))
+
+
+def _obj(name, version, namespace=None):
+    metadata = {"name": name, "resourceVersion": version}
+    if namespace:
+        metadata["namespace"] = namespace
+    return {"metadata": metadata}
@@ -0,0 +1,99 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum IBM Cloud resource controller utility module tests."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from arboretum.common.resource_controller_ibm_utils import (
+    iter_resource_instances,
+    iter_sharded_resource_instances,
+)
+
+
+def _response(data):
+    resp = MagicMock()
+    resp.json.return_value = data
+    return resp
+
+
+class ResourceControllerIBMTest(unittest.TestCase):
+    """Arboretum IBM Cloud resource controller utility tests."""
+
+    def setUp(self):
+        """Initialize a session serving two pages per resource group."""
+        self.session = MagicMock()
+        self.pages = {
+            None: [{"id": "a"}, {"id": "b"}, {"id": "c"}],
+            "rg1": [{"id": "d"}],
+            "rg2": [{"id": "e"}, {"id": "f"}, {"id": "g"}],
+        }
+
+        def get(url, params=None):
+            if url == "/v2/resource_groups":
+                return _response({"resources": [{"id": "rg2"}, {"id": "rg1"}]})
+            if params is not None:
+                group, start = params.get("resource_group_id"), 0
+            else:
+                group, start = url.split("?")[1].split("&")
+                group, start = group or None, int(start)
+            instances = self.pages[group][start : start + 2]
+            next_url = None
+            if start + 2 < len(self.pages[group]):
+                next_url = f'/v2/resource_instances?{group or ""}&{start + 2}'
+            return _response({"resources": instances, "next_url": next_url})
+
+        self.session.get.side_effect = get
+
+    def test_iter_resource_instances(self):
+        """Ensure pages are followed using the next URL."""
+        instances = iter_resource_instances(self.session, 2)
+        self.assertEqual([i["id"] for i in instances], ["a", "b", "c"])
+        self.assertEqual(self.session.get.call_count, 2)
+        self.session.get.assert_any_call("/v2/resource_instances", params={"limit": 2})
+        self.session.get.assert_called_with("/v2/resource_instances?&2", params=None)
+
+    def test_iter_resource_instances_projected(self):
+        """Ensure instances are projected as they are retrieved."""
+        instances = iter_resource_instances(self.session, 2, lambda i: i["id"].upper())
+        self.assertEqual(list(instances), ["A", "B", "C"])
+
+    def test_iter_sharded_resource_instances(self):
+        """Ensure resource groups are paged separately in id order."""
+        for max_workers in (1, 4):
+            instances = iter_sharded_resource_instances(
+                self.session, 2, max_workers=max_workers
+            )
+            self.assertEqual([i["id"] for i in instances], ["d", "e", "f", "g"])
+        self.session.get.assert_any_call(
+            "/v2/resource_instances", params={"limit": 2, "resource_group_id": "rg1"}
+        )
+
+    def test_iter_sharded_resource_instances_bounded(self):
+        """Ensure resource groups are listed at most max_workers ahead."""
+        self.pages = {f"rg{n}": [{"id": n}] for n in range(10)}
+        groups = {"resources": [{"id": g} for g in self.pages]}
+        get = self.session.get.side_effect
+        self.session.get.side_effect = lambda url, params=None: (
+            _response(groups) if url == "/v2/resource_groups" else get(url, params)
+        )
+        with self.assertLogs(
+            "arboretum.common.resource_controller_ibm_utils", "WARNING"
+        ):
+            instances = iter_sharded_resource_instances(self.session, 2, max_workers=2)
+            for yielded, instance in enumerate(instances, 1):
+                # Groups listed besides the resource groups list request
+                listed = self.session.get.call_count - 1
+                self.assertLessEqual(listed, yielded + 2)
+        self.assertEqual(yielded, 10)
@@ -0,0 +1,131 @@
+# Copyright (c) 2021 IBM Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Arboretum token cache tests."""
+
+import base64
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from arboretum.common.token_cache import TokenCache, get_jwt_expiry
+
+
+class TokenCacheTest(unittest.TestCase):
+    """Arboretum token cache tests."""
+
+    @patch("arboretum.common.token_cache.time.time")
+    def test_expiry(self, mock_time):
+        """Ensure tokens are fetched again when due to expire."""
+        mock_time.return_value = 1000
+        cache = TokenCache(margin=10)
+        fetch = MagicMock(side_effect=[("a", 1100), ("b", 1200)])
+        self.assertEqual(cache.get("k", fetch), "a")
+        mock_time.return_value = 1089
+        self.assertEqual(cache.get("k", fetch), "a")
+        mock_time.return_value = 1090
+        self.assertEqual(cache.get("k", fetch), "b")
+        self.assertEqual(fetch.call_count, 2)
+
+    @patch("arboretum.common.token_cache.time.time")
+    def test_refresh(self, mock_time):
+        """Ensure tokens are refreshed before expiry and fetched after."""
+        mock_time.return_value = 1000
+        cache = TokenCache(margin=10)
+        fetch = MagicMock(side_effect=[("a", 1100), ("c", 1300)])
+        refresh = MagicMock(side_effect=[("b", 1200), Exception("boom!")])
+        cache.get("k", fetch, refresh)
+        mock_time.return_value = 1095
+        self.assertEqual(cache.get("k", fetch, refresh), "b")
+        refresh.assert_called_once_with("a")
+        mock_time.return_value = 1195
+        self.assertEqual(cache.get("k", fetch, refresh), "c")
+        mock_time.return_value = 1400
+        with self.assertRaises(StopIteration):
+            cache.get("k", fetch, refresh)
+        self.assertEqual(refresh.call_count, 2)
+
+    def test_not_cached(self):
+        """Ensure tokens without expiry and invalidated tokens are not cached."""
+        cache = TokenCache()
+        fetch = MagicMock(side_effect=[("a", None), ("b", time.time() + 3600)])
+        self.assertEqual(cache.get("k", fetch), "a")
+        self.assertEqual(cache.get("k", fetch), "b")
+        cache.invalidate("k")
+        cache.set("j", "c", time.time() + 3600)
+        self.assertEqual(cache.get("j", fetch), "c")
+        with self.assertRaises(StopIteration):
+            cache.get("k", fetch)
+
+    def test_concurrent_get(self):
+        """Ensure a token is fetched once when requested by several threads."""
+        cache = TokenCache()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return "a", time.time() + 3600
+
+        threads = [
+            threading.Thread(target=cache.get, args=("k", fetch)) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_persisted(self):
+        """Ensure that persisted tokens are reused by later caches until expiry."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = Path(tempdir, "cache", "tokens.json")
+            expires_at = time.time() + 3600
+            fetch = MagicMock(
+                side_effect=[(("a", None), expires_at), ("b", time.time() + 1)]
+            )
+            cache = TokenCache(path=path)
+            cache.get(("k", "1"), fetch)
+            cache.get(("j", "2"), fetch)
+            self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+            cache = TokenCache(path=path)
+            self.assertEqual(cache.get(("k", "1"), fetch), ("a", None))
+            with self.assertRaises(StopIteration):
+                cache.get(("j", "2"), fetch)
+            cache.clear()
+            self.assertEqual(json.loads(path.read_text()), {})
+
+    def test_unwritable_path(self):
+        """Ensure that a cache file that cannot be written is kept in memory."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            Path(tempdir, "home").touch()
+            cache = TokenCache(path=Path(tempdir, "home", ".cache", "tokens.json"))
+            fetch = MagicMock(return_value=("a", time.time() + 3600))
+            with self.assertLogs("arboretum.common.token_cache", "WARNING"):
+                self.assertEqual(cache.get(("k",), fetch), "a")
+            self.assertIsNone(cache.path)
+            self.assertEqual(cache.get(("k",), fetch), "a")
+            fetch.assert_called_once_with()
+
+    def test_get_jwt_expiry(self):
+        """Ensure that the expiry of JSON Web Tokens is decoded."""
+        payload = base64.urlsafe_b64encode(json.dumps({"exp": 1234}).encode())
+        token = f'e30.{payload.decode().rstrip("=")}.sig'
+        self.assertEqual(get_jwt_expiry(token), 1234)
+        self.assertIsNone(get_jwt_expiry("e30.e30.sig"))
+        self.assertIsNone(get_jwt_expiry("opaque"))
+        self.assertIsNone(get_jwt_expiry(None))